@@ -0,0 +1,224 @@
+import base64
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeGitHubConfig:
+    """
+    Shape of the synthetic repository and pull request served by FakeGitHub.
+    ``per_page`` caps the page size of paginated endpoints, as GitHub caps it at 100.
+    """
+
+    def __init__(self, owner: str = "bench", repo: str = "repo", pr_number: int = 1,
+                 pr_files: int = 300, patch_lines: int = 40, per_page: int = 100,
+                 tree_files: int = 5000, file_size: int = 4096, zipball_files: int = 500,
+                 rate_limit: int = 5000, latency: float = 0.0, seed: int = 42):
+        self.owner = owner
+        self.repo = repo
+        self.pr_number = pr_number
+        self.pr_files = pr_files
+        self.patch_lines = patch_lines
+        self.per_page = per_page
+        self.tree_files = tree_files
+        self.file_size = file_size
+        self.zipball_files = zipball_files
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.seed = seed
+
+
+class FakeGitHub:
+    """
+    Local stand-in for the GitHub REST endpoints used by the tools.
+
+    Counts requests and bytes so benchmarks can report them, supports
+    ETag revalidation, Link pagination and rate limit headers.
+    """
+
+    def __init__(self, config: Optional[FakeGitHubConfig] = None):
+        self.config = config or FakeGitHubConfig()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.remaining = self.config.rate_limit
+        self._build()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def repo(self) -> str:
+        return f"{self.config.owner}/{self.config.repo}"
+
+    def start(self) -> "FakeGitHub":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests = self.not_modified = self.bytes_in = self.bytes_out = 0
+
+    def counters(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
+
+    def _build(self) -> None:
+        config = self.config
+        rng = random.Random(config.seed)
+
+        def text(size: int) -> bytes:
+            line = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(60)) + "\n"
+            return (line * (size // len(line) + 1))[:size].encode("utf-8")
+
+        self.files = {f"src/pkg{index % 50}/module_{index}.py": text(config.file_size)
+                      for index in range(config.tree_files)}
+        self.blob_shas = {
+            path: hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+            for path, content in self.files.items()
+        }
+        self.commit_sha = "commit" + "0" * 34
+        self.tree = {
+            "sha": "tree" + "0" * 36,
+            "truncated": False,
+            "tree": [{"path": path, "type": "blob", "sha": sha, "size": len(self.files[path])}
+                     for path, sha in self.blob_shas.items()],
+        }
+
+        patch_lines = ["@@ -1,{0} +1,{0} @@".format(config.patch_lines)]
+        for line in range(config.patch_lines):
+            patch_lines.append(("+" if line % 3 == 0 else "-" if line % 3 == 1 else " ") + f"value_{line} = {line}")
+        patch = "\n".join(patch_lines)
+        self.pr_files = [{"filename": f"src/changed_{index}.py", "status": "modified", "patch": patch}
+                         for index in range(config.pr_files)]
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zipped:
+            for path in list(self.files)[:config.zipball_files]:
+                zipped.writestr(f"{config.owner}-{config.repo}-abc123/{path}", self.files[path])
+        self.zipball = archive.getvalue()
+
+    def _route(self, method: str, path: str, query: dict, body: bytes, accept: str = ""):
+        """
+        Returns (status, payload, extra headers) for a request.
+        """
+        prefix = f"/repos/{self.repo}"
+        if not path.startswith(prefix):
+            return 404, {"message": "Not Found"}, {}
+        path = path[len(prefix):]
+        config = self.config
+
+        if method == "GET" and path == "/pulls":
+            return 200, [{"number": config.pr_number, "title": "Benchmark PR", "head": {"sha": "head" + "0" * 36}}], {}
+        if method == "GET" and path == f"/pulls/{config.pr_number}":
+            return 200, {"number": config.pr_number, "head": {"sha": "head" + "0" * 36}}, {}
+        if method == "GET" and path == f"/pulls/{config.pr_number}/files":
+            per_page = min(int(query.get("per_page", [30])[0]), config.per_page)
+            page = int(query.get("page", [1])[0])
+            last = max(1, -(-len(self.pr_files) // per_page))
+            items = self.pr_files[(page - 1) * per_page:page * per_page]
+            base = f"{self.url}/repos/{self.repo}/pulls/{config.pr_number}/files?per_page={per_page}"
+            links = []
+            if page < last:
+                links.append(f'<{base}&page={page + 1}>; rel="next"')
+            links.append(f'<{base}&page={last}>; rel="last"')
+            return 200, items, {"Link": ", ".join(links)}
+        if method == "GET" and path.startswith("/commits/"):
+            if accept == "application/vnd.github.sha":
+                return 200, self.commit_sha.encode("ascii"), {"Content-Type": "text/plain"}
+            return 200, {"sha": self.commit_sha, "commit": {"tree": {"sha": self.tree["sha"]}}}, {}
+        if method == "GET" and path.startswith("/git/trees/"):
+            return 200, self.tree, {}
+        if method == "GET" and path.startswith("/git/blobs/"):
+            sha = path.rsplit("/", 1)[-1]
+            for file_path, blob_sha in self.blob_shas.items():
+                if blob_sha == sha:
+                    content = base64.b64encode(self.files[file_path]).decode("ascii")
+                    return 200, {"sha": sha, "encoding": "base64", "content": content}, {}
+            return 404, {"message": "Not Found"}, {}
+        if path.startswith("/contents/"):
+            file_path = path[len("/contents/"):]
+            if method == "PUT":
+                return 201, {"content": {"path": file_path}}, {}
+            if file_path not in self.files:
+                return 404, {"message": "Not Found"}, {}
+            content = base64.b64encode(self.files[file_path]).decode("ascii")
+            return 200, {"path": file_path, "sha": self.blob_shas[file_path], "encoding": "base64",
+                         "content": content}, {}
+        if method == "GET" and path.startswith("/zipball/"):
+            return 200, self.zipball, {"Content-Type": "application/zip"}
+        return 404, {"message": "Not Found"}, {}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else b""
+                parts = urlsplit(self.path)
+                status, payload, headers = server._route(self.command, parts.path, parse_qs(parts.query), body,
+                                                         self.headers.get("Accept", ""))
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+                if server.config.latency:
+                    time.sleep(server.config.latency)
+
+                with server._lock:
+                    server.requests += 1
+                    server.bytes_in += len(body)
+                    not_modified = status == 200 and self.command == "GET" and self.headers.get("If-None-Match") == etag
+                    if not_modified:
+                        server.not_modified += 1
+                    else:
+                        server.remaining = max(server.remaining - 1, 0)
+                        if status == 200:
+                            server.bytes_out += len(data)
+                    remaining = server.remaining
+
+                self.send_response(304 if not_modified else status)
+                self.send_header("ETag", etag)
+                self.send_header("X-RateLimit-Limit", str(server.config.rate_limit))
+                self.send_header("X-RateLimit-Remaining", str(remaining))
+                self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+                self.send_header("X-RateLimit-Resource", "core")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if not_modified:
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_header("Content-Type", headers.get("Content-Type", "application/json"))
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
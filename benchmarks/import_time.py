@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Import-time benchmark of the entry point modules.
+
+Each module is imported in a fresh interpreter, several times, and the
+slowest dependencies are listed from ``python -X importtime``:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time pr_review_crew.main --budget 0.5
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "pr_review_crew.main",
+    "pr_review_crew.tools.registry",
+    "pr_review_crew.tools.pr_review_tool",
+    "pr_review_crew.pr_creation_crew",
+    "pr_review_crew.crew",
+]
+
+# "import time: self [us] | cumulative | imported package"
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+_TIMER = (
+    "import sys, time; started = time.perf_counter(); import {module}; "
+    "sys.stdout.write(repr(time.perf_counter() - started))"
+)
+
+
+def time_import(module: str) -> float:
+    """
+    Seconds spent importing ``module`` in a new interpreter.
+    """
+    output = subprocess.run([sys.executable, "-c", _TIMER.format(module=module)],
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _import_times(code: str):
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True).stderr
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is not None:
+            yield int(match.group(2)), len(match.group(3)), match.group(4).strip()
+
+
+def slowest_imports(module: str, top: int) -> list:
+    """
+    Top-level packages pulled in by ``module``, by cumulative import time.
+    Modules the interpreter imports at startup are left out.
+    """
+    startup = {name for _, _, name in _import_times("pass")}
+    packages = {}
+    for cumulative, indent, name in _import_times(f"import {module}"):
+        if name in startup:
+            continue
+        root = name.split(".", 1)[0]
+        # The least indented entry of a package is the one that imported it
+        if indent < packages.get(root, (0, 10 ** 6))[1]:
+            packages[root] = (cumulative, indent)
+    ranked = sorted(((cumulative / 1e6, root) for root, (cumulative, _) in packages.items()), reverse=True)
+    return ranked[:top]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Slowest dependencies to list per module")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Fail when the median import of a module exceeds this many seconds")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for module in args.modules:
+        try:
+            runs = [time_import(module) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<40} import failed:\n{e.stderr}")
+            ok = False
+            continue
+        median = statistics.median(runs)
+        over = args.budget is not None and median > args.budget
+        ok = ok and not over
+        print(f"{module:<40} median {median * 1000:8.1f} ms  min {min(runs) * 1000:8.1f} ms"
+              f"{'  OVER BUDGET' if over else ''}")
+        for seconds, package in slowest_imports(module, args.top):
+            print(f"    {package:<36} {seconds * 1000:8.1f} ms")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
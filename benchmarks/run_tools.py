@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+Offline benchmark of the GitHub tools against a local FakeGitHub server.
+
+Reports latency, request count and bytes transferred per tool, stores the
+results as JSON and compares them with a previous run:
+
+    python -m benchmarks.run_tools --label my-change
+    python -m benchmarks.run_tools --compare benchmarks/results/<baseline>.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_github import FakeGitHub, FakeGitHubConfig
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _percentile(values, percent: float) -> float:
+    ordered = sorted(values)
+    position = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[position]
+
+
+def _scenarios(server: FakeGitHub):
+    # Imported here: the tools read REPO and GITHUB_API_URL at import time
+    from pr_review_crew.tools import pr_review_tool
+
+    pr_number = server.config.pr_number
+    existing_file = next(iter(server.files))
+
+    def fetch_changed_lines():
+        pr_review_tool._diff_indexes.clear()
+        return pr_review_tool.fetch_changed_lines.run(pr_number=pr_number)
+
+    # name: (scenario, check of its result); a failed tool must not be timed as if it worked
+    return {
+        "fetch_changed_lines": (
+            fetch_changed_lines,
+            lambda result: result.startswith("Fetched changed lines")
+            and f"src/changed_{server.config.pr_files - 1}.py" in result),
+        "list_files_in_repo": (
+            lambda: pr_review_tool.ListFilesInRepoTool().run(branch="main"),
+            lambda result: existing_file in result),
+        "download_file_from_repo": (
+            lambda: pr_review_tool.DownloadFileFromRepoTool().run(file_path=existing_file, branch="main"),
+            lambda result: result == server.files[existing_file].decode("utf-8")),
+        "download_repository": (
+            lambda: pr_review_tool.DownloadRepositoryTool().run(
+                repo_url=f"https://github.com/{server.repo}", branch="main"),
+            lambda result: result.startswith(("Repository downloaded", "Repository already up to date"))),
+        "create_file": (
+            lambda: pr_review_tool.create_file.run(
+                branch_name="main", file_path=existing_file, content="print('benchmark')\n",
+                commit_message="Benchmark commit"),
+            lambda result: "committed successfully" in result),
+    }
+
+
+class ScenarioFailed(RuntimeError):
+    """
+    Raised when a tool's result shows it failed, so the run is not reported as a timing.
+    """
+
+
+def run_benchmarks(config: FakeGitHubConfig, repeat: int, only=None) -> dict:
+    """
+    Runs every scenario ``repeat`` times. The first run of each scenario is
+    reported separately as "cold" since it fills the caches. Raises
+    ScenarioFailed when a tool does not return what a successful run does.
+    """
+    server = FakeGitHub(config).start()
+    os.environ["GITHUB_API_URL"] = server.url
+    os.environ["REPO"] = server.repo
+    os.environ.setdefault("GITHUB_TOKEN", "benchmark-token")
+    os.environ.setdefault("PR_REVIEW_CACHE_DIR", tempfile.mkdtemp(prefix="pr_review_bench_"))
+
+    results = {}
+    try:
+        for name, (scenario, succeeded) in _scenarios(server).items():
+            if only and name not in only:
+                continue
+            runs = []
+            for _ in range(repeat):
+                server.reset_counters()
+                started = time.perf_counter()
+                result = scenario()
+                elapsed = time.perf_counter() - started
+                if not isinstance(result, str) or not succeeded(result):
+                    raise ScenarioFailed(f"Scenario {name} failed: {str(result)[:200]}")
+                runs.append({"seconds": elapsed, **server.counters()})
+            warm = runs[1:] or runs
+            results[name] = {
+                "cold": runs[0],
+                "median_seconds": statistics.median(run["seconds"] for run in warm),
+                "p95_seconds": _percentile([run["seconds"] for run in warm], 95),
+                "requests": statistics.mean(run["requests"] for run in warm),
+                "not_modified": statistics.mean(run["not_modified"] for run in warm),
+                "bytes_in": statistics.mean(run["bytes_in"] for run in warm),
+                "bytes_out": statistics.mean(run["bytes_out"] for run in warm),
+            }
+            print(f"{name:<26} cold {runs[0]['seconds'] * 1000:8.1f} ms  "
+                  f"warm {results[name]['median_seconds'] * 1000:8.1f} ms  "
+                  f"{results[name]['requests']:6.1f} req  {results[name]['bytes_out'] / 1024:9.1f} KiB")
+    finally:
+        server.stop()
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Prints the change of each metric against a baseline and returns False
+    when a metric regressed by more than ``threshold`` (a fraction).
+    """
+    ok = True
+    for name, metrics in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for metric in ("median_seconds", "requests", "bytes_out"):
+            before, after = previous[metric], metrics[metric]
+            change = (after - before) / before if before else 0.0
+            regressed = change > threshold
+            ok = ok and not regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<26} {metric:<15} {before:12.4f} -> {after:12.4f} ({change:+.1%}){flag}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pr-files", type=int, default=300)
+    parser.add_argument("--per-page", type=int, default=100, help="Largest page the server returns")
+    parser.add_argument("--patch-lines", type=int, default=40)
+    parser.add_argument("--tree-files", type=int, default=5000)
+    parser.add_argument("--file-size", type=int, default=4096)
+    parser.add_argument("--zipball-files", type=int, default=500)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated server latency in seconds")
+    parser.add_argument("--only", nargs="*", help="Scenarios to run")
+    parser.add_argument("--label", default=None, help="Name of the results file (default: git revision)")
+    parser.add_argument("--compare", default=None, help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed regression (fraction)")
+    args = parser.parse_args(argv)
+
+    config = FakeGitHubConfig(
+        pr_files=args.pr_files, per_page=args.per_page, patch_lines=args.patch_lines, tree_files=args.tree_files,
+        file_size=args.file_size, zipball_files=args.zipball_files, rate_limit=args.rate_limit,
+        latency=args.latency,
+    )
+    revision = _git_revision()
+    report = {
+        "revision": revision,
+        "created_at": time.time(),
+        "config": vars(config),
+        "repeat": args.repeat,
+    }
+    try:
+        report["results"] = run_benchmarks(config, args.repeat, args.only)
+    except ScenarioFailed as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{args.label or revision}.json")
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        if not compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,85 +1,137 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import GithubSearchTool
-from pr_review_crew.tools.pr_review_tool import PrReviewTool
+from pr_review_crew.tools.pr_review_tool import (
+    fetch_changed_lines, fetch_diff_hunk, fetch_open_prs, fetch_review_chunk, get_pr_comments,
+    mark_file_reviewed, plan_review, post_change_suggestion, static_checks, submit_review
+)
+from pr_review_crew import tracing
+from pr_review_crew.crew_memory import crew_memory
+from pr_review_crew.llm_cache import CachedLLM, no_llm_cache
+from pr_review_crew.repo_context import ContextPlan, escape_braces, plan_context, reuse_report, save_report_callback
+from pr_review_crew.task_graph import DagCrew
+from pr_review_crew.tools import registry
+from typing import Optional
 import os
-from crewai_tools.tools.github_search_tool.github_search_tool import GithubSearchTool
+
+
+pr_review_tools = [
+    fetch_open_prs,
+    fetch_changed_lines,
+    fetch_diff_hunk,
+    static_checks,
+    plan_review,
+    fetch_review_chunk,
+    get_pr_comments,
+    post_change_suggestion,
+    mark_file_reviewed,
+    submit_review
+]
+
+llm = CachedLLM(model=os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini"))
 
 
 @CrewBase
 class PrReviewCrewCrew:
     repo = os.getenv("REPO")
 
+    def __init__(self, pr_number: Optional[int] = None):
+        # When set, the crew reviews this PR only (see fan_out.review_open_prs)
+        self.pr_number = pr_number
+        self._context_plan: Optional[ContextPlan] = None
+
+    @property
+    def pr_scope(self) -> str:
+        return f"PR #{self.pr_number}" if self.pr_number else "all open PRs"
+
+    @property
+    def context_plan(self) -> ContextPlan:
+        # The cached repository context report for the current base commit, if any
+        if self._context_plan is None:
+            self._context_plan = plan_context(self.repo)
+        return self._context_plan
+
     @agent
     def pr_reviewer(self) -> Agent:
-        pr_review_tool = PrReviewTool(repo=self.repo)
-        githubSearchTool = GithubSearchTool(
-            gh_token=os.environ["GITHUB_TOKEN"],
-            content_types=['code', 'repo', 'pr', 'issue']
-        )
+        codeSearchTool = registry.get_tool("code_search")
 
         return Agent(
+            llm=llm,
             role="Senior Software Engineer",
             goal="Review PRs and provide insightful comments, and suggest improvements to the codebase.",
             backstory="\
 You're a senior engineer with extensive experience in code quality and best practices. \
 You provide constructive feedback on PRs, asking questions and suggesting improvements as needed.",
-            tools=[pr_review_tool, githubSearchTool],
+            tools=[*pr_review_tools, codeSearchTool],
             allow_code_execution=True,
             verbose=True,
         )
 
     @agent
     def staff_engineer(self) -> Agent:
-        pr_review_tool = PrReviewTool(repo=self.repo)
-        githubSearchTool = GithubSearchTool(
-            gh_token=os.environ["GITHUB_TOKEN"],
-            content_types=['code', 'repo', 'pr', 'issue']
-        )
+        codeSearchTool = registry.get_tool("code_search")
         return Agent(
+            llm=llm,
             role="Staff Engineer",
             goal="Assess architectural implications of PRs and ensure scalability, security, and reliability.",
             backstory="You're a staff engineer with deep technical expertise, responsible for upholding the \
 project's architectural integrity. You review PRs for potential impact on system architecture, \
 scalability, and technical debt.",
-            tools=[pr_review_tool, githubSearchTool],
+            tools=[*pr_review_tools, codeSearchTool],
             verbose=True
         )
 
     @agent
     def project_manager(self) -> Agent:
-        pr_review_tool = PrReviewTool(repo=self.repo)
         return Agent(
+            llm=llm,
             role="Project Manager",
             goal="Evaluate PRs from a project management perspective, ensuring timely delivery, \
 resource alignment, and risk management. Whenever all the requirements of the PR are met, \
 project manager will suggest to close the PR ending the interaction",
             backstory="As the project manager, you're focused on project timelines, resource allocation, and risk. \
 You assess PRs for potential impact on deadlines and coordinate necessary resources to support ongoing work.",
-            tools=[pr_review_tool],
+            tools=pr_review_tools,
             allow_delegation=True,
             verbose=True
         )
 
     @task
     def analyze_repository_context(self) -> Task:
-        return Task(
-            description="""Build comprehensive project context:
+        plan = self.context_plan
+        if plan.refresh:
+            changed = "\n".join(escape_braces(line) for line in plan.changed)
+            description = f"""Update the project context report below for the changes on the base branch since {plan.previous_sha[:7]}:
+- Read only the changed files listed below
+- Update the parts of the report they affect (architecture, patterns, standards, dependencies, integrations)
+- Keep the rest of the report as it is, and return the complete updated report
+
+Changed files:
+{changed}
+
+Current report:
+{escape_braces(plan.report)}"""
+        else:
+            description = """Build comprehensive project context:
 - Read and analyze repository README
 - Understand project structure and architecture
 - Review contribution guidelines
 - Identify key project patterns and standards
-- Map dependencies and integrations""",
+- Map dependencies and integrations"""
+        return Task(
+            description=description,
             expected_output="Project context report with key architectural and standard guidelines",
-            agent=self.staff_engineer()
+            agent=self.staff_engineer(),
+            # Stores the report for the next runs against the same base commit
+            callback=save_report_callback(self.repo, plan)
         )
 
     @task
     def gather_pr_information(self) -> Task:
+        # Needs no repository context, so it runs alongside analyze_repository_context
         return Task(
-            context=[self.analyze_repository_context()],
-            description="""Collect and analyze all PR information:
-- Fetch all open PRs from the repository
+            context=[],
+            description=f"""Collect and analyze all PR information for {self.pr_scope}:
+- Fetch the PRs from the repository
 - Retrieve all comments on PRs and individual files
 - Identify key changes, their purposes, and any associated issues or discussions
 - Summarize the overall impact of the PRs on the project""",
@@ -90,8 +142,12 @@ You assess PRs for potential impact on deadlines and coordinate necessary resour
     @task
     def review_the_code(self) -> Task:
         return Task(
-            context=[self.gather_pr_information()],
-            description="""Perform a detailed code review of the collected PRs:
+            context=[self.analyze_repository_context(), self.gather_pr_information()],
+            description=f"""Perform a detailed code review of {self.pr_scope}:
+- Start with "Run Static Checks": it lists the deterministic findings on the changed lines
+- Use "Plan Review" and read the chunks with "Fetch Review Chunk" in the planned order, riskiest first;
+  the plan holds the hunks the static checks flagged, each chunk with its findings
+- Confirm or dismiss each finding, and look for the logic issues the checks cannot see
 - Analyze code changes for adherence to coding standards and best practices
 - Identify any potential bugs, security vulnerabilities, or performance issues
 - Ensure that the code aligns with the project's architectural guidelines
@@ -115,7 +171,8 @@ You assess PRs for potential impact on deadlines and coordinate necessary resour
 
     @task
     def address_comments(self) -> Task:
-        return Task(
+        # Replies to the current discussion on the PRs, never from cache
+        return no_llm_cache(Task(
             context=[self.propose_changes()],
             description="""Address existing comments and feedback on the PRs:
 - Respond to comments made by reviewers or team members
@@ -124,18 +181,21 @@ You assess PRs for potential impact on deadlines and coordinate necessary resour
 - Coordinate with the project manager to close PRs once all criteria are satisfied""",
             expected_output="Updated PRs with resolved comments and final approvals ready for merging",
             agent=self.pr_reviewer()
-        )
+        ))
 
     @crew
     def crew(self) -> Crew:
-        return Crew(
+        # With a report of the current base commit the analysis is not run; its cached output is the context
+        repository_context = self.analyze_repository_context()
+        reused = reuse_report(repository_context, self.context_plan)
+        return DagCrew(
             agents=[
                 self.staff_engineer(),
                 self.pr_reviewer(),
                 self.project_manager()
             ],
             tasks=[
-                self.analyze_repository_context(),
+                *([] if reused else [repository_context]),
                 self.gather_pr_information(),
                 self.review_the_code(),
                 self.propose_changes(),
@@ -144,5 +204,9 @@ You assess PRs for potential impact on deadlines and coordinate necessary resour
             process=Process.sequential,
             manager_agent=self.project_manager(),
             memory=True,
+            # Short-term memory per PR, so reviews of unrelated PRs do not mix
+            **crew_memory(self.repo, f"pr-{self.pr_number}" if self.pr_number else "all-prs"),
+            step_callback=tracing.step_callback,
+            task_callback=tracing.task_callback,
             verbose=2
         )
@@ -0,0 +1,368 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import chromadb
+from crewai.memory import EntityMemory, LongTermMemory, ShortTermMemory
+from crewai.memory.storage.interface import Storage
+from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+
+from pr_review_crew import tracing
+from pr_review_crew.storage import CACHE_DIR, cache_path
+
+logger = logging.getLogger(__name__)
+
+MEMORY_DIR = os.path.join(CACHE_DIR, "memory")
+# Entries not read or written for this long are dropped
+CREW_MEMORY_TTL = float(os.getenv("CREW_MEMORY_TTL", str(14 * 24 * 3600)))
+# Entries kept per namespace; the least recently used ones go first
+CREW_MEMORY_MAX_ENTRIES = int(os.getenv("CREW_MEMORY_MAX_ENTRIES", "2000"))
+# Seconds between evictions while a namespace is being written to
+CREW_MEMORY_EVICT_INTERVAL = float(os.getenv("CREW_MEMORY_EVICT_INTERVAL", "600"))
+# Compaction deletes entries whose embeddings are closer than this to a more recently used one (cosine distance)
+CREW_MEMORY_DEDUPE_DISTANCE = float(os.getenv("CREW_MEMORY_DEDUPE_DISTANCE", "0.02"))
+
+
+def _collection_name(kind: str, namespace: str) -> str:
+    return f"{kind}-" + hashlib.sha1(namespace.encode("utf-8")).hexdigest()[:24]
+
+
+def _metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # Chroma only stores scalar metadata values
+    return {
+        key: value if isinstance(value, (str, int, float, bool)) else json.dumps(value, default=str)
+        for key, value in (metadata or {}).items() if value is not None
+    }
+
+
+class MemoryIndex:
+    """
+    Bookkeeping of every crew memory entry: its namespace, size and last
+    access, used for TTL expiry, LRU eviction and stats.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS entries (collection TEXT, id TEXT, namespace TEXT, kind TEXT,"
+            " size INTEGER, created_at REAL, last_access REAL, PRIMARY KEY (collection, id));"
+            "CREATE INDEX IF NOT EXISTS entries_access ON entries (collection, last_access);"
+        )
+        self._conn.commit()
+        self.searches: deque = deque(maxlen=1000)
+
+    def add(self, collection: str, entry_id: str, namespace: str, kind: str, size: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (collection, entry_id, namespace, kind, size, now, now))
+            self._conn.commit()
+
+    def adopt(self, collection: str, sizes: Dict[str, int], namespace: str, kind: str) -> None:
+        """
+        Starts the bookkeeping of entries written without it, as if they had
+        just been added. Entries already in the index are left as they are.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   [(collection, entry_id, namespace, kind, size, now, now)
+                                    for entry_id, size in sizes.items()])
+            self._conn.commit()
+
+    def touch(self, collection: str, entry_ids: List[str]) -> None:
+        if not entry_ids:
+            return
+        with self._lock:
+            self._conn.executemany("UPDATE entries SET last_access = ? WHERE collection = ? AND id = ?",
+                                   [(time.time(), collection, entry_id) for entry_id in entry_ids])
+            self._conn.commit()
+
+    def evictable(self, collection: str, ttl: float = CREW_MEMORY_TTL,
+                  max_entries: int = CREW_MEMORY_MAX_ENTRIES) -> List[str]:
+        """
+        Ids of the expired entries of a collection and of the least recently
+        used ones beyond ``max_entries``.
+        """
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM entries WHERE collection = ? ORDER BY last_access DESC", (collection,))]
+            expired = {row[0] for row in self._conn.execute(
+                "SELECT id FROM entries WHERE collection = ? AND last_access < ?", (collection, time.time() - ttl))}
+        return [entry_id for position, entry_id in enumerate(ids) if entry_id in expired or position >= max_entries]
+
+    def last_access(self, collection: str) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT id, last_access FROM entries WHERE collection = ?", (collection,)))
+
+    def remove(self, collection: str, entry_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM entries WHERE collection = ? AND id = ?",
+                                   [(collection, entry_id) for entry_id in entry_ids])
+            self._conn.commit()
+
+    def collections(self) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT collection, namespace, kind, COUNT(*), SUM(size), MAX(last_access) FROM entries"
+                " GROUP BY collection ORDER BY namespace, kind"
+            ).fetchall()
+
+    def vacuum(self) -> None:
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+
+class NamespacedRAGStorage(Storage):
+    """
+    Crew memory storage kept in its own Chroma collection per namespace
+    (e.g. one repository or one PR), so unrelated context is never
+    retrieved and every namespace stays bounded.
+    """
+
+    def __init__(self, kind: str, namespace: str, client, index: MemoryIndex, embedding_function=None):
+        from pr_review_crew.tools.code_search import default_embedding_function
+
+        self.kind = kind
+        self.namespace = namespace
+        self.name = _collection_name(kind, namespace)
+        self.index = index
+        self.collection = client.get_or_create_collection(
+            name=self.name,
+            embedding_function=embedding_function or default_embedding_function(),
+            metadata={"hnsw:space": "cosine", "kind": kind, "namespace": namespace},
+        )
+        _adopt_unindexed(self.collection, index, namespace, kind)
+        self._evict()
+
+    def _evict(self) -> None:
+        self._evicted_at = time.monotonic()
+        evicted = self.index.evictable(self.name)
+        if evicted:
+            self.collection.delete(ids=evicted)
+            self.index.remove(self.name, evicted)
+            logger.info(f"Evicted {len(evicted)} {self.kind} memory entries of {self.namespace}.")
+
+    def save(self, value: Any, metadata: Dict[str, Any]) -> None:
+        text = str(value)
+        # Saving the same text again refreshes the one entry instead of adding a duplicate
+        entry_id = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        self.collection.upsert(ids=[entry_id], documents=[text], metadatas=[_metadata(metadata)])
+        self.index.add(self.name, entry_id, self.namespace, self.kind, len(text))
+        # Long runs keep the namespace bounded, not only the next crew opening it
+        if time.monotonic() - self._evicted_at >= CREW_MEMORY_EVICT_INTERVAL:
+            self._evict()
+
+    def search(self, query: str, limit: int = 3, filter: Optional[dict] = None,
+               score_threshold: float = 0.35) -> List[Dict[str, Any]]:
+        with tracing.span("memory", f"search {self.kind}") as current:
+            started = time.perf_counter()
+            count = self.collection.count()
+            if not count:
+                return []
+            response = self.collection.query(query_texts=[query], n_results=min(limit, count), where=filter)
+            results = [
+                {"id": entry_id, "metadata": metadata, "context": document, "score": 1 - distance}
+                for entry_id, metadata, document, distance in zip(
+                    response["ids"][0], response["metadatas"][0], response["documents"][0], response["distances"][0])
+                if 1 - distance >= score_threshold
+            ]
+            self.index.touch(self.name, [result["id"] for result in results])
+            self.index.searches.append(time.perf_counter() - started)
+            current.set(results=len(results))
+            return results
+
+    def reset(self) -> None:
+        ids = self.collection.get(include=[])["ids"]
+        if ids:
+            self.collection.delete(ids=ids)
+            self.index.remove(self.name, ids)
+
+
+_client = None
+_index: Optional[MemoryIndex] = None
+_lock = threading.Lock()
+
+
+def get_memory_backend():
+    """
+    Returns the process-wide Chroma client and entry index of the crew memory.
+    """
+    global _client, _index
+    with _lock:
+        if _client is None:
+            _client = chromadb.PersistentClient(path=os.path.join(MEMORY_DIR, "chroma"))
+            _index = MemoryIndex(cache_path("memory", "index.sqlite3"))
+            atexit.register(log_stats)
+        return _client, _index
+
+
+def _forget_backend() -> None:
+    # SQLite connections and the Chroma client must not be shared with a forked child.
+    global _client, _index, _lock
+    _client = None
+    _index = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_backend)
+
+
+def crew_memory(repo: Optional[str], scope: str) -> Dict[str, Any]:
+    """
+    Memory arguments for ``Crew(...)``: short-term memory namespaced per
+    ``repo`` and ``scope`` (e.g. one PR), entity and long-term memory per
+    repository.
+    """
+    repo = repo or "default"
+    client, index = get_memory_backend()
+    slug = hashlib.sha1(repo.encode("utf-8")).hexdigest()[:16]
+    return {
+        "short_term_memory": ShortTermMemory(
+            storage=NamespacedRAGStorage("short_term", f"{repo}/{scope}", client, index)),
+        "entity_memory": EntityMemory(storage=NamespacedRAGStorage("entities", repo, client, index)),
+        "long_term_memory": LongTermMemory(
+            storage=LTMSQLiteStorage(db_path=cache_path("memory", slug, "long_term_memory_storage.db"))),
+    }
+
+
+def _disk_bytes() -> int:
+    total = 0
+    for directory, _, files in os.walk(MEMORY_DIR):
+        for name in files:
+            total += os.path.getsize(os.path.join(directory, name))
+    return total
+
+
+def stats() -> dict:
+    """
+    Entry counts per namespace, disk size and search latency of this process.
+    """
+    if _index is None:
+        return {}
+    namespaces = [
+        {"namespace": namespace, "kind": kind, "entries": count, "bytes": size, "last_access": last_access}
+        for _, namespace, kind, count, size, last_access in _index.collections()
+    ]
+    searches = sorted(_index.searches)
+    return {
+        "entries": sum(namespace["entries"] for namespace in namespaces),
+        "namespaces": namespaces,
+        "disk_bytes": _disk_bytes(),
+        "searches": len(searches),
+        "search_avg_ms": round(1000 * sum(searches) / len(searches), 1) if searches else 0.0,
+        "search_p95_ms": round(1000 * searches[int(0.95 * (len(searches) - 1))], 1) if searches else 0.0,
+    }
+
+
+def log_stats() -> None:
+    current = stats()
+    if not current.get("searches"):
+        return
+    logger.info(
+        f"Crew memory: {current['entries']} entries in {len(current['namespaces'])} namespace(s), "
+        f"{current['disk_bytes'] / 1e6:.1f} MB on disk, {current['searches']} search(es) "
+        f"averaging {current['search_avg_ms']}ms (p95 {current['search_p95_ms']}ms)"
+    )
+
+
+def _adopt_unindexed(collection, index: MemoryIndex, namespace: str, kind: str) -> int:
+    """
+    Adds the entries of a collection that are missing from the index (e.g.
+    written before it existed) to the index, so they expire and get evicted
+    like the others. Returns how many were adopted.
+    """
+    known = index.last_access(collection.name)
+    entries = collection.get(include=["documents"])
+    sizes = {
+        entry_id: len(document or "")
+        for entry_id, document in zip(entries["ids"], entries["documents"] or [None] * len(entries["ids"]))
+        if entry_id not in known
+    }
+    if sizes:
+        index.adopt(collection.name, sizes, namespace, kind)
+        logger.info(f"Adopted {len(sizes)} {kind} memory entries of {namespace} into the index.")
+    return len(sizes)
+
+
+def _near_duplicates(collection, last_access: Dict[str, float], distance: float) -> List[str]:
+    """
+    Ids of entries whose embedding is within ``distance`` of a more recently
+    used entry of the same collection; compaction deletes them.
+    """
+    import numpy
+
+    entries = collection.get(include=["embeddings"])
+    ids = entries["ids"]
+    if len(ids) < 2:
+        return []
+    vectors = numpy.asarray(entries["embeddings"], dtype=numpy.float32)
+    vectors /= numpy.maximum(numpy.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    order = sorted(range(len(ids)), key=lambda position: -last_access.get(ids[position], 0.0))
+    vectors = vectors[order]
+    duplicate = numpy.zeros(len(ids), dtype=bool)
+    for rank in range(len(ids) - 1):
+        if duplicate[rank]:
+            continue
+        # Compare with the less recently used entries only
+        close = (1 - vectors[rank + 1:] @ vectors[rank]) < distance
+        duplicate[rank + 1:] |= close
+    return [ids[order[rank]] for rank in numpy.flatnonzero(duplicate)]
+
+
+def compact(dedupe_distance: float = CREW_MEMORY_DEDUPE_DISTANCE) -> dict:
+    """
+    Adopts entries missing from the index, expires and evicts entries,
+    deletes near-duplicates of more recently used entries, drops empty
+    namespaces and vacuums the stores. Run it while no crew is using the
+    memory.
+    """
+    client, index = get_memory_backend()
+    before = _disk_bytes()
+    counts = {"adopted": 0, "evicted": 0, "deduplicated": 0, "dropped_namespaces": 0}
+    for collection in client.list_collections():
+        name = getattr(collection, "name", collection)
+        collection = client.get_collection(name)
+        metadata = collection.metadata or {}
+        counts["adopted"] += _adopt_unindexed(
+            collection, index, metadata.get("namespace", name), metadata.get("kind", "unknown"))
+        evicted = index.evictable(name)
+        if evicted:
+            collection.delete(ids=evicted)
+            index.remove(name, evicted)
+            counts["evicted"] += len(evicted)
+        duplicates = _near_duplicates(collection, index.last_access(name), dedupe_distance) \
+            if dedupe_distance > 0 else []
+        if duplicates:
+            collection.delete(ids=duplicates)
+            index.remove(name, duplicates)
+            counts["deduplicated"] += len(duplicates)
+        if not collection.count():
+            client.delete_collection(name)
+            counts["dropped_namespaces"] += 1
+
+    index.vacuum()
+    chroma_db = os.path.join(MEMORY_DIR, "chroma", "chroma.sqlite3")
+    if os.path.exists(chroma_db):
+        connection = sqlite3.connect(chroma_db)
+        try:
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+    counts["bytes_before"] = before
+    counts["bytes_after"] = _disk_bytes()
+    logger.info(
+        f"Compacted crew memory: {counts['adopted']} adopted, {counts['evicted']} evicted, "
+        f"{counts['deduplicated']} near-duplicates deleted, {counts['dropped_namespaces']} namespace(s) dropped, "
+        f"{before / 1e6:.1f} MB -> {counts['bytes_after'] / 1e6:.1f} MB"
+    )
+    return counts
@@ -0,0 +1,298 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import signal
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+from pr_review_crew.storage import cache_path
+
+logger = logging.getLogger(__name__)
+
+DAEMON_HOST = os.getenv("DAEMON_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.getenv("DAEMON_PORT", "8080"))
+DAEMON_WORKERS = int(os.getenv("DAEMON_WORKERS", "2"))
+# Queued or running reviews above which new PRs are refused with 503
+DAEMON_MAX_QUEUE = int(os.getenv("DAEMON_MAX_QUEUE", "100"))
+# A PR is reviewed once no push arrived for this long, so bursts of pushes give one review
+DAEMON_COALESCE_SECONDS = float(os.getenv("DAEMON_COALESCE_SECONDS", "30"))
+DAEMON_MAX_ATTEMPTS = int(os.getenv("DAEMON_MAX_ATTEMPTS", "3"))
+DAEMON_RETRY_DELAY = float(os.getenv("DAEMON_RETRY_DELAY", "60"))
+DAEMON_MAX_BODY_BYTES = int(os.getenv("DAEMON_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+
+REVIEWED_ACTIONS = ("opened", "reopened", "synchronize", "ready_for_review")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ReviewQueue:
+    """
+    Persistent queue of PR reviews with one entry per PR.
+
+    Enqueuing a PR that is already queued only moves it to the new head and
+    restarts its coalescing delay; a push to a PR under review re-queues it
+    once the running review finishes.
+    """
+
+    def __init__(self, path: str, coalesce_seconds: float = DAEMON_COALESCE_SECONDS):
+        self.coalesce_seconds = coalesce_seconds
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " repo TEXT, pr INTEGER, head_sha TEXT, state TEXT, requeue INTEGER DEFAULT 0,"
+            " attempts INTEGER DEFAULT 0, not_before REAL, updated_at REAL, result TEXT,"
+            " PRIMARY KEY (repo, pr))"
+        )
+        # Reviews interrupted by a restart run again
+        self._conn.execute("UPDATE jobs SET state = ?, requeue = 0 WHERE state = ?", (QUEUED, RUNNING))
+        self._conn.commit()
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._depth()
+
+    def _depth(self) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)", (QUEUED, RUNNING)
+        ).fetchone()[0]
+
+    def enqueue(self, repo: str, pr: int, head_sha: str, max_depth: int = DAEMON_MAX_QUEUE) -> Optional[str]:
+        """
+        Queues a review of ``head_sha``. Returns "queued", "coalesced" or
+        None when the queue is full.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM jobs WHERE repo = ? AND pr = ?", (repo, pr)
+            ).fetchone()
+            state = row[0] if row else None
+            if state == QUEUED:
+                self._conn.execute(
+                    "UPDATE jobs SET head_sha = ?, not_before = ?, updated_at = ? WHERE repo = ? AND pr = ?",
+                    (head_sha, now + self.coalesce_seconds, now, repo, pr),
+                )
+                outcome = "coalesced"
+            elif state == RUNNING:
+                self._conn.execute(
+                    "UPDATE jobs SET head_sha = ?, requeue = 1, updated_at = ? WHERE repo = ? AND pr = ?",
+                    (head_sha, now, repo, pr),
+                )
+                outcome = "coalesced"
+            elif self._depth() >= max_depth:
+                return None
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jobs (repo, pr, head_sha, state, requeue, attempts, not_before,"
+                    " updated_at) VALUES (?, ?, ?, ?, 0, 0, ?, ?)",
+                    (repo, pr, head_sha, QUEUED, now + self.coalesce_seconds, now),
+                )
+                outcome = "queued"
+            self._conn.commit()
+            self._ready.notify()
+            return outcome
+
+    def claim(self, timeout: float) -> Optional[Tuple[str, int, str]]:
+        """
+        Takes the next due review, waiting up to ``timeout`` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT repo, pr, head_sha FROM jobs WHERE state = ? AND not_before <= ?"
+                    " ORDER BY not_before LIMIT 1", (QUEUED, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ? WHERE repo = ? AND pr = ?",
+                        (RUNNING, now, row[0], row[1]),
+                    )
+                    self._conn.commit()
+                    return row
+                next_due = self._conn.execute(
+                    "SELECT MIN(not_before) FROM jobs WHERE state = ?", (QUEUED,)
+                ).fetchone()[0]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait = remaining if next_due is None else min(remaining, max(next_due - now, 0.05))
+                self._ready.wait(wait)
+
+    def finish(self, repo: str, pr: int, ok: bool, result: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            requeue, attempts = self._conn.execute(
+                "SELECT requeue, attempts FROM jobs WHERE repo = ? AND pr = ?", (repo, pr)
+            ).fetchone()
+            if requeue:
+                # A newer head arrived during the review
+                state, not_before, attempts = QUEUED, now + self.coalesce_seconds, 0
+            elif ok:
+                state, not_before = DONE, now
+            elif attempts < DAEMON_MAX_ATTEMPTS:
+                state, not_before = QUEUED, now + DAEMON_RETRY_DELAY * attempts
+            else:
+                state, not_before = FAILED, now
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, requeue = 0, attempts = ?, not_before = ?, updated_at = ?, result = ?"
+                " WHERE repo = ? AND pr = ?",
+                (state, attempts, not_before, now, result[:2000], repo, pr),
+            )
+            self._conn.commit()
+            self._ready.notify()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in (QUEUED, RUNNING, DONE, FAILED)}
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: Optional[str] = WEBHOOK_SECRET) -> bool:
+    """
+    Checks GitHub's X-Hub-Signature-256 header; anything passes without a secret.
+    """
+    if not secret:
+        return True
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    # Compared as bytes: compare_digest raises on non-ASCII strings
+    return bool(signature) and hmac.compare_digest(expected.encode("utf-8"), signature.encode("utf-8"))
+
+
+def _handler(queue: ReviewQueue, repo: str):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") in ("/healthz", ""):
+                self._reply(200, {"status": "ok", "queue": queue.stats()})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/webhook":
+                self._reply(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > DAEMON_MAX_BODY_BYTES:
+                self._reply(413, {"error": "payload too large"})
+                return
+            body = self.rfile.read(length)
+            if not verify_signature(body, self.headers.get("X-Hub-Signature-256")):
+                self._reply(401, {"error": "invalid signature"})
+                return
+            event = self.headers.get("X-GitHub-Event", "pull_request")
+            if event == "ping":
+                self._reply(200, {"status": "pong"})
+                return
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                self._reply(400, {"error": "invalid JSON"})
+                return
+            if not isinstance(payload, dict) or not isinstance(payload.get("pull_request") or {}, dict):
+                self._reply(400, {"error": "invalid payload"})
+                return
+
+            pull_request = payload.get("pull_request") or {}
+            action = payload.get("action")
+            event_repo = (payload.get("repository") or {}).get("full_name") or repo
+            if event != "pull_request" or action not in REVIEWED_ACTIONS or not pull_request:
+                self._reply(202, {"status": "ignored", "event": event, "action": action})
+                return
+            if event_repo != repo:
+                logger.warning(f"Ignoring webhook for {event_repo}; this daemon reviews {repo}.")
+                self._reply(202, {"status": "ignored", "repository": event_repo})
+                return
+
+            try:
+                pr_number = int(pull_request.get("number") or payload.get("number"))
+                head_sha = (pull_request.get("head") or {}).get("sha") or ""
+            except (AttributeError, TypeError, ValueError):
+                pr_number, head_sha = 0, None
+            if pr_number <= 0 or not isinstance(head_sha, str):
+                self._reply(400, {"error": "pull_request payload without a valid PR number and head"})
+                return
+            outcome = queue.enqueue(repo, pr_number, head_sha)
+            if outcome is None:
+                logger.warning(f"Review queue full; refusing PR #{pr_number}.")
+                self._reply(503, {"error": "review queue full"}, {"Retry-After": str(int(DAEMON_COALESCE_SECONDS) or 30)})
+                return
+            logger.info(f"PR #{pr_number} at {head_sha[:7]} {outcome}.")
+            self._reply(202, {"status": outcome, "pr": pr_number, "head_sha": head_sha})
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return WebhookHandler
+
+
+def _worker(queue: ReviewQueue, inputs: dict, stop: threading.Event) -> None:
+    from pr_review_crew.fan_out import run_reviews
+
+    while not stop.is_set():
+        job = queue.claim(timeout=1.0)
+        if job is None:
+            continue
+        repo, pr_number, head_sha = job
+        logger.info(f"Reviewing PR #{pr_number} at {head_sha[:7]}.")
+        try:
+            result = run_reviews([pr_number], inputs, max_parallel=1)[pr_number]
+            ok = result["status"] == "ok"
+            queue.finish(repo, pr_number, ok, result["output"])
+            logger.info(f"Review of PR #{pr_number} {result['status']} in {result['duration']}s.")
+        except Exception as e:
+            logger.error(f"Review of PR #{pr_number} failed: {str(e)}")
+            queue.finish(repo, pr_number, False, str(e))
+
+
+def serve(inputs: Optional[dict] = None, host: str = DAEMON_HOST, port: int = DAEMON_PORT,
+          workers: int = DAEMON_WORKERS) -> None:
+    """
+    Accepts PR webhooks on ``POST /webhook`` and reviews the PRs with a pool
+    of ``workers`` until interrupted. ``GET /healthz`` reports the queue.
+    """
+    repo = os.getenv("REPO")
+    if not repo:
+        raise ValueError("REPO environment variable not set.")
+    queue = ReviewQueue(cache_path("daemon", "queue.sqlite3"))
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_worker, args=(queue, inputs or {}, stop), name=f"review-worker-{index}", daemon=True)
+        for index in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    server = ThreadingHTTPServer((host, port), _handler(queue, repo))
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    logger.info(f"Listening for {repo} webhooks on http://{host}:{server.server_port}/webhook "
+                f"with {workers} worker(s); queue: {queue.stats()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stop.set()
+        logger.info("Waiting for running reviews to finish.")
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,196 @@
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional
+
+from pr_review_crew.tools import github_client
+from pr_review_crew.tools.github_client import API_URL
+from pr_review_crew.tools.pr_review_tool import (
+    REPO, flush_pending_reviews, forget_pr, get_headers, load_diff_index, record_review
+)
+from pr_review_crew.tools.review_state import INCREMENTAL, get_review_state
+
+logger = logging.getLogger(__name__)
+
+MAX_PARALLEL = int(os.getenv("REVIEW_MAX_PARALLEL", "4"))
+PR_TIMEOUT = float(os.getenv("REVIEW_PR_TIMEOUT", "1800"))
+# "process" isolates each crew (and can stop it on timeout); "thread" shares one process
+EXECUTOR = os.getenv("REVIEW_EXECUTOR", "process")
+START_METHOD = os.getenv("REVIEW_START_METHOD", "spawn")
+
+
+def list_open_prs() -> List[dict]:
+    """
+    Lists the open PRs of the repository with their head SHA.
+    """
+    headers = get_headers()
+    url = f"{API_URL}/repos/{REPO}/pulls"
+    prs = []
+    for response in github_client.iter_pages(url, params={"state": "open", "per_page": 100}, headers=headers):
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch PRs: {response.status_code} - {response.text}")
+        prs.extend(
+            {"number": pr["number"], "title": pr.get("title", ""), "head_sha": pr.get("head", {}).get("sha")}
+            for pr in response.json()
+        )
+    return prs
+
+
+def review_pr(pr_number: int, inputs: dict) -> str:
+    """
+    Runs an independent review crew scoped to a single PR and records the
+    reviewed head SHA once it succeeds.
+    """
+    from pr_review_crew.crew import PrReviewCrewCrew
+
+    try:
+        # Thread workers share the module caches, which may hold this PR's diff from an earlier push
+        index = load_diff_index(pr_number, refresh=True)
+        if index is not None and index.head_sha and not index.files():
+            record_review(pr_number)
+            return f"No new changes to review in PR #{pr_number}."
+
+        try:
+            result = PrReviewCrewCrew(pr_number=pr_number).crew().kickoff(inputs={**inputs, "pr_number": pr_number})
+            record_review(pr_number)
+            return str(result)
+        finally:
+            flush_pending_reviews()
+    finally:
+        forget_pr(pr_number)
+
+
+def _process_worker(pr_number: int, inputs: dict, results) -> None:
+    started = time.monotonic()
+    try:
+        output = review_pr(pr_number, inputs)
+        results.put((pr_number, "ok", output, time.monotonic() - started))
+    except Exception as e:
+        results.put((pr_number, "failed", str(e), time.monotonic() - started))
+
+
+def _result(status: str, output: str, duration: float) -> dict:
+    return {"status": status, "output": output, "duration": round(duration, 1)}
+
+
+def _run_in_processes(pr_numbers: List[int], inputs: dict, max_parallel: int, timeout: float) -> Dict[int, dict]:
+    context = multiprocessing.get_context(START_METHOD)
+    results_queue = context.Queue()
+    pending = deque(pr_numbers)
+    running = {}
+    results = {}
+
+    def collect(block: bool) -> None:
+        try:
+            while True:
+                pr_number, status, output, duration = results_queue.get(timeout=0.5) if block \
+                    else results_queue.get_nowait()
+                block = False
+                entry = running.pop(pr_number, None)
+                if entry is None:
+                    continue  # already reported as timed out
+                results[pr_number] = _result(status, output, duration)
+                entry[0].join()
+        except queue.Empty:
+            pass
+
+    while pending or running:
+        while pending and len(running) < max_parallel:
+            pr_number = pending.popleft()
+            process = context.Process(target=_process_worker, args=(pr_number, inputs, results_queue), daemon=True)
+            process.start()
+            running[pr_number] = (process, time.monotonic())
+            logger.info(f"Started review of PR #{pr_number} (pid {process.pid}).")
+
+        collect(block=True)
+        now = time.monotonic()
+        for pr_number, (process, started) in list(running.items()):
+            if now - started > timeout:
+                process.terminate()
+                process.join()
+                running.pop(pr_number)
+                results[pr_number] = _result("timeout", f"Review exceeded {timeout:.0f}s.", now - started)
+                logger.error(f"Review of PR #{pr_number} timed out after {timeout:.0f}s.")
+            elif not process.is_alive():
+                collect(block=False)
+                if pr_number in running:
+                    running.pop(pr_number)
+                    results[pr_number] = _result("failed", f"Worker exited with code {process.exitcode}.", now - started)
+    return results
+
+
+def _run_in_threads(pr_numbers: List[int], inputs: dict, max_parallel: int, timeout: float) -> Dict[int, dict]:
+    # Threads cannot be stopped: a timed out review is reported and left to finish in the background.
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="pr-review")
+    futures = {}
+    pending = deque(pr_numbers)
+    try:
+        while pending or futures:
+            while pending and len(futures) < max_parallel:
+                pr_number = pending.popleft()
+                futures[executor.submit(review_pr, pr_number, inputs)] = (pr_number, time.monotonic())
+            done, _ = wait(futures, timeout=0.5, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in done:
+                pr_number, started = futures.pop(future)
+                try:
+                    results[pr_number] = _result("ok", future.result(), now - started)
+                except Exception as e:
+                    results[pr_number] = _result("failed", str(e), now - started)
+            for future, (pr_number, started) in list(futures.items()):
+                if now - started > timeout:
+                    futures.pop(future)
+                    results[pr_number] = _result("timeout", f"Review exceeded {timeout:.0f}s.", now - started)
+                    logger.error(f"Review of PR #{pr_number} timed out after {timeout:.0f}s.")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def run_reviews(pr_numbers: List[int], inputs: Optional[dict] = None, max_parallel: int = MAX_PARALLEL,
+                timeout: float = PR_TIMEOUT, executor: str = EXECUTOR) -> Dict[int, dict]:
+    """
+    Reviews the given PRs with one crew each, at most ``max_parallel`` at a time.
+    """
+    run = _run_in_threads if executor == "thread" else _run_in_processes
+    return run(pr_numbers, inputs or {}, max_parallel, timeout)
+
+
+def review_open_prs(inputs: Optional[dict] = None, max_parallel: int = MAX_PARALLEL,
+                    timeout: float = PR_TIMEOUT, executor: str = EXECUTOR) -> Dict[int, dict]:
+    """
+    Reviews every open PR with its own crew, at most ``max_parallel`` at a time.
+
+    Returns the per-PR status ("ok", "skipped", "failed" or "timeout"),
+    output and duration. PRs whose head SHA was already reviewed are skipped.
+    """
+    prs = list_open_prs()
+    if not prs:
+        logger.info(f"No open PRs in {REPO}.")
+        return {}
+
+    results = {}
+    pr_numbers = []
+    for pr in prs:
+        last_head = get_review_state().last_head(REPO, pr["number"]) if INCREMENTAL else None
+        if last_head and last_head == pr["head_sha"]:
+            results[pr["number"]] = _result("skipped", f"Already reviewed at {last_head[:7]}.", 0.0)
+        else:
+            pr_numbers.append(pr["number"])
+
+    logger.info(
+        f"Reviewing {len(pr_numbers)} open PR(s) of {REPO} with up to {max_parallel} {executor}(s), "
+        f"{len(results)} unchanged."
+    )
+    if pr_numbers:
+        results.update(run_reviews(pr_numbers, inputs, max_parallel, timeout, executor))
+
+    for pr_number in sorted(results):
+        result = results[pr_number]
+        logger.info(f"PR #{pr_number}: {result['status']} in {result['duration']}s")
+    return results
@@ -0,0 +1,205 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from crewai import LLM, Task
+
+from pr_review_crew import tracing
+from pr_review_crew.storage import cache_path
+from pr_review_crew.tracing import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Completion parameters that change the response and therefore the cache key
+KEY_PARAMS = (
+    "model", "temperature", "top_p", "n", "stop", "max_completion_tokens", "max_tokens",
+    "presence_penalty", "frequency_penalty", "logit_bias", "response_format", "seed",
+    "base_url", "api_version",
+)
+
+# Prompts containing one of these markers bypass the cache (see no_llm_cache)
+_uncached_markers = set()
+
+
+def no_llm_cache(task: Task) -> Task:
+    """
+    Opts a task out of the LLM cache, e.g. one that must see fresh data.
+
+    The task is recognized by the start of its description, up to the first
+    ``{placeholder}``, since the rest is only known after interpolation.
+    """
+    marker = task.description.split("{", 1)[0].strip()[:120]
+    if marker:
+        _uncached_markers.add(marker)
+    return task
+
+
+def normalize_messages(messages: List[Dict[str, str]]) -> List[List[str]]:
+    """
+    Normalizes whitespace so prompts differing only in layout share an entry.
+    """
+    normalized = []
+    for message in messages:
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = json.dumps(content, sort_keys=True)
+        lines = [" ".join(line.split()) for line in content.strip().splitlines()]
+        normalized.append([message.get("role", ""), "\n".join(line for line in lines if line)])
+    return normalized
+
+
+class LLMCacheStore:
+    """
+    SQLite store of LLM responses with TTL expiry and least-recently-used
+    eviction once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, path: str, ttl: float = LLM_CACHE_TTL, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER,"
+            " duration REAL, created_at REAL, last_access REAL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_seconds = 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, duration, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            self.saved_seconds += row[1]
+            return row[0]
+
+    def put(self, key: str, model: str, response: str, duration: float) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, duration, now, now),
+            )
+            self._conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, old_size in self._conn.execute(
+                        "SELECT key, size FROM completions ORDER BY last_access").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (old_key,))
+                    total -= old_size
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 1),
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_store: Optional[LLMCacheStore] = None
+_store_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCacheStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LLMCacheStore(cache_path("llm", "completions.sqlite3"))
+                atexit.register(log_stats)
+    return _store
+
+
+def stats() -> dict:
+    return _store.stats() if _store is not None else {}
+
+
+def log_stats() -> None:
+    if _store is None or not (_store.hits or _store.misses):
+        return
+    current = _store.stats()
+    logger.info(
+        f"LLM cache: {current['hits']} hit(s), {current['misses']} miss(es) ({current['hit_rate']:.0%}), "
+        f"~{current['saved_seconds']}s of inference saved"
+    )
+
+
+class CachedLLM(LLM):
+    """
+    LLM whose completions are cached on disk, keyed by model, completion
+    parameters and the normalized prompt.
+    """
+
+    def cache_key(self, messages: List[Dict[str, str]]) -> str:
+        params = {name: getattr(self, name, None) for name in KEY_PARAMS}
+        payload = json.dumps(
+            {"params": params, "messages": normalize_messages(messages)}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def call(self, messages: List[Dict[str, str]], callbacks: List[Any] = []) -> str:
+        prompt_tokens = sum(estimate_tokens(str(message.get("content") or "")) for message in messages)
+        with tracing.span("llm", str(self.model), prompt_tokens=prompt_tokens, cached=False) as current:
+            response = self._cached_call(messages, callbacks, current)
+            current.set(completion_tokens=estimate_tokens(response or ""))
+            return response
+
+    def _cached_call(self, messages: List[Dict[str, str]], callbacks: List[Any], current: tracing.Span) -> str:
+        if not LLM_CACHE_ENABLED:
+            return super().call(messages, callbacks)
+        store = get_llm_cache()
+        if _uncached_markers and any(
+                marker in (message.get("content") or "") for message in messages for marker in _uncached_markers):
+            store.bypassed += 1
+            return super().call(messages, callbacks)
+
+        key = self.cache_key(messages)
+        cached = store.get(key)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for {self.model} ({key[:12]}).")
+            current.set(cached=True)
+            return cached
+
+        started = time.monotonic()
+        response = super().call(messages, callbacks)
+        if response:
+            store.put(key, self.model, response, time.monotonic() - started)
+        return response
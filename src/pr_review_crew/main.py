@@ -1,5 +1,6 @@
 #!/usr/bin/env python
-from pr_review_crew.pr_creation_crew import PrCreationCrew
+# Crews are imported inside the entry points: crewai and its tools take
+# seconds to import, which every script would pay up front otherwise.
 
 
 # def run():
@@ -10,8 +11,41 @@ from pr_review_crew.pr_creation_crew import PrCreationCrew
 #     PrReviewCrewCrew().crew().kickoff(inputs=inputs)
 
 def run():
+    from pr_review_crew.pr_creation_crew import PrCreationCrew
+
     # Replace with your inputs, it will automatically interpolate any tasks and agents information
     inputs = {
         'topic': 'github_repo=luandev/pr_review_crew'
     }
-    PrCreationCrew().crew().kickoff(inputs=inputs)
\ No newline at end of file
+    PrCreationCrew().crew().kickoff(inputs=inputs)
+
+def review_all():
+    # Reviews every open PR with its own crew, in parallel (see fan_out for the knobs)
+    from pr_review_crew.fan_out import review_open_prs
+
+    inputs = {
+        'topic': 'github_repo=luandev/pr_review_crew'
+    }
+    results = review_open_prs(inputs=inputs)
+    for pr_number, result in results.items():
+        print(f"PR #{pr_number}: {result['status']} ({result['duration']}s)")
+
+def daemon():
+    # Reviews PRs as GitHub webhooks report them (see daemon for the knobs)
+    from pr_review_crew.daemon import serve
+
+    inputs = {
+        'topic': 'github_repo=luandev/pr_review_crew'
+    }
+    serve(inputs=inputs)
+
+def memory():
+    # pr_review_memory [stats|compact]; compact only while no crew is running
+    import json
+    import sys
+    from pr_review_crew import crew_memory
+
+    if sys.argv[1:2] == ['compact']:
+        print(json.dumps(crew_memory.compact(), indent=2))
+    crew_memory.get_memory_backend()
+    print(json.dumps(crew_memory.stats(), indent=2))
@@ -1,50 +1,49 @@
-from crewai import Agent, Crew, Process, Task, LLM
+from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import GithubSearchTool, CodeInterpreterTool, DirectoryReadTool, FileReadTool, DirectorySearchTool, WebsiteSearchTool
-from pr_review_crew.tools.pr_review_tool import ListFilesInRepoTool, DownloadFileFromRepoTool, DownloadRepositoryTool
+from pr_review_crew import tracing
+from pr_review_crew.crew_memory import crew_memory
+from pr_review_crew.llm_cache import CachedLLM
+from pr_review_crew.task_graph import DagCrew
+from pr_review_crew.tools import registry
 from datetime import datetime
 import os
 import warnings
 import logging
 import litellm
 
-litellm.set_verbose=True
+litellm.set_verbose = os.getenv("LITELLM_VERBOSE") == "1"
 
-clone_repo_tool = DownloadRepositoryTool()
-list_files_tool = ListFilesInRepoTool()
-download_file_tool = DownloadFileFromRepoTool()
-code_interpreter_tool = CodeInterpreterTool()
-directory_read_tool = DirectoryReadTool()
-file_read_tool = FileReadTool()
-directory_search_tool = DirectorySearchTool()
-website_search_tool = WebsiteSearchTool()
+# Tool names from tools/registry.py; each is built on first use and shared
 base_tools = [
-    # list_files_tool,
-    # download_file_tool,
-    # code_interpreter_tool,
-    directory_read_tool,
-    file_read_tool,
-    directory_search_tool,
-    # website_search_tool,
-    clone_repo_tool
+    # "list_files",
+    # "download_file",
+    # "code_interpreter",
+    "directory_read",
+    "file_read",
+    "code_search",
+    "find_symbol",
+    # "website_search",
+    "clone_repo"
 ]
 
-llm = LLM(
+llm = CachedLLM(
     model="ollama/llama3.2:3b", 
     base_url="http://localhost:11434"
 )
 
 def step_callback(step):
-    print(f"Step: {step}")
+    tracing.step_callback(step)
+    logging.getLogger(__name__).debug(f"Step: {step}")
 
 def task_callback(task):
-    print(f"Task completed: {task.description}")
+    tracing.task_callback(task)
+    logging.getLogger(__name__).info(f"Task completed: {task.description}")
 
 # Suppress specific warnings temporarily
 warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
 
-# Set up detailed logging for debugging
-logging.basicConfig(level=logging.DEBUG)
+# LOG_LEVEL=DEBUG for detailed logging
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 
 @CrewBase
 class PrCreationCrew:
@@ -53,13 +52,6 @@ class PrCreationCrew:
     
     @agent
     def feature_ideator(self) -> Agent:
-        # Tools needed: Search tool to analyze the repository state
-        github_search_tool = GithubSearchTool(
-            gh_token=self.github_token,
-            content_types=['code', 'repo', 'pr', 'issue'],
-            repo=self.repo
-        )
-        
         return Agent(
             llm=llm,
             role="Product Manager",
@@ -96,11 +88,6 @@ class PrCreationCrew:
     @agent
     def software_developer(self) -> Agent:
         # Tools needed: Tools for PR creation and repository search
-        github_search_tool = GithubSearchTool(
-            gh_token=self.github_token,
-            content_types=['code', 'repo', 'pr', 'issue'],
-            repo=self.repo
-        )
         return Agent(
             llm=llm,
             role="Software Developer",
@@ -110,7 +97,7 @@ class PrCreationCrew:
                 "that PRs are well-documented, follow the project's contribution guidelines, and are "
                 "ready for review by the team."
             ),
-            tools=base_tools,
+            tools=registry.get_tools(base_tools),
             verbose=True,
             step_callback=step_callback,
             task_callback=task_callback,
@@ -124,11 +111,11 @@ class PrCreationCrew:
     
     @task
     def get_readme_context(self) -> Task:
-        return Task(description="""Read some of the key files like readme to understand project overall""",  expected_output="Repo overall context" , agent=self.software_developer())
+        return Task(context=[self.get_repo()], description="""Read some of the key files like readme to understand project overall""",  expected_output="Repo overall context" , agent=self.software_developer())
     
     @task
     def get_context(self) -> Task:
-        return Task(description="""Read some of the deeper files to understand project more toroughly""",  expected_output="Repo context" , agent=self.software_developer())
+        return Task(context=[self.get_repo()], description="""Read some of the deeper files to understand project more toroughly""",  expected_output="Repo context" , agent=self.software_developer())
     
 
     @task
@@ -195,7 +182,8 @@ class PrCreationCrew:
 
         # Combine the directory and filename
         log_filepath = os.path.join(logs_dir, log_filename)
-        return Crew(
+        # get_readme_context and get_context both only need the clone, so they run side by side
+        return DagCrew(
             agents=[
                 self.software_developer(),
                 self.feature_ideator()
@@ -210,6 +198,7 @@ class PrCreationCrew:
             ],
             process=Process.sequential,
             memory=True,
+            **crew_memory(self.repo, "pr-creation"),
             output_log_file=log_filepath,
             verbose=True
         )
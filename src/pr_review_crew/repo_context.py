@@ -0,0 +1,215 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+
+from pr_review_crew.storage import cache_path
+from pr_review_crew.tools import github_client
+from pr_review_crew.tools.github_client import API_URL
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to analyze the repository again on every run
+REPO_CONTEXT_CACHE = os.getenv("REPO_CONTEXT_CACHE", "1") != "0"
+# Above this many files changed on the base branch, the report is rebuilt instead of refreshed
+REPO_CONTEXT_MAX_CHANGED_FILES = int(os.getenv("REPO_CONTEXT_MAX_CHANGED_FILES", "20"))
+# Reports kept per repository, newest first
+REPO_CONTEXT_KEEP = int(os.getenv("REPO_CONTEXT_KEEP", "10"))
+
+
+class ContextReportStore:
+    """
+    SQLite store of repository context reports, keyed by repository and the
+    base commit they describe.
+    """
+
+    def __init__(self, path: str, keep: int = REPO_CONTEXT_KEEP):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            " repo TEXT, base_sha TEXT, report TEXT, refreshed_from TEXT, created_at REAL,"
+            " PRIMARY KEY (repo, base_sha))"
+        )
+        self._conn.commit()
+
+    def get(self, repo: str, base_sha: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT report FROM reports WHERE repo = ? AND base_sha = ?", (repo, base_sha)
+            ).fetchone()
+        return row[0] if row else None
+
+    def latest(self, repo: str) -> Optional[Tuple[str, str]]:
+        """
+        Returns the newest report of a repository as ``(base_sha, report)``.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT base_sha, report FROM reports WHERE repo = ? ORDER BY created_at DESC LIMIT 1", (repo,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save(self, repo: str, base_sha: str, report: str, refreshed_from: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)",
+                (repo, base_sha, report, refreshed_from, time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM reports WHERE repo = ? AND base_sha NOT IN ("
+                " SELECT base_sha FROM reports WHERE repo = ? ORDER BY created_at DESC LIMIT ?)",
+                (repo, repo, self.keep),
+            )
+            self._conn.commit()
+
+
+_store: Optional[ContextReportStore] = None
+_store_lock = threading.Lock()
+
+
+def get_context_store() -> ContextReportStore:
+    """
+    Returns the process-wide repository context report store.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ContextReportStore(cache_path("repo_context.sqlite3"))
+    return _store
+
+
+def _forget_store() -> None:
+    global _store, _store_lock
+    _store = None
+    _store_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_store)
+
+
+def fetch_base_sha(repo: str) -> Optional[str]:
+    """
+    Returns the head commit SHA of the repository's default branch, or None on failure.
+    """
+    response = github_client.get(f"{API_URL}/repos/{repo}", headers=github_client.auth_headers())
+    if response.status_code != 200:
+        logger.error(f"Failed to fetch {repo}: {response.status_code} - {response.text}")
+        return None
+    branch = response.json().get("default_branch")
+    response = github_client.get(
+        f"{API_URL}/repos/{repo}/commits/{branch}", headers=github_client.auth_headers("application/vnd.github.sha")
+    )
+    if response.status_code != 200:
+        logger.error(f"Failed to fetch the head of {repo}@{branch}: {response.status_code} - {response.text}")
+        return None
+    return response.text.strip()
+
+
+def fetch_changed_files(repo: str, old_sha: str, new_sha: str) -> Optional[List[str]]:
+    """
+    Lists the files changed between two commits as "status path" lines, or
+    None on failure.
+    """
+    response = github_client.get(
+        f"{API_URL}/repos/{repo}/compare/{old_sha}...{new_sha}", headers=github_client.auth_headers()
+    )
+    if response.status_code != 200:
+        # e.g. the old base is gone after a force-push
+        logger.warning(f"Failed to compare {old_sha}...{new_sha}: {response.status_code}")
+        return None
+    return [f"{file.get('status')} {file.get('filename')}" for file in response.json().get("files", [])]
+
+
+class ContextPlan(NamedTuple):
+    """
+    How to get the context report of ``base_sha``: reuse ``report`` as is,
+    refresh the report of ``previous_sha`` for the ``changed`` files, or
+    (without a report) analyze the repository from scratch.
+    """
+    base_sha: Optional[str] = None
+    report: Optional[str] = None
+    previous_sha: Optional[str] = None
+    changed: Tuple[str, ...] = ()
+
+    @property
+    def reusable(self) -> bool:
+        return self.report is not None and self.previous_sha is None
+
+    @property
+    def refresh(self) -> bool:
+        return self.report is not None and self.previous_sha is not None
+
+
+def plan_context(repo: Optional[str]) -> ContextPlan:
+    """
+    Looks up the cached context report for the current base commit of ``repo``.
+    """
+    if not REPO_CONTEXT_CACHE or not repo:
+        return ContextPlan()
+    try:
+        base_sha = fetch_base_sha(repo)
+    except Exception as e:
+        logger.warning(f"Repository context cache disabled for this run: {e}")
+        return ContextPlan()
+    if not base_sha:
+        return ContextPlan()
+
+    store = get_context_store()
+    report = store.get(repo, base_sha)
+    if report is not None:
+        logger.info(f"Reusing the context report of {repo}@{base_sha[:7]}.")
+        return ContextPlan(base_sha, report)
+    latest = store.latest(repo)
+    if latest is None:
+        return ContextPlan(base_sha)
+    previous_sha, report = latest
+    changed = fetch_changed_files(repo, previous_sha, base_sha)
+    if changed is None or len(changed) > REPO_CONTEXT_MAX_CHANGED_FILES:
+        logger.info(f"Rebuilding the context report of {repo}: too many changes since {previous_sha[:7]}.")
+        return ContextPlan(base_sha)
+    logger.info(f"Refreshing the context report of {repo} for {len(changed)} file(s) changed since {previous_sha[:7]}.")
+    return ContextPlan(base_sha, report, previous_sha, tuple(changed))
+
+
+def escape_braces(text: str) -> str:
+    """
+    Escapes text embedded in a task description, which crewAI formats with the crew inputs.
+    """
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def save_report_callback(repo: Optional[str], plan: ContextPlan) -> Optional[Callable[[TaskOutput], None]]:
+    """
+    Returns the task callback storing the report a run produced for the plan's base commit.
+    """
+    if not repo or not plan.base_sha or plan.reusable:
+        return None
+
+    def save(output: TaskOutput) -> None:
+        if output.raw and output.raw.strip():
+            get_context_store().save(repo, plan.base_sha, output.raw, plan.previous_sha)
+
+    return save
+
+
+def reuse_report(task: Task, plan: ContextPlan) -> bool:
+    """
+    Gives ``task`` the cached report as its output when the plan allows it,
+    so tasks with it in their ``context`` read the report without running it.
+    """
+    if not plan.reusable:
+        return False
+    task.output = TaskOutput(
+        description=task.description, expected_output=task.expected_output, raw=plan.report,
+        agent=task.agent.role if task.agent else "",
+    )
+    return True
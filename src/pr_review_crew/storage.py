@@ -0,0 +1,16 @@
+import os
+
+# Root directory for everything the crew persists between runs
+CACHE_DIR = os.getenv(
+    "PR_REVIEW_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pr_review_crew"),
+)
+
+
+def cache_path(*parts: str) -> str:
+    """
+    Returns a path under the cache directory, creating its parent directory.
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,185 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from crewai import Crew, Process
+from crewai.crews.crew_output import CrewOutput
+
+from pr_review_crew import tracing
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to run crew tasks one after another, as crewAI does
+CREW_DAG = os.getenv("CREW_DAG", "1") != "0"
+# Tasks of one crew running at the same time
+CREW_MAX_PARALLEL_TASKS = int(os.getenv("CREW_MAX_PARALLEL_TASKS", "3"))
+
+
+def dependencies(tasks: List[Any]) -> Dict[int, List[int]]:
+    """
+    Positions of the tasks each task depends on.
+
+    ``context=[...]`` lists a task's dependencies (``context=[]`` meaning
+    none); a task without ``context`` depends on the task before it, whose
+    output crewAI would hand it in a sequential run.
+    """
+    positions = {id(task): position for position, task in enumerate(tasks)}
+    graph = {}
+    for position, task in enumerate(tasks):
+        context = getattr(task, "context", None)
+        if context is None:
+            graph[position] = [position - 1] if position else []
+        else:
+            graph[position] = [positions[id(dependency)] for dependency in context if id(dependency) in positions]
+    return graph
+
+
+def critical_path(graph: Dict[int, List[int]], durations: Dict[int, float]) -> List[int]:
+    """
+    The chain of dependent tasks with the longest total duration, which
+    bounds the run time however many tasks run in parallel.
+    """
+    finish: Dict[int, float] = {}
+    previous: Dict[int, Optional[int]] = {}
+    for position in sorted(graph):
+        slowest = max(graph[position], key=lambda dependency: finish[dependency], default=None)
+        previous[position] = slowest
+        finish[position] = (finish[slowest] if slowest is not None else 0.0) + durations.get(position, 0.0)
+    if not finish:
+        return []
+    path = [max(finish, key=finish.get)]
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+    return path[::-1]
+
+
+def run_graph(tasks: List[Any], run: Callable[[Any], Any], max_workers: int = CREW_MAX_PARALLEL_TASKS,
+              name: Callable[[Any], str] = str) -> Dict[int, float]:
+    """
+    Runs ``run(task)`` for every task once its dependencies are done, at
+    most ``max_workers`` at a time, and returns each task's duration. The
+    first failure stops new tasks from starting and is raised once the
+    running ones are done. Raises ValueError when the remaining tasks wait
+    on each other.
+    """
+    graph = dependencies(tasks)
+    waiting = {position: set(dependencies_) for position, dependencies_ in graph.items()}
+    durations: Dict[int, float] = {}
+    running = {}
+    error = None
+
+    def timed(position: int) -> float:
+        task_started = time.monotonic()
+        run(tasks[position])
+        return time.monotonic() - task_started
+
+    with tracing.span("crew", "task graph", tasks=len(tasks)) as current:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="crew-task") as pool:
+            while waiting or running:
+                if error is None:
+                    for position in [position for position, pending in waiting.items() if not pending]:
+                        if len(running) >= max_workers:
+                            break
+                        del waiting[position]
+                        # Spans of the task nest under this one
+                        running[pool.submit(contextvars.copy_context().run, timed, position)] = position
+                if not running:
+                    if error is None:
+                        stuck = ", ".join(name(tasks[position]) for position in sorted(waiting))
+                        error = ValueError(f"Tasks wait on each other through their context: {stuck}")
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = running.pop(future)
+                    try:
+                        durations[position] = future.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    for pending in waiting.values():
+                        pending.discard(position)
+        if error is not None:
+            raise error
+
+        elapsed = time.monotonic() - started
+        path = critical_path(graph, durations)
+        path_time = sum(durations[position] for position in path)
+        current.set(task_seconds=round(sum(durations.values()), 3), critical_path_seconds=round(path_time, 3),
+                    critical_path=[name(tasks[position]) for position in path])
+    logger.info(
+        f"Ran {len(tasks)} task(s) in {elapsed:.1f}s ({sum(durations.values()):.1f}s of task time); "
+        f"critical path {path_time:.1f}s: {' -> '.join(name(tasks[position]) for position in path)}"
+    )
+    return durations
+
+
+def _task_name(task) -> str:
+    return getattr(task, "name", None) or task.description.strip().splitlines()[0][:60]
+
+
+class DagCrew(Crew):
+    """
+    Crew that runs its tasks as a dependency graph built from their
+    ``context`` links: independent tasks run at the same time, each as a
+    one-task crew sharing this crew's agents, memory and callbacks.
+    """
+
+    max_parallel_tasks: int = CREW_MAX_PARALLEL_TASKS
+
+    def kickoff(self, inputs: Optional[Dict[str, Any]] = None) -> CrewOutput:
+        if not CREW_DAG or self.process != Process.sequential or self.max_parallel_tasks <= 1:
+            return super().kickoff(inputs=inputs)
+
+        busy_agents = set()
+        busy_lock = threading.Lock()
+        outputs: Dict[int, CrewOutput] = {}
+        # A task without context gets the output of the task before it, as in a sequential run
+        previous = {id(task): self.tasks[position - 1] for position, task in enumerate(self.tasks) if position}
+
+        def run(task) -> None:
+            agent = original = task.agent
+            context = task.context
+            with busy_lock:
+                # An agent keeps per-task executor state, so concurrent tasks each get their own copy
+                if id(agent) in busy_agents:
+                    agent = agent.copy()
+                busy_agents.add(id(agent))
+            try:
+                task.agent = agent
+                if context is None and id(task) in previous:
+                    task.context = [previous[id(task)]]
+                crew = Crew(
+                    agents=[agent, *(other for other in self.agents if other is not agent)],
+                    tasks=[task],
+                    process=Process.sequential,
+                    memory=self.memory,
+                    short_term_memory=self.short_term_memory,
+                    long_term_memory=self.long_term_memory,
+                    entity_memory=self.entity_memory,
+                    step_callback=self.step_callback,
+                    task_callback=self.task_callback,
+                    max_rpm=self.max_rpm,
+                    output_log_file=self.output_log_file,
+                    verbose=self.verbose,
+                )
+                with tracing.span("task", _task_name(task), agent=getattr(agent, "role", "")):
+                    outputs[id(task)] = crew.kickoff(inputs=inputs)
+            finally:
+                task.agent = original
+                task.context = context
+                with busy_lock:
+                    busy_agents.discard(id(agent))
+
+        run_graph(self.tasks, run, self.max_parallel_tasks, name=_task_name)
+
+        # Like a sequential run: the last task's output, with every task's output attached
+        result = outputs[id(self.tasks[-1])]
+        result.tasks_output = [task.output for task in self.tasks]
+        for task in self.tasks[:-1]:
+            result.token_usage.add_usage_metrics(outputs[id(task)].token_usage)
+        return result
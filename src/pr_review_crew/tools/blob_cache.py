@@ -0,0 +1,155 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from pr_review_crew.storage import cache_path
+
+logger = logging.getLogger(__name__)
+
+BLOB_CACHE_ENABLED = os.getenv("BLOB_CACHE", "1") != "0"
+BLOB_CACHE_MEMORY_BYTES = int(os.getenv("BLOB_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+BLOB_CACHE_MAX_BYTES = int(os.getenv("BLOB_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+class BlobCache:
+    """
+    Git blobs keyed by SHA: a least-recently-used set in memory in front of
+    a SQLite store, each bounded in bytes.
+
+    A SHA names its content, so entries never need revalidation.
+    """
+
+    def __init__(self, path: str, memory_bytes: int = BLOB_CACHE_MEMORY_BYTES,
+                 max_bytes: int = BLOB_CACHE_MAX_BYTES):
+        self.memory_bytes = memory_bytes
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, content BLOB, size INTEGER, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS blobs_lru ON blobs (last_access)")
+        self._conn.commit()
+        self._disk_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, sha: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._memory.get(sha)
+            if content is not None:
+                self._memory.move_to_end(sha)
+                self.memory_hits += 1
+                return content
+            row = self._conn.execute("SELECT content FROM blobs WHERE sha = ?", (sha,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE blobs SET last_access = ? WHERE sha = ?", (time.time(), sha))
+            self._conn.commit()
+            self.disk_hits += 1
+            content = bytes(row[0])
+            self._remember(sha, content)
+            return content
+
+    def put(self, sha: str, content: bytes) -> None:
+        with self._lock:
+            self._remember(sha, content)
+            if len(content) > self.max_bytes:
+                return
+            exists = self._conn.execute("SELECT 1 FROM blobs WHERE sha = ?", (sha,)).fetchone()
+            if exists is None:
+                self._conn.execute("INSERT INTO blobs VALUES (?, ?, ?, ?)", (sha, content, len(content), time.time()))
+                self._disk_size += len(content)
+                self._evict()
+            self._conn.commit()
+
+    def _remember(self, sha: str, content: bytes) -> None:
+        # Blobs bigger than a quarter of the memory budget only live on disk
+        if sha in self._memory or len(content) > self.memory_bytes // 4:
+            return
+        self._memory[sha] = content
+        self._memory_size += len(content)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _evict(self) -> None:
+        if self._disk_size <= self.max_bytes:
+            return
+        for sha, size in self._conn.execute("SELECT sha, size FROM blobs ORDER BY last_access").fetchall():
+            if self._disk_size <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM blobs WHERE sha = ?", (sha,))
+            self._disk_size -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_bytes": self._memory_size,
+                "entries": entries,
+                "bytes": self._disk_size,
+            }
+
+
+_cache: Optional[BlobCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_blob_cache() -> Optional[BlobCache]:
+    """
+    Returns the process-wide blob cache, or None when disabled.
+    """
+    global _cache
+    if not BLOB_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = BlobCache(cache_path("git", "blobs.sqlite3"))
+                atexit.register(log_stats)
+    return _cache
+
+
+def _forget_cache() -> None:
+    # A forked child must open its own SQLite connection.
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_cache)
+
+
+def stats() -> dict:
+    return _cache.stats() if _cache is not None else {}
+
+
+def log_stats() -> None:
+    if _cache is None or not (_cache.memory_hits or _cache.disk_hits or _cache.misses):
+        return
+    current = _cache.stats()
+    logger.info(
+        f"Blob cache: {current['memory_hits']} memory / {current['disk_hits']} disk hit(s), "
+        f"{current['misses']} miss(es) ({current['hit_rate']:.0%}), {current['entries']} entries / "
+        f"{current['bytes']} bytes"
+    )
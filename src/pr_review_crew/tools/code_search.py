@@ -0,0 +1,254 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Type
+
+import chromadb
+from chromadb.utils import embedding_functions
+from crewai_tools import BaseTool
+from pydantic import BaseModel, Field
+
+from pr_review_crew.storage import CACHE_DIR, cache_path
+from pr_review_crew.tools.git_objects import fetch_blobs, fetch_complete_tree
+from pr_review_crew.tracing import traced_tool
+
+logger = logging.getLogger(__name__)
+
+REPO = os.getenv("REPO")
+
+# Embedding model; without an OpenAI key Chroma's local default model is used
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+# Files larger than this are not embedded
+EMBED_MAX_FILE_BYTES = int(os.getenv("EMBED_MAX_FILE_BYTES", str(256 * 1024)))
+EMBED_CHUNK_LINES = int(os.getenv("EMBED_CHUNK_LINES", "80"))
+# Documents sent to the embedding function per call
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+SKIPPED_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".pdf", ".zip", ".gz", ".tar", ".jar", ".whl",
+    ".so", ".dll", ".exe", ".bin", ".woff", ".woff2", ".ttf", ".mp4", ".mp3", ".lock",
+)
+
+
+def default_embedding_function():
+    api_key = os.getenv("OPENAI_API_KEY")
+    if api_key:
+        return embedding_functions.OpenAIEmbeddingFunction(api_key=api_key, model_name=EMBEDDING_MODEL)
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+def _chunks(text: str):
+    """
+    Yields (start line, end line, text) slices of a file.
+    """
+    lines = text.splitlines()
+    for start in range(0, len(lines), EMBED_CHUNK_LINES):
+        chunk = "\n".join(lines[start:start + EMBED_CHUNK_LINES])
+        if chunk.strip():
+            yield start + 1, min(start + EMBED_CHUNK_LINES, len(lines)), chunk
+
+
+def _decode(content: bytes) -> Optional[str]:
+    if b"\0" in content[:8192]:
+        return None
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+class EmbeddingIndex:
+    """
+    Persistent vector index of one repository branch, keyed by blob SHA.
+
+    sync() compares the branch's current tree with the last indexed one:
+    only new blobs are embedded and blobs no file points to anymore are
+    pruned, so an unchanged file is never embedded twice.
+    """
+
+    def __init__(self, repo: str, branch: str, client, state_path: str, embedding_function=None):
+        self.repo = repo
+        self.branch = branch
+        model = EMBEDDING_MODEL if os.getenv("OPENAI_API_KEY") else "default"
+        # Vectors of different models are not comparable, hence the model in the namespace
+        self.namespace = f"{repo}@{branch}#{model}"
+        name = "repo-" + hashlib.sha1(self.namespace.encode("utf-8")).hexdigest()[:24]
+        self.collection = client.get_or_create_collection(
+            name=name,
+            embedding_function=embedding_function or default_embedding_function(),
+            metadata={"repo": repo, "branch": branch, "model": model},
+        )
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(state_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS trees (namespace TEXT PRIMARY KEY, tree_sha TEXT, indexed_at REAL);"
+            "CREATE TABLE IF NOT EXISTS files (namespace TEXT, path TEXT, blob_sha TEXT,"
+            " PRIMARY KEY (namespace, path));"
+            "CREATE TABLE IF NOT EXISTS blobs (namespace TEXT, blob_sha TEXT, chunks INTEGER,"
+            " PRIMARY KEY (namespace, blob_sha));"
+        )
+        self._conn.commit()
+
+    def indexed_tree(self) -> Optional[str]:
+        row = self._conn.execute("SELECT tree_sha FROM trees WHERE namespace = ?", (self.namespace,)).fetchone()
+        return row[0] if row else None
+
+    def _stored(self, table: str, key: str, value: str) -> Dict[str, object]:
+        return dict(self._conn.execute(
+            f"SELECT {key}, {value} FROM {table} WHERE namespace = ?", (self.namespace,)
+        ).fetchall())
+
+    def sync(self) -> Optional[dict]:
+        """
+        Brings the index up to date with the branch head. Returns counts of
+        embedded, pruned and unchanged blobs, or None on failure.
+        """
+        with self._lock:
+            # A truncated listing would make the unlisted files look deleted and prune their embeddings
+            tree = fetch_complete_tree(self.repo, self.branch)
+            if tree is None:
+                return None
+            tree_sha, entries = tree.sha, tree.entries
+            if tree_sha == self.indexed_tree():
+                return {"embedded": 0, "pruned": 0, "unchanged": len(self._stored("blobs", "blob_sha", "chunks"))}
+
+            started = time.monotonic()
+            files = {
+                entry.path: entry.sha for entry in entries
+                if entry.size <= EMBED_MAX_FILE_BYTES and not entry.path.lower().endswith(SKIPPED_EXTENSIONS)
+            }
+            stored_files = self._stored("files", "path", "blob_sha")
+            stored_blobs = self._stored("blobs", "blob_sha", "chunks")
+            wanted = set(files.values())
+            missing = wanted - set(stored_blobs)
+            obsolete = set(stored_blobs) - wanted
+
+            contents = fetch_blobs(self.repo, missing)
+            for blob_sha, content in contents.items():
+                text = _decode(content)
+                chunks = list(_chunks(text)) if text else []
+                for offset in range(0, len(chunks), EMBED_BATCH_SIZE):
+                    batch = chunks[offset:offset + EMBED_BATCH_SIZE]
+                    self.collection.upsert(
+                        ids=[f"{blob_sha}:{offset + position}" for position in range(len(batch))],
+                        documents=[chunk for _, _, chunk in batch],
+                        metadatas=[{"blob_sha": blob_sha, "start_line": start, "end_line": end}
+                                   for start, end, _ in batch],
+                    )
+                # Binary and empty blobs are recorded too, so they are not fetched again
+                self._conn.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)",
+                                   (self.namespace, blob_sha, len(chunks)))
+
+            pruned_ids = [f"{blob_sha}:{position}" for blob_sha in obsolete
+                          for position in range(stored_blobs[blob_sha])]
+            for offset in range(0, len(pruned_ids), 5000):
+                self.collection.delete(ids=pruned_ids[offset:offset + 5000])
+            self._conn.executemany("DELETE FROM blobs WHERE namespace = ? AND blob_sha = ?",
+                                   [(self.namespace, blob_sha) for blob_sha in obsolete])
+
+            self._conn.executemany("DELETE FROM files WHERE namespace = ? AND path = ?",
+                                   [(self.namespace, path) for path in stored_files if path not in files])
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                                   [(self.namespace, path, blob_sha) for path, blob_sha in files.items()
+                                    if stored_files.get(path) != blob_sha])
+            # A failed blob fetch leaves the tree unrecorded so the next sync retries it
+            if len(contents) == len(missing):
+                self._conn.execute("INSERT OR REPLACE INTO trees VALUES (?, ?, ?)",
+                                   (self.namespace, tree_sha, time.time()))
+            self._conn.commit()
+
+        counts = {"embedded": len(contents), "pruned": len(obsolete), "unchanged": len(wanted) - len(missing)}
+        logger.info(
+            f"Indexed {self.repo}@{self.branch} ({tree_sha[:7]}): {counts['embedded']} blob(s) embedded, "
+            f"{counts['pruned']} pruned, {counts['unchanged']} unchanged in {time.monotonic() - started:.1f}s."
+        )
+        return counts
+
+    def search(self, query: str, n_results: int = 5) -> List[dict]:
+        """
+        Returns the chunks closest to ``query`` with the paths of their blob.
+        """
+        if not self.collection.count():
+            return []
+        result = self.collection.query(query_texts=[query], n_results=n_results)
+        paths: Dict[str, List[str]] = {}
+        for path, blob_sha in self._stored("files", "path", "blob_sha").items():
+            paths.setdefault(blob_sha, []).append(path)
+        matches = []
+        for document, metadata, distance in zip(result["documents"][0], result["metadatas"][0],
+                                                result["distances"][0]):
+            matches.append({
+                "paths": sorted(paths.get(metadata["blob_sha"], [])),
+                "start_line": metadata["start_line"],
+                "end_line": metadata["end_line"],
+                "distance": distance,
+                "text": document,
+            })
+        return matches
+
+
+_client = None
+_indexes: Dict[str, EmbeddingIndex] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_index(repo: str, branch: str) -> EmbeddingIndex:
+    """
+    Returns the process-wide index of a repository branch.
+    """
+    global _client
+    key = f"{repo}@{branch}"
+    with _lock:
+        if key not in _indexes:
+            if _client is None:
+                _client = chromadb.PersistentClient(path=os.path.join(CACHE_DIR, "embeddings", "chroma"))
+            _indexes[key] = EmbeddingIndex(repo, branch, _client, cache_path("embeddings", "index.sqlite3"))
+        return _indexes[key]
+
+
+def _forget_indexes() -> None:
+    # SQLite connections and the Chroma client must not be shared with a forked child.
+    global _client, _lock
+    _client = None
+    _indexes.clear()
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_indexes)
+
+
+class CodeSearchInput(BaseModel):
+    query: str = Field(..., description="What to look for, in natural language or code.")
+    branch: str = Field(default="main", description="The branch to search.")
+    n_results: int = Field(default=5, description="Number of code snippets to return.")
+
+
+class CodeSearchTool(BaseTool):
+    name: str = "Search Repository Code"
+    description: str = "Semantic search over the code of the repository; returns matching snippets with their paths."
+    args_schema: Type[BaseModel] = CodeSearchInput
+
+    @traced_tool
+    def _run(self, query: str, branch: str = "main", n_results: int = 5) -> str:
+        """
+        Syncs the branch index (embedding changed files only) and searches it.
+        """
+        try:
+            index = get_embedding_index(REPO, branch)
+            if index.sync() is None:
+                return f"Failed to index repository '{REPO}' on branch '{branch}'."
+            matches = index.search(query, n_results)
+        except Exception as e:
+            logger.error(f"Code search failed: {str(e)}")
+            return f"Code search failed: {str(e)}"
+        if not matches:
+            return "No matching code found."
+        return "\n\n".join(
+            f"{', '.join(match['paths']) or '(removed file)'} "
+            f"lines {match['start_line']}-{match['end_line']}:\n{match['text']}"
+            for match in matches
+        )
@@ -0,0 +1,271 @@
+import hashlib
+import re
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+ADDED = "+"
+REMOVED = "-"
+CONTEXT = " "
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+
+
+class DiffLine(NamedTuple):
+    kind: str
+    old_lineno: Optional[int]
+    new_lineno: Optional[int]
+    text: str
+
+
+class Hunk:
+    """
+    One ``@@`` hunk of a unified diff.
+
+    Line numbers and change kinds are kept in typed arrays (0 meaning "no
+    line on this side") so large diffs stay compact; ``DiffLine`` tuples
+    are only materialized on iteration.
+    """
+
+    __slots__ = (
+        "file_path", "index", "old_start", "old_count", "new_start", "new_count",
+        "section", "_kinds", "_old", "_new", "_text",
+    )
+
+    def __init__(self, file_path: str, index: int, old_start: int, old_count: int,
+                 new_start: int, new_count: int, section: str = ""):
+        self.file_path = file_path
+        self.index = index
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        self.section = section
+        self._kinds = bytearray()
+        self._old = array("I")
+        self._new = array("I")
+        self._text: List[str] = []
+
+    def _append(self, kind: str, old_lineno: int, new_lineno: int, text: str) -> None:
+        self._kinds.append(ord(kind))
+        self._old.append(old_lineno)
+        self._new.append(new_lineno)
+        self._text.append(text)
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def __iter__(self) -> Iterator[DiffLine]:
+        for kind, old, new, text in zip(self._kinds, self._old, self._new, self._text):
+            yield DiffLine(chr(kind), old or None, new or None, text)
+
+    @property
+    def header(self) -> str:
+        header = f"@@ -{self.old_start},{self.old_count} +{self.new_start},{self.new_count} @@"
+        return f"{header} {self.section}" if self.section else header
+
+    @property
+    def new_end(self) -> int:
+        return self.new_start + max(self.new_count, 1) - 1
+
+    def added(self) -> List[DiffLine]:
+        return [line for line in self if line.kind == ADDED]
+
+    def removed(self) -> List[DiffLine]:
+        return [line for line in self if line.kind == REMOVED]
+
+    def content_hash(self, include_path: bool = True) -> str:
+        """
+        Hash of the added and removed lines. Line numbers and context are
+        left out so the same change still matches after a rebase.
+        """
+        digest = hashlib.sha256(self.file_path.encode("utf-8") if include_path else b"")
+        for kind, text in zip(self._kinds, self._text):
+            if kind != ord(CONTEXT):
+                digest.update(bytes((kind,)) + text.encode("utf-8") + b"\n")
+        return digest.hexdigest()
+
+    def line_at(self, new_lineno: int) -> Optional[DiffLine]:
+        """
+        Returns the line shown at ``new_lineno`` of the new file, if the hunk covers it.
+        """
+        for line in self:
+            if line.new_lineno == new_lineno:
+                return line
+        return None
+
+    def render(self, start: int = 0, stop: Optional[int] = None) -> str:
+        """
+        Renders the hunk, or lines ``start:stop`` of it, with old/new line
+        numbers in front of each line.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        part = "" if start == 0 and stop == len(self) else f" (lines {start}-{stop})"
+        rendered = [f"{self.file_path} hunk {self.index}{part}: {self.header}"]
+        for position, line in enumerate(self):
+            if position < start:
+                continue
+            if position >= stop:
+                break
+            old = line.old_lineno or ""
+            new = line.new_lineno or ""
+            rendered.append(f"{old:>6} {new:>6} {line.kind}{line.text}")
+        return "\n".join(rendered)
+
+
+def iter_hunks(patch: str, file_path: str = "") -> Iterator[Hunk]:
+    """
+    Streams the hunks of a unified diff patch one at a time.
+
+    File headers (``---``/``+++``) before the first hunk are ignored, as are
+    ``\\ No newline at end of file`` markers.
+    """
+    hunk = None
+    old_lineno = new_lineno = 0
+    index = 0
+    for line in patch.splitlines():
+        match = HUNK_HEADER.match(line)
+        if match:
+            if hunk is not None:
+                yield hunk
+            old_start, old_count, new_start, new_count, section = match.groups()
+            hunk = Hunk(
+                file_path, index,
+                int(old_start), int(old_count) if old_count is not None else 1,
+                int(new_start), int(new_count) if new_count is not None else 1,
+                section.strip(),
+            )
+            index += 1
+            old_lineno, new_lineno = int(old_start), int(new_start)
+            continue
+        if hunk is None or line.startswith("\\"):
+            continue
+        kind, text = (line[0], line[1:]) if line else (CONTEXT, "")
+        if kind == ADDED:
+            hunk._append(ADDED, 0, new_lineno, text)
+            new_lineno += 1
+        elif kind == REMOVED:
+            hunk._append(REMOVED, old_lineno, 0, text)
+            old_lineno += 1
+        else:
+            hunk._append(CONTEXT, old_lineno, new_lineno, text)
+            old_lineno += 1
+            new_lineno += 1
+    if hunk is not None:
+        yield hunk
+
+
+class DiffIndex:
+    """
+    Hunks of a pull request indexed by file and by new-file line number.
+    """
+
+    def __init__(self, head_sha: Optional[str] = None, since_sha: Optional[str] = None):
+        # since_sha is set when the index only holds the changes pushed after that commit
+        self.head_sha = head_sha
+        self.since_sha = since_sha
+        self._hunks: Dict[str, List[Hunk]] = {}
+        self._starts: Dict[str, List[int]] = {}
+        # Files left out of the review, with a one-line summary each
+        self.skipped: Dict[str, str] = {}
+        # Hunks answered from the review of the same change in another PR, with that PR's number
+        self.answered: List[Tuple[Hunk, int]] = []
+
+    def add_file(self, file_path: str, patch: str) -> List[Hunk]:
+        hunks = list(iter_hunks(patch, file_path))
+        self._hunks[file_path] = hunks
+        self._starts[file_path] = [hunk.new_start for hunk in hunks]
+        return hunks
+
+    def drop(self, predicate) -> List[Hunk]:
+        """
+        Removes the hunks for which ``predicate(hunk)`` is true and renumbers
+        the rest. Returns the removed hunks.
+        """
+        dropped = []
+        for file_path in list(self._hunks):
+            kept = []
+            for hunk in self._hunks[file_path]:
+                (dropped if predicate(hunk) else kept).append(hunk)
+            if not kept:
+                del self._hunks[file_path]
+                del self._starts[file_path]
+                continue
+            for index, hunk in enumerate(kept):
+                hunk.index = index
+            self._hunks[file_path] = kept
+            self._starts[file_path] = [hunk.new_start for hunk in kept]
+        return dropped
+
+    def discard_hunks(self, content_hashes) -> int:
+        """
+        Drops the hunks whose content hash is in ``content_hashes`` and
+        renumbers the rest. Returns the number of hunks dropped.
+        """
+        return len(self.drop(lambda hunk: hunk.content_hash() in content_hashes))
+
+    def skip_file(self, file_path: str, summary: str) -> List[Hunk]:
+        """
+        Leaves a file out of the review, keeping ``summary`` in its place.
+        """
+        self._starts.pop(file_path, None)
+        self.skipped[file_path] = summary
+        return self._hunks.pop(file_path, [])
+
+    def filtered(self, keep) -> "DiffIndex":
+        """
+        Returns an index of the hunks for which ``keep(hunk)`` is true. Hunks
+        keep their numbers, so "Fetch Diff Hunk" still finds them.
+        """
+        index = DiffIndex(head_sha=self.head_sha, since_sha=self.since_sha)
+        for file_path, hunks in self._hunks.items():
+            kept = [hunk for hunk in hunks if keep(hunk)]
+            if kept:
+                index._hunks[file_path] = kept
+                index._starts[file_path] = [hunk.new_start for hunk in kept]
+        return index
+
+    def all_hunks(self) -> Iterator[Hunk]:
+        for hunks in self._hunks.values():
+            yield from hunks
+
+    def files(self) -> List[str]:
+        return list(self._hunks)
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self._hunks
+
+    def hunks(self, file_path: str) -> List[Hunk]:
+        return self._hunks.get(file_path, [])
+
+    def hunk(self, file_path: str, index: int) -> Optional[Hunk]:
+        hunks = self.hunks(file_path)
+        return hunks[index] if 0 <= index < len(hunks) else None
+
+    def find(self, file_path: str, new_lineno: int) -> Optional[Hunk]:
+        """
+        Returns the hunk covering ``new_lineno`` of the new file, if any.
+        """
+        starts = self._starts.get(file_path)
+        if not starts:
+            return None
+        position = bisect_right(starts, new_lineno) - 1
+        if position < 0:
+            return None
+        hunk = self._hunks[file_path][position]
+        return hunk if new_lineno <= hunk.new_end else None
+
+    def line(self, file_path: str, new_lineno: int) -> Optional[DiffLine]:
+        hunk = self.find(file_path, new_lineno)
+        return hunk.line_at(new_lineno) if hunk else None
+
+    def summary(self) -> str:
+        """
+        One line per file: hunk count and added/removed line totals.
+        """
+        rows = []
+        for file_path, hunks in self._hunks.items():
+            added = sum(len(hunk.added()) for hunk in hunks)
+            removed = sum(len(hunk.removed()) for hunk in hunks)
+            rows.append(f"{file_path}: {len(hunks)} hunk(s), +{added}/-{removed}")
+        return "\n".join(rows)
@@ -0,0 +1,112 @@
+import logging
+import math
+import os
+import re
+from typing import List, Optional, Tuple
+
+from pr_review_crew.tools.diff_model import DiffIndex, Hunk
+
+logger = logging.getLogger(__name__)
+
+# Token budget of one review chunk; keep it well below the model's context window
+TOKEN_BUDGET = int(os.getenv("REVIEW_TOKEN_BUDGET", "3000"))
+CHARS_PER_TOKEN = 4
+# Width of the line number columns added by Hunk.render()
+RENDER_OVERHEAD = 16
+
+# (pattern, weight): paths matching several patterns take the highest weight
+RISK_RULES = [
+    (re.compile(r"auth|login|password|secret|token|crypt|permission|security|session", re.I), 3.0),
+    (re.compile(r"sql|query|migration|schema|database|\bdb\b", re.I), 2.0),
+    (re.compile(r"(^|/)(Dockerfile|\.github/workflows/)|requirements.*\.txt$|pyproject\.toml$|setup\.py$|\.ya?ml$", re.I), 1.5),
+    (re.compile(r"(^|/)tests?/|_test\.|test_", re.I), 0.6),
+    (re.compile(r"\.(md|rst|txt)$|(^|/)docs?/", re.I), 0.3),
+]
+
+
+def _line_tokens(hunk: Hunk) -> List[int]:
+    return [math.ceil((len(line.text) + RENDER_OVERHEAD) / CHARS_PER_TOKEN) for line in hunk]
+
+
+def file_risk(file_path: str, hunks: List[Hunk]) -> float:
+    """
+    Risk score of a changed file: its path weight scaled by the log of the
+    number of changed lines.
+    """
+    weight = max((rule_weight for pattern, rule_weight in RISK_RULES if pattern.search(file_path)), default=1.0)
+    changed = sum(len(hunk.added()) + len(hunk.removed()) for hunk in hunks)
+    return round(weight * math.log2(2 + changed), 2)
+
+
+class ReviewChunk:
+    """
+    A slice of a PR diff sized to fit the token budget. Items are
+    ``(hunk, start, stop)`` line ranges so an oversized hunk can span chunks.
+    """
+
+    __slots__ = ("index", "items", "tokens", "score")
+
+    def __init__(self):
+        self.index = 0
+        self.items: List[Tuple[Hunk, int, int]] = []
+        self.tokens = 0
+        self.score = 0.0
+
+    def add(self, hunk: Hunk, start: int, stop: int, tokens: int, risk: float) -> None:
+        self.items.append((hunk, start, stop))
+        self.tokens += tokens
+        self.score = max(self.score, risk)
+
+    def files(self) -> List[str]:
+        return list(dict.fromkeys(hunk.file_path for hunk, _, _ in self.items))
+
+    def render(self) -> str:
+        return "\n\n".join(hunk.render(start, stop) for hunk, start, stop in self.items)
+
+    def describe(self) -> str:
+        return f"chunk {self.index}: ~{self.tokens} tokens, risk {self.score}, files: {', '.join(self.files())}"
+
+
+def plan_chunks(index: DiffIndex, budget: int = TOKEN_BUDGET) -> List[ReviewChunk]:
+    """
+    Splits the diff into chunks of at most ``budget`` estimated tokens and
+    orders them by risk, highest first.
+
+    Hunks of a file stay together where they fit; a hunk larger than the
+    budget is split on line boundaries.
+    """
+    ranked = sorted(
+        ((file_risk(file_path, index.hunks(file_path)), file_path) for file_path in index.files()),
+        key=lambda ranked_file: -ranked_file[0],
+    )
+    chunks: List[ReviewChunk] = []
+    current: Optional[ReviewChunk] = None
+
+    for risk, file_path in ranked:
+        for hunk in index.hunks(file_path):
+            line_tokens = _line_tokens(hunk)
+            total = sum(line_tokens)
+            if current is not None and current.tokens + total <= budget:
+                current.add(hunk, 0, len(line_tokens), total, risk)
+                continue
+            if total <= budget:
+                current = ReviewChunk()
+                chunks.append(current)
+                current.add(hunk, 0, len(line_tokens), total, risk)
+                continue
+            start = 0
+            while start < len(line_tokens):
+                current = ReviewChunk()
+                chunks.append(current)
+                stop, size = start, 0
+                while stop < len(line_tokens) and (stop == start or size + line_tokens[stop] <= budget):
+                    size += line_tokens[stop]
+                    stop += 1
+                current.add(hunk, start, stop, size, risk)
+                start = stop
+
+    chunks.sort(key=lambda chunk: -chunk.score)
+    for position, chunk in enumerate(chunks):
+        chunk.index = position
+        logger.info(f"Review plan {chunk.describe()}")
+    return chunks
@@ -0,0 +1,160 @@
+import math
+import os
+import posixpath
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from pr_review_crew.tools.diff_model import ADDED, REMOVED, Hunk
+from pr_review_crew.tools.path_index import glob_to_regex
+
+# Set to 0 to send generated, vendored and lock files to the reviewer like any other file
+SKIP_GENERATED = os.getenv("REVIEW_SKIP_GENERATED", "1") != "0"
+# Added text above this many bits per character (over enough text) is treated as encoded data
+ENTROPY_THRESHOLD = float(os.getenv("REVIEW_ENTROPY_THRESHOLD", "5.8"))
+ENTROPY_MIN_CHARS = 4096
+# Average added line length above which a file is treated as minified
+MINIFIED_LINE_LENGTH = int(os.getenv("REVIEW_MINIFIED_LINE_LENGTH", "300"))
+# Files with more changed lines than this are summarized instead of reviewed
+MAX_CHANGED_LINES = int(os.getenv("REVIEW_MAX_CHANGED_LINES", "3000"))
+
+LOCKFILES = {
+    "poetry.lock", "uv.lock", "pdm.lock", "Pipfile.lock", "package-lock.json", "npm-shrinkwrap.json",
+    "yarn.lock", "pnpm-lock.yaml", "bun.lockb", "Cargo.lock", "Gemfile.lock", "composer.lock",
+    "go.sum", "mix.lock", "pubspec.lock", "Podfile.lock", "packages.lock.json", "flake.lock",
+}
+VENDORED = re.compile(r"(^|/)(vendor|vendors|third_party|third-party|node_modules|bower_components|"
+                      r"site-packages|\.venv|venv|external)/")
+GENERATED = re.compile(
+    r"(_pb2(_grpc)?\.pyi?|\.pb\.(go|cc|h)|_pb\.(js|ts|d\.ts)|\.g\.dart|\.generated\.\w+|\.gen\.\w+|"
+    r"\.min\.(js|css)|\.map|\.snap)$|(^|/)(__snapshots__|dist|build|generated|gen)/"
+)
+# Markers code generators put in the first lines of their output
+GENERATED_MARKERS = re.compile(r"@generated|DO NOT EDIT|auto-?generated|generated by", re.I)
+# name/version pairs of TOML lockfiles (poetry.lock, uv.lock, Cargo.lock)
+LOCK_NAME = re.compile(r'^name = "([^"]+)"')
+LOCK_VERSION = re.compile(r'^version = "([^"]+)"')
+
+GitAttributes = List[Tuple["re.Pattern", Dict[str, Optional[bool]]]]
+
+
+def parse_gitattributes(text: str) -> GitAttributes:
+    """
+    Parses a ``.gitattributes`` file into (path regex, attributes) rules,
+    attributes being True when set and False when unset.
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        pattern, *tokens = line.split()
+        attributes: Dict[str, Optional[bool]] = {}
+        for token in tokens:
+            if token.startswith("-"):
+                attributes[token[1:]] = False
+            elif token.startswith("!"):
+                attributes[token[1:]] = None
+            elif "=" in token:
+                name, value = token.split("=", 1)
+                attributes[name] = value.lower() not in ("false", "0")
+            else:
+                attributes[token] = True
+        if attributes.get("binary"):
+            attributes.setdefault("diff", False)
+        # A pattern without a slash matches at any depth, like in .gitignore
+        anchored = "/" in pattern.rstrip("/")
+        glob = pattern.lstrip("/") if anchored else "**/" + pattern
+        rules.append((glob_to_regex(glob), attributes))
+    return rules
+
+
+def gitattribute(rules: GitAttributes, path: str, name: str) -> Optional[bool]:
+    """
+    Returns the value of attribute ``name`` for ``path``; later rules win.
+    """
+    value = None
+    for regex, attributes in rules:
+        if name in attributes and regex.match(path):
+            value = attributes[name]
+    return value
+
+
+def _entropy(text: str) -> float:
+    counts = Counter(text)
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in counts.values())
+
+
+def classify(path: str, hunks: List[Hunk], attributes: GitAttributes = ()) -> Optional[str]:
+    """
+    Returns why a changed file should not be reviewed line by line
+    ("lockfile", "vendored", "generated", "minified", "encoded data" or
+    "too large"), or None for a file to review.
+    """
+    if attributes:
+        if gitattribute(attributes, path, "linguist-generated"):
+            return "generated"
+        if gitattribute(attributes, path, "linguist-vendored"):
+            return "vendored"
+        if gitattribute(attributes, path, "diff") is False:
+            return "binary"
+        if gitattribute(attributes, path, "linguist-generated") is False:
+            return None
+    if posixpath.basename(path) in LOCKFILES:
+        return "lockfile"
+    if VENDORED.search(path):
+        return "vendored"
+    if GENERATED.search(path):
+        return "generated"
+
+    added = [line.text for hunk in hunks for line in hunk if line.kind == ADDED]
+    changed = len(added) + sum(1 for hunk in hunks for line in hunk if line.kind == REMOVED)
+    if hunks and hunks[0].new_start <= 1 and any(GENERATED_MARKERS.search(text) for text in added[:5]):
+        return "generated"
+    if added:
+        text = "\n".join(added)
+        if len(text) / len(added) > MINIFIED_LINE_LENGTH:
+            return "minified"
+        if len(text) >= ENTROPY_MIN_CHARS and _entropy(text) > ENTROPY_THRESHOLD:
+            return "encoded data"
+    if changed > MAX_CHANGED_LINES:
+        return "too large"
+    return None
+
+
+def _lockfile_changes(hunks: List[Hunk]) -> List[str]:
+    """
+    Lists "name old -> new" version changes of a TOML lockfile diff.
+    """
+    changes = []
+    for hunk in hunks:
+        name = old = None
+        for line in hunk:
+            name_match = LOCK_NAME.match(line.text)
+            if name_match and line.kind != REMOVED:
+                name, old = name_match.group(1), None
+                continue
+            version_match = LOCK_VERSION.match(line.text)
+            if version_match and name:
+                if line.kind == REMOVED:
+                    old = version_match.group(1)
+                elif line.kind == ADDED:
+                    changes.append(f"{name} {old or '(new)'} -> {version_match.group(1)}")
+                    name = None
+    return changes
+
+
+def summarize(path: str, hunks: List[Hunk], reason: str, limit: int = 10) -> str:
+    """
+    One line describing a skipped file, with the package version changes of a lockfile.
+    """
+    added = sum(len(hunk.added()) for hunk in hunks)
+    removed = sum(len(hunk.removed()) for hunk in hunks)
+    line = f"{path}: {reason}, {len(hunks)} hunk(s), +{added}/-{removed}, not reviewed"
+    if reason == "lockfile":
+        changes = _lockfile_changes(hunks)
+        if changes:
+            more = f", and {len(changes) - limit} more" if len(changes) > limit else ""
+            line += f" (updates {', '.join(changes[:limit])}{more})"
+    return line
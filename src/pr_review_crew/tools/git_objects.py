@@ -0,0 +1,204 @@
+import base64
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from pr_review_crew.tools import github_client
+from pr_review_crew.tools.blob_cache import get_blob_cache
+from pr_review_crew.tools.github_client import API_URL
+
+logger = logging.getLogger(__name__)
+
+# Blobs fetched in parallel by fetch_blobs()
+BLOB_WORKERS = int(os.getenv("GITHUB_BLOB_WORKERS", "8"))
+# The contents API and JSON blobs only carry files up to 1 MB; larger ones are fetched raw
+CONTENTS_API_LIMIT = 1024 * 1024
+RAW_CHUNK_BYTES = 256 * 1024
+
+
+class TreeEntry(NamedTuple):
+    path: str
+    sha: str
+    size: int
+    mode: str
+
+
+class Tree(NamedTuple):
+    sha: str
+    entries: List[TreeEntry]
+    truncated: bool
+    # Directories, only listed by non-recursive fetches
+    subtrees: Tuple[TreeEntry, ...] = ()
+
+
+def fetch_tree(repo: str, ref: str, recursive: bool = True) -> Optional[Tree]:
+    """
+    Returns the tree at ``ref`` (a ref or a tree SHA) with its files, or None
+    on failure. Without ``recursive`` only the top level is listed, with its
+    directories in ``subtrees``.
+    """
+    url = f"{API_URL}/repos/{repo}/git/trees/{ref}"
+    params = {"recursive": 1} if recursive else None
+    response = github_client.get(url, params=params, headers=github_client.auth_headers())
+    if response.status_code != 200:
+        logger.error(f"Failed to fetch the tree of {repo}@{ref}: {response.status_code} - {response.text}")
+        return None
+    data = response.json()
+    if data.get("truncated"):
+        logger.warning(f"The tree of {repo}@{ref} is truncated; some files are missing.")
+    entries = []
+    subtrees = []
+    for item in data.get("tree", []):
+        entry = TreeEntry(item["path"], item["sha"], item.get("size") or 0, item.get("mode", ""))
+        if item.get("type") == "blob":
+            entries.append(entry)
+        elif item.get("type") == "tree" and not recursive:
+            subtrees.append(entry)
+    return Tree(data["sha"], entries, bool(data.get("truncated")), tuple(subtrees))
+
+
+def fetch_complete_tree(repo: str, ref: str) -> Optional[Tree]:
+    """
+    Like fetch_tree(), but a truncated listing is completed by walking its
+    directories one by one. Returns None when any of them fails to list.
+    """
+    tree = fetch_tree(repo, ref)
+    if tree is None or not tree.truncated:
+        return tree
+    entries: List[TreeEntry] = []
+    pending = [("", tree.sha, False)]
+    while pending:
+        directory, sha, recursive = pending.pop()
+        listing = fetch_tree(repo, sha) if recursive else None
+        if listing is None or listing.truncated:
+            listing = fetch_tree(repo, sha, recursive=False)
+            if listing is None:
+                return None
+            pending.extend((f"{directory}{subtree.path}/", subtree.sha, True) for subtree in listing.subtrees)
+        entries.extend(entry._replace(path=directory + entry.path) for entry in listing.entries)
+    return Tree(tree.sha, entries, False)
+
+
+def resolve_commit(repo: str, ref: str) -> Optional[str]:
+    """
+    Returns the commit SHA a branch, tag or SHA points to, or None on failure.
+    """
+    url = f"{API_URL}/repos/{repo}/commits/{ref}"
+    response = github_client.get(url, headers=github_client.auth_headers(accept="application/vnd.github.sha"))
+    if response.status_code != 200:
+        logger.error(f"Failed to resolve {repo}@{ref}: {response.status_code} - {response.text}")
+        return None
+    return response.text.strip()
+
+
+def _fetch_raw_blob(repo: str, sha: str) -> Optional[bytes]:
+    url = f"{API_URL}/repos/{repo}/git/blobs/{sha}"
+    headers = github_client.auth_headers(accept="application/vnd.github.raw")
+    response = github_client.get(url, headers=headers, stream=True)
+    try:
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch blob {sha} of {repo}: {response.status_code} - {response.text}")
+            return None
+        content = bytearray()
+        for chunk in response.iter_content(chunk_size=RAW_CHUNK_BYTES):
+            content.extend(chunk)
+        return bytes(content)
+    finally:
+        response.close()
+
+
+def fetch_blob(repo: str, sha: str, size: int = 0) -> Optional[bytes]:
+    """
+    Returns the content of a blob, or None on failure.
+
+    Blobs are served from the blob cache when possible. Blobs above the
+    contents API limit are streamed raw instead of base64-encoded in JSON.
+    """
+    cache = get_blob_cache()
+    content = cache.get(sha) if cache is not None else None
+    if content is not None:
+        return content
+
+    if size > CONTENTS_API_LIMIT:
+        content = _fetch_raw_blob(repo, sha)
+    else:
+        url = f"{API_URL}/repos/{repo}/git/blobs/{sha}"
+        # Blobs never change, so revalidating them through the response cache is wasted space
+        response = github_client.get(url, headers=github_client.auth_headers(), use_cache=False)
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch blob {sha} of {repo}: {response.status_code} - {response.text}")
+            return None
+        data = response.json()
+        if data.get("encoding") == "base64":
+            content = base64.b64decode(data.get("content", ""))
+        else:
+            content = (data.get("content") or "").encode("utf-8")
+    if content is not None and cache is not None:
+        cache.put(sha, content)
+    return content
+
+
+def fetch_blobs(repo: str, shas: Iterable[str], max_workers: int = BLOB_WORKERS,
+                sizes: Optional[Dict[str, int]] = None) -> Dict[str, bytes]:
+    """
+    Fetches blobs concurrently. Blobs that failed are left out of the result.
+    """
+    unique = list(dict.fromkeys(shas))
+    if not unique:
+        return {}
+    sizes = sizes or {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique)))) as pool:
+        contents = pool.map(lambda sha: fetch_blob(repo, sha, sizes.get(sha, 0)), unique)
+        return {sha: content for sha, content in zip(unique, contents) if content is not None}
+
+
+def fetch_file(repo: str, path: str, ref: str) -> Optional[bytes]:
+    """
+    Returns a file through the contents API, or None when it does not exist.
+    Files above the API's size limit come without content and are fetched
+    as raw blobs.
+    """
+    url = f"{API_URL}/repos/{repo}/contents/{path}"
+    response = github_client.get(url, params={"ref": ref}, headers=github_client.auth_headers())
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise RuntimeError(f"Failed to download '{path}': {response.status_code} - {response.text}")
+    data = response.json()
+    if not isinstance(data, dict) or data.get("type") != "file":
+        return None
+    if data.get("encoding") == "base64" and data.get("content"):
+        content = base64.b64decode(data["content"])
+        cache = get_blob_cache()
+        if cache is not None and data.get("sha"):
+            cache.put(data["sha"], content)
+        return content
+    return fetch_blob(repo, data["sha"], max(data.get("size") or 0, CONTENTS_API_LIMIT + 1))
+
+
+def read_files(repo: str, ref: str, paths: List[str], max_workers: int = BLOB_WORKERS) -> Dict[str, Optional[bytes]]:
+    """
+    Reads many files of a ref: paths are resolved against one tree fetch and
+    the blobs missing from the blob cache are fetched concurrently. Paths
+    absent from the tree (e.g. a truncated one) go through the contents API.
+
+    Files that do not exist map to None; a failed fetch raises RuntimeError.
+    """
+    tree = fetch_tree(repo, ref)
+    entries = {entry.path: entry for entry in tree.entries} if tree is not None else {}
+    found = {path: entries[path] for path in paths if path in entries}
+    blobs = fetch_blobs(repo, [entry.sha for entry in found.values()], max_workers,
+                        sizes={entry.sha: entry.size for entry in found.values()})
+    failed = [path for path, entry in found.items() if entry.sha not in blobs]
+    if failed:
+        raise RuntimeError(f"Failed to download {len(failed)} file(s), e.g. '{failed[0]}'.")
+    result: Dict[str, Optional[bytes]] = {path: blobs[entry.sha] for path, entry in found.items()}
+
+    # A complete tree proves the other paths do not exist
+    unresolved = [path for path in paths if path not in found] if tree is None or tree.truncated else []
+    result.update((path, None) for path in paths if path not in found and path not in unresolved)
+    if unresolved:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unresolved)))) as pool:
+            result.update(zip(unresolved, pool.map(lambda path: fetch_file(repo, path, ref), unresolved)))
+    return result
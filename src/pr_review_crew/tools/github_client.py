@@ -0,0 +1,291 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pr_review_crew import tracing
+from pr_review_crew.tools import rate_limiter
+from pr_review_crew.tools.response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Base URL of the GitHub REST API (override for GitHub Enterprise or a local stand-in)
+API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("GITHUB_BACKOFF_FACTOR", "0.5"))
+BACKOFF_JITTER = float(os.getenv("GITHUB_BACKOFF_JITTER", "0.5"))
+POOL_CONNECTIONS = int(os.getenv("GITHUB_POOL_CONNECTIONS", "4"))
+POOL_MAXSIZE = int(os.getenv("GITHUB_POOL_MAXSIZE", "16"))
+# Pages fetched in parallel once the last page is known; 1 walks the "next" chain
+PAGE_WORKERS = int(os.getenv("GITHUB_PAGE_WORKERS", "4"))
+
+# Times a rate-limited (403/429 with Retry-After or an exhausted quota) request is retried
+RATE_LIMIT_RETRIES = int(os.getenv("GITHUB_RATE_LIMIT_RETRIES", "2"))
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+# Transient server errors worth retrying; 403/429 are left to the caller
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_adapter: Optional[HTTPAdapter] = None
+_lock = threading.Lock()
+
+
+def auth_headers(accept: str = "application/vnd.github.v3+json") -> dict:
+    """
+    Retrieve the GitHub headers required for API authentication.
+    """
+    github_token = os.getenv("GITHUB_TOKEN")
+    if not github_token:
+        raise ValueError("GITHUB_TOKEN environment variable not set.")
+    return {
+        "Authorization": f"token {github_token}",
+        "Accept": accept
+    }
+
+
+def _build_retry() -> Retry:
+    """
+    Builds the retry policy: jittered exponential backoff on connection
+    errors and 5xx responses. Non-idempotent methods (POST) are only
+    retried when the connection failed before the request was sent.
+    """
+    return Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide session, creating it on first use.
+    """
+    global _session, _adapter
+    if _session is None:
+        with _lock:
+            if _session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=_build_retry(),
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _adapter = adapter
+                _session = session
+    return _session
+
+
+def reset_session() -> None:
+    """
+    Closes the shared session so the next call starts with fresh pools.
+    """
+    global _session, _adapter
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _adapter = None
+
+
+def _forget_session() -> None:
+    # Sockets must not be shared with a forked child; drop them without closing.
+    global _session, _adapter, _lock
+    _session = None
+    _adapter = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_session)
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    Sends a request through the shared session with the configured timeouts.
+
+    Every request waits for a slot from the rate limit scheduler, writes
+    ahead of reads, and is retried once the scheduler's pause is over when
+    GitHub answers with a rate limit error. A rate limit response whose
+    pause exceeds the scheduler's ``max_wait`` is returned as is, and later
+    requests raise RateLimitExceeded until the pause is over.
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    write = method.upper() in WRITE_METHODS
+    with tracing.span("http", tracing.route_name(method, url), method=method.upper()) as current:
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            scheduler = rate_limiter.scheduler
+            with scheduler.slot(write):
+                response = get_session().request(method, url, timeout=timeout, **kwargs)
+            delay = scheduler.observe(response)
+            if delay is None or attempt == RATE_LIMIT_RETRIES or delay > scheduler.max_wait:
+                break
+            logger.warning(f"Rate limited on {method} {url}; retrying in {delay:.0f}s.")
+            response.close()
+        current.set(
+            status_code=response.status_code,
+            bytes=int(response.headers.get("Content-Length") or 0),
+            rate_limited_retries=attempt,
+        )
+        if response.status_code >= 400:
+            current.status = "error"
+    return response
+
+
+def get(url: str, params=None, headers=None, use_cache: bool = True, **kwargs):
+    """
+    Sends a GET, revalidating against the response cache when possible.
+
+    A cached response is replayed when GitHub answers ``304 Not Modified``,
+    which does not count against the rate limit.
+    """
+    cache = get_response_cache() if use_cache and not kwargs.get("stream") else None
+    if cache is None:
+        return request("GET", url, params=params, headers=headers, **kwargs)
+
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    key = cache.key(full_url, headers)
+    conditional = dict(headers or {})
+    conditional.update(cache.validators(key))
+    response = request("GET", full_url, headers=conditional, **kwargs)
+
+    if response.status_code == 304:
+        cached = cache.load(key, response.headers)
+        if cached is not None:
+            return cached
+        # Entry evicted between lookup and revalidation; fetch it unconditionally
+        response = request("GET", full_url, headers=headers, **kwargs)
+    cache.miss()
+    if response.status_code == 200:
+        cache.store(key, response)
+    return response
+
+
+def parse_link_header(link_header: str) -> dict:
+    """
+    Parses the Link header from GitHub API to get pagination URLs.
+    """
+    links = {}
+    for part in link_header.split(','):
+        section = part.strip().split(';')
+        if len(section) != 2:
+            continue
+        url_part = section[0].strip()[1:-1]
+        rel_part = section[1].strip().split('=')[1].strip('"')
+        links[rel_part] = url_part
+    return links
+
+
+def _page_urls(last_url: str) -> list:
+    """
+    Expands the "last" pagination URL into the URLs of pages 2..last.
+    """
+    parts = urlsplit(last_url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    last_page = int(query.get("page", ["1"])[0])
+    urls = []
+    for page in range(2, last_page + 1):
+        query["page"] = [str(page)]
+        urls.append(urlunsplit(parts._replace(query=urlencode(query, doseq=True))))
+    return urls
+
+
+def iter_pages(url: str, params=None, headers=None, max_workers: int = PAGE_WORKERS) -> Iterator:
+    """
+    Yields every page of a paginated GET, in order.
+
+    When the first response advertises a "last" relation the remaining
+    pages are fetched concurrently with at most ``max_workers`` requests
+    in flight; otherwise the "next" chain is followed one page at a time.
+    Iteration stops after the first non-200 response.
+    """
+    response = get(url, params=params, headers=headers)
+    yield response
+    if response.status_code != 200:
+        return
+
+    links = parse_link_header(response.headers.get("Link", ""))
+    if max_workers > 1 and "last" in links:
+        urls = _page_urls(links["last"])
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(urls) or 1)) as executor:
+            for page in executor.map(lambda page_url: get(page_url, headers=headers), urls):
+                yield page
+                if page.status_code != 200:
+                    return
+        return
+
+    while "next" in links:
+        response = get(links["next"], headers=headers)
+        yield response
+        if response.status_code != 200:
+            return
+        links = parse_link_header(response.headers.get("Link", ""))
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request("PUT", url, **kwargs)
+
+
+def pool_stats() -> dict:
+    """
+    Returns connection pool statistics keyed by "scheme://host:port".
+
+    ``connections`` counts TCP/TLS handshakes, ``requests`` counts requests
+    sent through the pool and ``idle`` the kept-alive connections ready
+    for reuse.
+    """
+    stats = {}
+    adapter = _adapter
+    if adapter is None:
+        return stats
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool else 0
+        connections = pool.num_connections
+        requests_sent = pool.num_requests
+        stats[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+            "connections": connections,
+            "requests": requests_sent,
+            "idle": idle,
+            "maxsize": pool.pool.maxsize if pool.pool else 0,
+            "reuse_ratio": round(1 - connections / requests_sent, 3) if requests_sent else 0.0,
+        }
+    return stats
+
+
+def log_pool_stats() -> None:
+    """
+    Logs a one-line summary per host of the current pool statistics.
+    """
+    for host, host_stats in pool_stats().items():
+        logger.info(
+            f"HTTP pool {host}: {host_stats['requests']} request(s) over "
+            f"{host_stats['connections']} connection(s), {host_stats['idle']} idle"
+        )
@@ -0,0 +1,191 @@
+import bisect
+import logging
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from pr_review_crew.tools.git_objects import TreeEntry, fetch_tree
+
+logger = logging.getLogger(__name__)
+
+# Trees kept indexed in memory, most recently used first
+PATH_INDEX_CACHE_SIZE = int(os.getenv("PATH_INDEX_CACHE_SIZE", "8"))
+LIST_FILES_PAGE_SIZE = int(os.getenv("LIST_FILES_PAGE_SIZE", "200"))
+
+# Sorts after any character of a path, to bound a prefix range
+_RANGE_END = "\U0010ffff"
+
+
+def glob_to_regex(pattern: str) -> "re.Pattern":
+    """
+    Compiles a path glob: ``*`` and ``?`` stay within a directory, ``**/``
+    matches any number of directories and ``[...]`` is a character class.
+    """
+    parts = []
+    position = 0
+    while position < len(pattern):
+        if pattern.startswith("**/", position):
+            parts.append("(?:.*/)?")
+            position += 3
+            continue
+        if pattern.startswith("**", position):
+            parts.append(".*")
+            position += 2
+            continue
+        char = pattern[position]
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and "]" in pattern[position + 2:]:
+            end = pattern.index("]", position + 2)
+            body = pattern[position + 1:end]
+            parts.append("[" + ("^" + body[1:] if body.startswith("!") else body).replace("\\", "\\\\") + "]")
+            position = end
+        else:
+            parts.append(re.escape(char))
+        position += 1
+    return re.compile("".join(parts) + r"\Z")
+
+
+def literal_prefix(pattern: str) -> str:
+    match = re.search(r"[*?\[]", pattern)
+    return pattern[:match.start()] if match else pattern
+
+
+class PathIndex:
+    """
+    Sorted file paths (with sizes) of one tree, queried by prefix range.
+
+    A truncated tree is indexed from its top level; the directories it
+    could not list are walked on demand, only when a query reaches them.
+    """
+
+    def __init__(self, repo: str, tree_sha: str):
+        self.repo = repo
+        self.tree_sha = tree_sha
+        self.paths: List[str] = []
+        self.sizes = array("q")
+        # Directories not walked yet, by path
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return not self._pending
+
+    def _insert(self, directory: str, entries: List[TreeEntry]) -> None:
+        prefix = f"{directory}/" if directory else ""
+        block = sorted((prefix + entry.path, entry.size) for entry in entries)
+        if not block:
+            return
+        # Paths of an unwalked directory are contiguous and absent so far
+        position = bisect.bisect_left(self.paths, block[0][0])
+        self.paths[position:position] = [path for path, _ in block]
+        self.sizes[position:position] = array("q", (size for _, size in block))
+
+    def _defer(self, directory: str, subtrees) -> None:
+        prefix = f"{directory}/" if directory else ""
+        for subtree in subtrees:
+            self._pending[prefix + subtree.path] = subtree.sha
+
+    def _walk(self, directory: str, sha: str) -> None:
+        tree = fetch_tree(self.repo, sha)
+        if tree is not None and not tree.truncated:
+            self._insert(directory, tree.entries)
+            return
+        tree = fetch_tree(self.repo, sha, recursive=False)
+        if tree is None:
+            raise RuntimeError(f"Failed to list '{directory}' of {self.repo}.")
+        self._insert(directory, tree.entries)
+        self._defer(directory, tree.subtrees)
+
+    def _expand(self, scope: str) -> None:
+        while True:
+            reached = [(directory, sha) for directory, sha in self._pending.items()
+                       if (directory + "/").startswith(scope) or scope.startswith(directory + "/")]
+            if not reached:
+                return
+            for directory, sha in reached:
+                del self._pending[directory]
+                self._walk(directory, sha)
+
+    def query(self, pattern: Optional[str] = None, prefix: str = "", extension: Optional[str] = None,
+              offset: int = 0, limit: int = LIST_FILES_PAGE_SIZE) -> Tuple[List[Tuple[str, int]], int]:
+        """
+        Returns a page of (path, size) matching all given filters, and the
+        total number of matches.
+        """
+        scope = prefix or ""
+        if pattern:
+            literal = literal_prefix(pattern)
+            if literal.startswith(scope):
+                scope = literal
+            elif not scope.startswith(literal):
+                return [], 0
+        regex = glob_to_regex(pattern) if pattern else None
+        suffix = ("." + extension.lstrip(".")) if extension else None
+
+        with self._lock:
+            if self._pending:
+                self._expand(scope)
+            low = bisect.bisect_left(self.paths, scope)
+            high = bisect.bisect_left(self.paths, scope + _RANGE_END, low)
+            if regex is None and suffix is None:
+                page = [(self.paths[index], self.sizes[index])
+                        for index in range(low + offset, min(high, low + offset + limit))]
+                return page, high - low
+            page = []
+            total = 0
+            for index in range(low, high):
+                path = self.paths[index]
+                if suffix and not path.endswith(suffix):
+                    continue
+                if regex and not regex.match(path):
+                    continue
+                if offset <= total < offset + limit:
+                    page.append((path, self.sizes[index]))
+                total += 1
+            return page, total
+
+
+_indexes: "OrderedDict[Tuple[str, str], PathIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_path_index(repo: str, ref: str) -> Optional[PathIndex]:
+    """
+    Returns the path index of the tree ``ref`` points to, or None on failure.
+
+    The top-level listing (a small, revalidated request) resolves the tree
+    SHA; the full tree is only fetched and sorted when that SHA is new.
+    """
+    root = fetch_tree(repo, ref, recursive=False)
+    if root is None:
+        return None
+    key = (repo, root.sha)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    index = PathIndex(repo, root.sha)
+    tree = fetch_tree(repo, root.sha)
+    if tree is None:
+        return None
+    if tree.truncated:
+        logger.info(f"The tree of {repo}@{ref} is truncated; its directories are listed on demand.")
+        index._insert("", root.entries)
+        index._defer("", root.subtrees)
+    else:
+        index._insert("", tree.entries)
+
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > PATH_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
@@ -1,15 +1,32 @@
-import zipfile
-from typing import Optional, List, Type
+import atexit
+import functools
+from typing import Dict, Optional, List, Set, Type
 from crewai_tools import tool, BaseTool
 from pydantic import BaseModel, Field
 
-import io
-import requests
 import json
 import logging
 import base64
 import os
 
+from pr_review_crew.tracing import traced_tool
+from pr_review_crew.tools import github_client
+from pr_review_crew.tools.github_client import API_URL
+from pr_review_crew.tools.diff_model import ADDED, REMOVED, DiffIndex, Hunk, iter_hunks
+from pr_review_crew.tools.diff_planner import ReviewChunk, plan_chunks
+from pr_review_crew.tools.file_classifier import SKIP_GENERATED, classify, parse_gitattributes, summarize
+from pr_review_crew.tools.git_objects import read_files
+from pr_review_crew.tools.path_index import LIST_FILES_PAGE_SIZE, get_path_index
+from pr_review_crew.tools.rate_limiter import RateLimitExceeded
+from pr_review_crew.tools.repo_archive import REPO_MAX_FILE_BYTES
+from pr_review_crew.tools.repo_mirror import RepoMirror
+from pr_review_crew.tools.static_checks import (
+    STATIC_CHECKS_ENABLED, STATIC_CHECKS_FLAGGED_ONLY, StaticReport, run_static_checks
+)
+from pr_review_crew.tools.symbol_index import SYMBOL_INDEX_ENABLED, get_symbol_index
+from pr_review_crew.tools.review_buffer import REVIEW_DRY_RUN_PATH, ReviewComment, review_buffer, write_dry_run
+from pr_review_crew.tools.review_state import HUNK_MEMO, HUNK_MEMO_MIN_LINES, INCREMENTAL, get_review_state
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,87 +46,384 @@ def get_headers() -> dict:
         "Accept": "application/vnd.github.v3.diff"
     }
 
-@tool("Fetch Changed Lines")
-def fetch_changed_lines(pr_number: int, file_path: Optional[str] = None) -> str:
+# Parsed diffs of the PRs fetched in this process, keyed by PR number
+_diff_indexes: Dict[int, DiffIndex] = {}
+
+def fetch_pr_head(pr_number: int) -> Optional[str]:
     """
-    Fetches the changed lines in a file or an entire PR.
+    Returns the head commit SHA of a PR, or None on failure.
     """
     headers = get_headers()
-    url = f"https://api.github.com/repos/{REPO}/pulls/{pr_number}/files"
+    url = f"{API_URL}/repos/{REPO}/pulls/{pr_number}"
+    response = github_client.get(url, headers=headers)
+    if response.status_code != 200:
+        logger.error(f"Failed to fetch PR #{pr_number}: {response.status_code} - {response.text}")
+        return None
+    return response.json().get('head', {}).get('sha')
+
+def _index_files(index: DiffIndex, files: List[dict]) -> None:
+    for file in files:
+        current_file_path = file.get('filename')
+        patch = file.get('patch')
+        if not patch:
+            logger.warning(f"No patch available for file: {current_file_path}")
+            continue
+        index.add_file(current_file_path, patch)
+
+def _load_pr_files(pr_number: int, index: DiffIndex) -> bool:
+    headers = get_headers()
+    url = f"{API_URL}/repos/{REPO}/pulls/{pr_number}/files"
     params = {"per_page": 100}
-    changed_lines = {}
 
+    for response in github_client.iter_pages(url, params=params, headers=headers):
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch PR files: {response.status_code} - {response.text}")
+            return False
+        _index_files(index, response.json())
+    return True
+
+def _load_compare_files(since_sha: str, head_sha: str, index: DiffIndex) -> bool:
+    headers = get_headers()
+    url = f"{API_URL}/repos/{REPO}/compare/{since_sha}...{head_sha}"
+    response = github_client.get(url, headers=headers)
+    if response.status_code != 200:
+        # e.g. the old head is gone after a force-push
+        logger.warning(f"Failed to compare {since_sha}...{head_sha}: {response.status_code}")
+        return False
+    _index_files(index, response.json().get('files', []))
+    return True
+
+def load_diff_index(pr_number: int, refresh: bool = False) -> Optional[DiffIndex]:
+    """
+    Fetches the patches of a PR into a DiffIndex. Returns None on failure.
+
+    When the PR was reviewed before, only the changes pushed since the
+    reviewed head SHA are loaded, minus hunks that were already reviewed.
+    """
+    if not refresh and pr_number in _diff_indexes:
+        return _diff_indexes[pr_number]
+
+    head_sha = fetch_pr_head(pr_number) if INCREMENTAL else None
+    since_sha = get_review_state().last_head(REPO, pr_number) if head_sha else None
+    index = DiffIndex(head_sha=head_sha, since_sha=since_sha)
+
+    if since_sha == head_sha and head_sha:
+        logger.info(f"PR #{pr_number} is unchanged since the last review at {head_sha[:7]}.")
+    elif not (since_sha and _load_compare_files(since_sha, head_sha, index)):
+        index = DiffIndex(head_sha=head_sha)
+        if not _load_pr_files(pr_number, index):
+            return None
+
+    if head_sha:
+        dropped = index.discard_hunks(get_review_state().reviewed_hunks(REPO, pr_number))
+        if dropped:
+            logger.info(f"Skipping {dropped} already reviewed hunk(s) of PR #{pr_number}.")
+    if SKIP_GENERATED and index.files():
+        _skip_generated_files(pr_number, index)
+    if HUNK_MEMO and index.files():
+        _answer_from_memo(pr_number, index)
+
+    _diff_indexes[pr_number] = index
+    return index
+
+def _skip_generated_files(pr_number: int, index: DiffIndex) -> None:
+    attributes = []
+    ref = index.head_sha or fetch_pr_head(pr_number)
+    if ref:
+        try:
+            content = read_files(REPO, ref, [".gitattributes"]).get(".gitattributes")
+            if content:
+                attributes = parse_gitattributes(content.decode("utf-8", errors="replace"))
+        except Exception as e:
+            logger.warning(f"Failed to read .gitattributes of PR #{pr_number}: {str(e)}")
+    for file_path in index.files():
+        hunks = index.hunks(file_path)
+        reason = classify(file_path, hunks, attributes)
+        if reason:
+            index.skip_file(file_path, summarize(file_path, hunks, reason))
+    if index.skipped:
+        logger.info(f"Skipping {len(index.skipped)} generated, vendored or lock file(s) of PR #{pr_number}.")
+
+def _memoizable(hunk: Hunk) -> bool:
+    return len(hunk) - sum(1 for line in hunk if line.kind not in (ADDED, REMOVED)) >= HUNK_MEMO_MIN_LINES
+
+def _answer_from_memo(pr_number: int, index: DiffIndex) -> None:
+    """
+    Drops the hunks whose change was already reviewed in another PR (e.g. a
+    cherry-pick or a rebased branch) and queues that review's comments again.
+    """
+    hashes = {hunk: hunk.content_hash(include_path=False) for hunk in index.all_hunks() if _memoizable(hunk)}
+    memo = get_review_state().memoized_hunks(REPO, pr_number, set(hashes.values()))
+    if not memo:
+        return
+    answered = index.drop(lambda hunk: hashes.get(hunk) in memo)
+    for hunk in answered:
+        source_pr, comments = memo[hashes[hunk]]
+        index.answered.append((hunk, source_pr))
+        lines = list(hunk)
+        for comment in comments:
+            offset = comment.get("offset")
+            line = lines[offset].new_lineno if offset is not None and offset < len(lines) else None
+            body = f"{comment['body']}\n\n_Same change as reviewed in PR #{source_pr}._"
+            review_buffer.add(pr_number, ReviewComment(path=hunk.file_path, body=body, line=line))
+    logger.info(f"Answered {len(answered)} hunk(s) of PR #{pr_number} from reviews of the same changes in other PRs.")
+
+# Suggestions anchored in each hunk, keyed by PR number, for the cross-PR hunk memo
+_hunk_comments: Dict[int, Dict[Hunk, List[dict]]] = {}
+# Line positions of each hunk the reviewer was shown, keyed by PR number; only fully read hunks are memoized
+_shown_lines: Dict[int, Dict[Hunk, Set[int]]] = {}
+
+def _mark_shown(pr_number: int, hunk: Hunk, start: int = 0, stop: Optional[int] = None) -> None:
+    stop = len(hunk) if stop is None else min(stop, len(hunk))
+    _shown_lines.setdefault(pr_number, {}).setdefault(hunk, set()).update(range(start, stop))
+
+def _fully_shown(pr_number: int, hunk: Hunk) -> bool:
+    return len(_shown_lines.get(pr_number, {}).get(hunk, ())) >= len(hunk)
+
+def record_review(pr_number: int) -> None:
+    """
+    Records the loaded diff of a PR as reviewed, so the next run only sees newer changes.
+    """
+    index = _diff_indexes.get(pr_number)
+    if index is None or not index.head_sha:
+        return
+    state = get_review_state()
+    state.record_review(REPO, pr_number, index.head_sha, [*index.all_hunks(), *(hunk for hunk, _ in index.answered)])
+    if HUNK_MEMO:
+        comments = _hunk_comments.get(pr_number, {})
+        state.memoize_hunks(REPO, pr_number, [
+            (hunk.content_hash(include_path=False), hunk.file_path, comments.get(hunk, []))
+            for hunk in index.all_hunks() if _memoizable(hunk) and _fully_shown(pr_number, hunk)
+        ])
+    logger.info(f"Recorded review of PR #{pr_number} at {index.head_sha[:7]}.")
+
+def forget_pr(pr_number: int) -> None:
+    """
+    Drops everything cached for a PR in this process, so its next review
+    (e.g. after a push, in a long-running daemon) starts from fresh data.
+    """
+    for cache in (_diff_indexes, _static_reports, _review_plans, _hunk_comments, _shown_lines):
+        cache.pop(pr_number, None)
+
+@tool("Fetch Changed Lines")
+@traced_tool
+def fetch_changed_lines(pr_number: int, file_path: Optional[str] = None) -> str:
+    """
+    Fetches the changed lines in a file or an entire PR.
+    Lists every changed file with its hunk count; use "Fetch Diff Hunk" to read a hunk.
+    """
     try:
-        while url:
-            response = requests.get(url, headers=headers, params=params)
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch PR files: {response.status_code} - {response.text}")
-                return "Failed to fetch PR files."
-
-            files = response.json()
-            for file in files:
-                current_file_path = file.get('filename')
-                if file_path and current_file_path != file_path:
-                    continue
-
-                patch = file.get('patch')
-                if not patch:
-                    logger.warning(f"No patch available for file: {current_file_path}")
-                    continue
-
-                added, removed = parse_patch(patch)
-                changed_lines[current_file_path] = {
-                    "added_lines": added,
-                    "removed_lines": removed
-                }
-
-            url = None if 'Link' not in response.headers else parse_link_header(response.headers['Link']).get('next')
-
-        if changed_lines:
-            return f"Fetched changed lines for PR #{pr_number}."
+        index = load_diff_index(pr_number)
+        if index is None:
+            return "Failed to fetch PR files."
+
+        if file_path:
+            if file_path in index.skipped:
+                return index.skipped[file_path]
+            if file_path not in index:
+                return "No changed lines found."
+            hunks = index.hunks(file_path)
+            for hunk in hunks:
+                _mark_shown(pr_number, hunk)
+            return f"Fetched changed lines for PR #{pr_number}.\n" + "\n\n".join(hunk.render() for hunk in hunks)
+
+        if index.since_sha == index.head_sha and index.head_sha:
+            return f"No changes since the last review of PR #{pr_number} at {index.head_sha[:7]}."
+        notes = ""
+        if index.skipped:
+            notes += "\nSkipped files:\n" + "\n".join(index.skipped.values())
+        if index.answered:
+            sources = sorted({source_pr for _, source_pr in index.answered})
+            notes += (f"\n{len(index.answered)} hunk(s) repeat changes already reviewed in PR "
+                      f"{', '.join(f'#{source_pr}' for source_pr in sources)}; their comments were reused.")
+        if index.files():
+            scope = f" since the last review at {index.since_sha[:7]}" if index.since_sha else ""
+            return f"Fetched changed lines for PR #{pr_number}{scope}.\n{index.summary()}{notes}"
         else:
-            return "No changed lines found."
+            return "No changed lines found." + notes
 
     except Exception as e:
         logger.error(f"An error occurred while fetching changed lines: {str(e)}")
         return "Error occurred while fetching changed lines."
 
+@tool("Fetch Diff Hunk")
+@traced_tool
+def fetch_diff_hunk(pr_number: int, file_path: str, hunk_index: int = 0) -> str:
+    """
+    Returns hunk N (0-based) of a file in a PR, with old and new line numbers.
+    """
+    try:
+        index = load_diff_index(pr_number)
+        if index is None:
+            return "Failed to fetch PR files."
+        hunk = index.hunk(file_path, hunk_index)
+        if hunk is None:
+            count = len(index.hunks(file_path))
+            return f"Hunk {hunk_index} not found in '{file_path}' ({count} hunk(s) available)."
+        _mark_shown(pr_number, hunk)
+        return hunk.render()
+    except Exception as e:
+        logger.error(f"An error occurred while fetching diff hunk: {str(e)}")
+        return "Error occurred while fetching diff hunk."
+
+# Static check reports keyed by PR number, together with the DiffIndex they were built from
+_static_reports: Dict[int, tuple] = {}
+
+def load_static_report(pr_number: int) -> Optional[StaticReport]:
+    """
+    Runs the static checks over the changed files of a PR. Returns None on failure.
+    """
+    index = load_diff_index(pr_number)
+    if index is None:
+        return None
+    report = _static_reports.get(pr_number)
+    if report is None or report[0] is not index:
+        ref = index.head_sha or fetch_pr_head(pr_number)
+        contents = {}
+        if ref:
+            try:
+                contents = read_files(REPO, ref, index.files())
+            except Exception as e:
+                # The added lines can still be checked without the full files
+                logger.warning(f"Failed to fetch the changed files of PR #{pr_number}: {str(e)}")
+        report = (index, run_static_checks(index, contents))
+        _static_reports[pr_number] = report
+    return report[1]
+
+# Review plans keyed by PR number, together with the DiffIndex they were built from
+_review_plans: Dict[int, tuple] = {}
+
+def load_review_plan(pr_number: int) -> Optional[List[ReviewChunk]]:
+    """
+    Splits the PR diff into token-budgeted chunks, riskiest first. Returns None on failure.
+
+    With the static checks on, only the hunks they flagged are planned.
+    """
+    index = load_diff_index(pr_number)
+    if index is None:
+        return None
+    plan = _review_plans.get(pr_number)
+    if plan is None or plan[0] is not index:
+        planned = index
+        if STATIC_CHECKS_ENABLED and STATIC_CHECKS_FLAGGED_ONLY:
+            report = load_static_report(pr_number)
+            if report is not None:
+                planned = index.filtered(report.is_flagged)
+        plan = (index, plan_chunks(planned))
+        _review_plans[pr_number] = plan
+    return plan[1]
+
+@tool("Run Static Checks")
+@traced_tool
+def static_checks(pr_number: int) -> str:
+    """
+    Runs fast deterministic checks (syntax, security, debugging leftovers) over the changed lines of a PR.
+    Lists each finding with its file, line and hunk; review the flagged hunks with "Plan Review".
+    """
+    try:
+        report = load_static_report(pr_number)
+        if report is None:
+            return "Failed to fetch PR files."
+        if not report.findings:
+            return f"Static checks found nothing in PR #{pr_number} ({report.total_hunks} hunk(s) checked)."
+        index = load_diff_index(pr_number)
+        lines = [f"Static checks of PR #{pr_number}: {report.summary()}."]
+        for finding in report.findings:
+            hunk = index.find(finding.path, finding.line)
+            lines.append(finding.render() + (f" (hunk {hunk.index})" if hunk is not None else ""))
+        return "\n".join(lines)
+    except Exception as e:
+        logger.error(f"An error occurred while running static checks: {str(e)}")
+        return "Error occurred while running static checks."
+
+@tool("Plan Review")
+@traced_tool
+def plan_review(pr_number: int) -> str:
+    """
+    Splits a PR diff into review chunks that fit the token budget, ordered by risk (highest first).
+    Review the chunks in this order with "Fetch Review Chunk".
+    """
+    try:
+        chunks = load_review_plan(pr_number)
+        if chunks is None:
+            return "Failed to fetch PR files."
+        if not chunks:
+            report = _static_reports.get(pr_number)
+            if report is not None and report[1].total_hunks:
+                return (f"The static checks flagged no hunk of PR #{pr_number} ({report[1].summary()}). "
+                        f"Read specific hunks with \"Fetch Diff Hunk\" if the PR description calls for it.")
+            return "No changed lines found."
+        return f"Review plan for PR #{pr_number}: {len(chunks)} chunk(s).\n" + "\n".join(chunk.describe() for chunk in chunks)
+    except Exception as e:
+        logger.error(f"An error occurred while planning the review: {str(e)}")
+        return "Error occurred while planning the review."
+
+@tool("Fetch Review Chunk")
+@traced_tool
+def fetch_review_chunk(pr_number: int, chunk_index: int = 0) -> str:
+    """
+    Returns review chunk N (0-based) of a PR, as planned by "Plan Review".
+    """
+    try:
+        chunks = load_review_plan(pr_number)
+        if chunks is None:
+            return "Failed to fetch PR files."
+        if not 0 <= chunk_index < len(chunks):
+            return f"Chunk {chunk_index} not found ({len(chunks)} chunk(s) available)."
+        chunk = chunks[chunk_index]
+        for hunk, start, stop in chunk.items:
+            _mark_shown(pr_number, hunk, start, stop)
+        report = _static_reports.get(pr_number)
+        findings = []
+        if report is not None:
+            for hunk in dict.fromkeys(hunk for hunk, _, _ in chunk.items):
+                findings += report[1].findings_for(hunk)
+        if not findings:
+            return chunk.render()
+        return chunk.render() + "\n\nStatic check findings:\n" + "\n".join(
+            finding.render() for finding in dict.fromkeys(findings)
+        )
+    except Exception as e:
+        logger.error(f"An error occurred while fetching review chunk: {str(e)}")
+        return "Error occurred while fetching review chunk."
+
 def parse_patch(patch: str) -> (List[str], List[str]):
     """
     Parses the patch text to extract added and removed lines.
     """
     added_lines = []
     removed_lines = []
-    lines = patch.splitlines()
-    for line in lines:
-        if line.startswith('+') and not line.startswith('+++'):
-            added_lines.append(line[1:].strip())
-        elif line.startswith('-') and not line.startswith('---'):
-            removed_lines.append(line[1:].strip())
+    for hunk in iter_hunks(patch):
+        for line in hunk:
+            if line.kind == ADDED:
+                added_lines.append(line.text.strip())
+            elif line.kind == REMOVED:
+                removed_lines.append(line.text.strip())
     return added_lines, removed_lines
 
-def parse_link_header(link_header: str) -> dict:
+def _rate_limited(func):
     """
-    Parses the Link header from GitHub API to get pagination URLs.
+    Decorator turning RateLimitExceeded into a message the agent can act on.
     """
-    links = {}
-    for part in link_header.split(','):
-        section = part.strip().split(';')
-        if len(section) != 2:
-            continue
-        url_part = section[0].strip()[1:-1]
-        rel_part = section[1].strip().split('=')[1].strip('"')
-        links[rel_part] = url_part
-    return links
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except RateLimitExceeded as e:
+            logger.error(f"{func.__name__} was rate limited: {str(e)}")
+            return f"GitHub rate limit reached; retry after {e.retry_after:.0f}s."
+    return wrapper
 
 @tool("Fetch Open PRs")
+@traced_tool
+@_rate_limited
 def fetch_open_prs() -> str:
     """
     Fetches and lists all open PRs from the specified GitHub repository.
     """
     headers = get_headers()
-    url = f"https://api.github.com/repos/{REPO}/pulls?state=open"
-    response = requests.get(url, headers=headers)
+    url = f"{API_URL}/repos/{REPO}/pulls?state=open"
+    response = github_client.get(url, headers=headers)
 
     if response.status_code == 200:
         prs = response.json()
@@ -121,19 +435,21 @@ def fetch_open_prs() -> str:
         return "Failed to fetch open PRs."
 
 @tool("Create Pull Request")
+@traced_tool
+@_rate_limited
 def create_pull_request(title: str, body: str, head: str, base: str = "main") -> str:
     """
     Creates a new pull request.
     """
     headers = get_headers()
-    url = f"https://api.github.com/repos/{REPO}/pulls"
+    url = f"{API_URL}/repos/{REPO}/pulls"
     data = {
         "title": title,
         "head": head,
         "base": base,
         "body": body
     }
-    response = requests.post(url, headers=headers, data=json.dumps(data))
+    response = github_client.post(url, headers=headers, data=json.dumps(data))
 
     if response.status_code == 201:
         pr = response.json()
@@ -144,33 +460,27 @@ def create_pull_request(title: str, body: str, head: str, base: str = "main") ->
         return "Failed to create pull request."
 
 @tool("Mark File as Reviewed")
+@traced_tool
 def mark_file_reviewed(pr_number: int, file_path: str) -> str:
     """
-    Marks a file as reviewed by the tool using GitHub's review API.
+    Marks a file as reviewed in the pending review of a PR (sent with "Submit Review").
     """
-    headers = get_headers()
-    url = f"https://api.github.com/repos/{REPO}/pulls/{pr_number}/comments"
-    comment_body = f"✅ The file `{file_path}` has been reviewed by the PR Review Tool."
-    data = {
-        "body": comment_body
-    }
-    response = requests.post(url, headers=headers, data=json.dumps(data))
-
-    if response.status_code in [200, 201]:
-        logger.info(f"Marked {file_path} as reviewed in PR #{pr_number}.")
-        return f"Marked {file_path} as reviewed in PR #{pr_number}."
-    else:
-        logger.error(f"Failed to mark file as reviewed: {response.status_code} - {response.text}")
-        return "Failed to mark file as reviewed."
+    comment = ReviewComment(path=file_path, body="✅ Reviewed by the PR Review Tool.")
+    if not review_buffer.add(pr_number, comment):
+        return f"{file_path} is already marked as reviewed in PR #{pr_number}."
+    logger.info(f"Marked {file_path} as reviewed in PR #{pr_number}.")
+    return f"Marked {file_path} as reviewed in PR #{pr_number}."
 
 @tool("Get PR Comments")
+@traced_tool
+@_rate_limited
 def get_pr_comments(pr_number: int) -> str:
     """
     Retrieves all comments on a specific PR.
     """
     headers = get_headers()
-    url = f"https://api.github.com/repos/{REPO}/issues/{pr_number}/comments"
-    response = requests.get(url, headers=headers)
+    url = f"{API_URL}/repos/{REPO}/issues/{pr_number}/comments"
+    response = github_client.get(url, headers=headers)
 
     if response.status_code == 200:
         comments = response.json()
@@ -182,34 +492,91 @@ def get_pr_comments(pr_number: int) -> str:
         return "Failed to fetch PR comments."
 
 @tool("Post Change Suggestion")
-def post_change_suggestion(pr_number: int, file_path: str, suggestion: str) -> str:
+@traced_tool
+def post_change_suggestion(pr_number: int, file_path: str, suggestion: str, line: Optional[int] = None) -> str:
+    """
+    Adds a suggestion for a change on a specific line of a file in a PR to the pending review.
+    Pass the new-file line number to anchor it; suggestions are sent with "Submit Review".
     """
-    Posts a suggestion for a change on a specific line of a file in a PR.
+    hunk = None
+    if line is not None:
+        index = load_diff_index(pr_number)
+        hunk = index.find(file_path, line) if index is not None else None
+        if hunk is None or hunk.line_at(line) is None:
+            logger.warning(f"Line {line} of '{file_path}' is not part of the PR #{pr_number} diff; posting unanchored.")
+            line = hunk = None
+
+    comment = ReviewComment(path=file_path, body=f"💡 **Suggestion:** {suggestion}", line=line)
+    if not review_buffer.add(pr_number, comment):
+        return f"An identical suggestion on '{file_path}' is already pending for PR #{pr_number}."
+    if hunk is not None:
+        offset = next(position for position, diff_line in enumerate(hunk) if diff_line.new_lineno == line)
+        _hunk_comments.setdefault(pr_number, {}).setdefault(hunk, []).append({"offset": offset, "body": comment.body})
+    logger.info(f"Queued change suggestion on '{file_path}' in PR #{pr_number}.")
+    return f"Queued change suggestion on '{file_path}' in PR #{pr_number}."
+
+@_rate_limited
+def submit_pending_review(pr_number: int, summary: str = "", dry_run_path: Optional[str] = REVIEW_DRY_RUN_PATH) -> str:
     """
+    Submits every pending comment of a PR as one pull request review,
+    pinned to the head its line anchors were checked against.
+    """
+    # The index the anchors were checked against, not one loaded from a newer head
+    index = _diff_indexes.get(pr_number)
+    payload = review_buffer.payload(pr_number, summary=summary, commit_id=index.head_sha if index else None)
+    if payload is None:
+        return f"No pending review comments for PR #{pr_number}."
+    count = len(review_buffer.pending(pr_number))
+
+    if dry_run_path:
+        write_dry_run(dry_run_path, pr_number, payload)
+        review_buffer.mark_flushed(pr_number)
+        logger.info(f"Wrote review with {count} comment(s) for PR #{pr_number} to '{dry_run_path}'.")
+        return f"Wrote review with {count} comment(s) for PR #{pr_number} to '{dry_run_path}' (dry run)."
+
     headers = get_headers()
-    comment_body = f"💡 **Suggestion:** {suggestion}"
-    url = f"https://api.github.com/repos/{REPO}/issues/{pr_number}/comments"
-    data = {
-        "body": comment_body
-    }
-    response = requests.post(url, headers=headers, data=json.dumps(data))
+    url = f"{API_URL}/repos/{REPO}/pulls/{pr_number}/reviews"
+    response = github_client.post(url, headers=headers, data=json.dumps(payload))
 
     if response.status_code in [200, 201]:
-        logger.info(f"Posted change suggestion on '{file_path}' in PR #{pr_number}.")
-        return f"Posted change suggestion on '{file_path}' in PR #{pr_number}."
+        review_buffer.mark_flushed(pr_number)
+        logger.info(f"Submitted review with {count} comment(s) on PR #{pr_number}.")
+        return f"Submitted review with {count} comment(s) on PR #{pr_number}."
     else:
-        logger.error(f"Failed to post change suggestion: {response.status_code} - {response.text}")
-        return "Failed to post change suggestion."
+        logger.error(f"Failed to submit review: {response.status_code} - {response.text}")
+        return "Failed to submit review."
+
+@tool("Submit Review")
+@traced_tool
+def submit_review(pr_number: int, summary: str = "") -> str:
+    """
+    Submits all pending suggestions and reviewed-file notes of a PR as a single review.
+    """
+    return submit_pending_review(pr_number, summary)
+
+def flush_pending_reviews() -> None:
+    """
+    Submits reviews that are still pending, so nothing is lost at exit.
+    """
+    for pr_number in review_buffer.pr_numbers():
+        try:
+            submit_pending_review(pr_number)
+        except Exception as e:
+            logger.error(f"Failed to flush pending review for PR #{pr_number}: {str(e)}")
+
+atexit.register(flush_pending_reviews)
 
 @tool("Create File")
+@traced_tool
+@_rate_limited
 def create_file(branch_name: str, file_path: str, content: str, commit_message: str) -> str:
     """
     Creates or updates a file in the repository.
     """
     headers = get_headers()
-    url = f"https://api.github.com/repos/{REPO}/contents/{file_path}"
+    url = f"{API_URL}/repos/{REPO}/contents/{file_path}"
     params = {"ref": branch_name}
-    response = requests.get(url, headers=headers, params=params)
+    response = github_client.get(url, headers=headers, params=params)
 
     if response.status_code == 200:
         sha = response.json().get('sha')
@@ -230,7 +597,7 @@ def create_file(branch_name: str, file_path: str, content: str, commit_message:
     if sha:
         data["sha"] = sha
 
-    response = requests.put(url, headers=headers, data=json.dumps(data))
+    response = github_client.put(url, headers=headers, data=json.dumps(data))
 
     if response.status_code in [200, 201]:
         logger.info(f"File '{file_path}' committed successfully on branch '{branch_name}'.")
@@ -240,6 +607,8 @@ def create_file(branch_name: str, file_path: str, content: str, commit_message:
         return "Failed to create/update file."
 
 @tool("Create Branch")
+@traced_tool
+@_rate_limited
 def create_branch(branch_name: str, base_branch: str = "main") -> str:
     """
     Creates a new branch from the base branch in the specified GitHub repository.
@@ -251,8 +620,8 @@ def create_branch(branch_name: str, base_branch: str = "main") -> str:
     headers = get_headers()
 
     # Get the SHA of the base branch's latest commit
-    base_branch_url = f"https://api.github.com/repos/{REPO}/git/ref/heads/{base_branch}"
-    response = requests.get(base_branch_url, headers=headers)
+    base_branch_url = f"{API_URL}/repos/{REPO}/git/ref/heads/{base_branch}"
+    response = github_client.get(base_branch_url, headers=headers)
     if response.status_code != 200:
         logger.error(f"Failed to fetch base branch: {response.status_code} - {response.text}")
         return "Failed to fetch base branch."
@@ -262,12 +631,12 @@ def create_branch(branch_name: str, base_branch: str = "main") -> str:
     logger.info(f"Base branch '{base_branch}' SHA: {sha}")
 
     # Create new branch reference
-    new_branch_url = f"https://api.github.com/repos/{REPO}/git/refs"
+    new_branch_url = f"{API_URL}/repos/{REPO}/git/refs"
     data = {
         "ref": f"refs/heads/{branch_name}",
         "sha": sha
     }
-    response = requests.post(new_branch_url, headers=headers, data=json.dumps(data))
+    response = github_client.post(new_branch_url, headers=headers, data=json.dumps(data))
 
     if response.status_code == 201:
         logger.info(f"Branch '{branch_name}' created successfully.")
@@ -294,79 +663,107 @@ def get_headers() -> dict:
 
 class ListFilesInRepoInput(BaseModel):
     branch: str = Field(default="main", description="The branch to list files from.")
+    pattern: Optional[str] = Field(default=None, description="Glob the paths must match, e.g. 'src/**/*.py'.")
+    prefix: Optional[str] = Field(default=None, description="Only list paths starting with this, e.g. 'src/api/'.")
+    extension: Optional[str] = Field(default=None, description="Only list files with this extension, e.g. 'py'.")
+    offset: int = Field(default=0, description="Number of matching paths to skip (for paging).")
+    limit: int = Field(default=LIST_FILES_PAGE_SIZE, description="Maximum number of paths to return.")
 
 # The main tool class
 class ListFilesInRepoTool(BaseTool):
     name: str = "List Files in Repo"
-    description: str = "Lists all files in the specified repository and branch."
+    description: str = (
+        "Lists files in the specified repository and branch, filtered by glob, prefix or extension, "
+        "one page at a time."
+    )
     args_schema: Type[BaseModel] = ListFilesInRepoInput
 
-    def _run(self, branch: str = "main") -> str:
+    @traced_tool
+    def _run(self, branch: str = "main", pattern: Optional[str] = None, prefix: Optional[str] = None,
+             extension: Optional[str] = None, offset: int = 0, limit: int = LIST_FILES_PAGE_SIZE) -> str:
         """
         Executes the tool to list files in the given branch.
         """
-        headers = get_headers()
-        url = f"https://api.github.com/repos/{REPO}/git/trees/{branch}?recursive=1"
-        print(f"URL: {url}")
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            files_data = response.json()
-            files = [file['path'] for file in files_data.get('tree', []) if file['type'] == 'blob']
-            if files:
-                logger.info(f"Files in repo '{REPO}' on branch '{branch}': {files}")
-                return "\n".join(files)
-            else:
-                return "No files found in the repository."
-        else:
-            logger.error(f"Failed to list files: {response.status_code} - {response.text}")
+        try:
+            index = get_path_index(REPO, branch)
+            if index is None:
+                return "Failed to list files in the repository."
+            page, total = index.query(pattern=pattern, prefix=prefix or "", extension=extension,
+                                      offset=max(offset, 0), limit=max(limit, 1))
+        except Exception as e:
+            logger.error(f"Failed to list files: {str(e)}")
             return "Failed to list files in the repository."
 
+        logger.info(f"Listed {len(page)} of {total} file(s) in '{REPO}' on branch '{branch}'.")
+        if not total:
+            return "No files found in the repository."
+        header = f"Files {offset + 1}-{offset + len(page)} of {total}"
+        if offset + len(page) < total:
+            header += f" (pass offset={offset + len(page)} for more)"
+        return header + ":\n" + "\n".join(path for path, _ in page)
+
 # Input schema for the DownloadFileFromRepoTool
 class DownloadFileFromRepoInput(BaseModel):
-    file_path: str = Field(..., description="The path of the file to download.")
+    file_path: str = Field(default="", description="The path of the file to download.")
     branch: str = Field(default="main", description="The branch to download the file from.")
+    file_paths: Optional[List[str]] = Field(default=None, description="Several paths to download at once.")
 
 # The main tool class
 class DownloadFileFromRepoTool(BaseTool):
     name: str = "Download File from Repo"
-    description: str = "Downloads a specific file from the repository and branch."
+    description: str = "Downloads one file, or several at once with file_paths, from the repository and branch."
     args_schema: Type[BaseModel] = DownloadFileFromRepoInput
 
-    def _run(self, file_path: str, branch: str = "main") -> str:
+    @traced_tool
+    def _run(self, file_path: str = "", branch: str = "main", file_paths: Optional[List[str]] = None) -> str:
         """
-        Executes the tool to download a file from the given branch.
+        Executes the tool to download files from the given branch; unchanged
+        files come from the blob cache.
         """
-        headers = get_headers()
-        url = f"https://api.github.com/repos/{REPO}/contents/{file_path}?ref={branch}"
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            file_data = response.json()
-            file_content = base64.b64decode(file_data['content']).decode('utf-8')
-            logger.info(f"Downloaded file '{file_path}' from branch '{branch}'.")
-            return file_content
-        elif response.status_code == 404:
-            logger.error(f"File '{file_path}' not found on branch '{branch}'.")
-            return f"File '{file_path}' not found on branch '{branch}'."
-        else:
-            logger.error(f"Failed to download file: {response.status_code} - {response.text}")
+        paths = list(dict.fromkeys([*(file_paths or []), *([file_path] if file_path else [])]))
+        if not paths:
+            return "No file path given."
+        try:
+            contents = read_files(REPO, branch, paths)
+        except Exception as e:
+            logger.error(f"Failed to download file: {str(e)}")
             return "Failed to download file."
 
+        sections = []
+        for path in paths:
+            content = contents.get(path)
+            if content is None:
+                logger.error(f"File '{path}' not found on branch '{branch}'.")
+                text = f"File '{path}' not found on branch '{branch}'."
+            else:
+                logger.info(f"Downloaded file '{path}' from branch '{branch}'.")
+                try:
+                    text = content.decode('utf-8')
+                except UnicodeDecodeError:
+                    text = f"Binary file '{path}' ({len(content)} bytes) not shown."
+            sections.append(text if len(paths) == 1 else f"=== {path} ===\n{text}")
+        return "\n\n".join(sections)
+
 # Input schema for the DownloadRepositoryTool
 class DownloadRepositoryInput(BaseModel):
     repo_url: str = Field(..., description="The URL of the GitHub repository to download.")
     branch: str = Field(default="main", description="The branch to download (default is 'main').")
+    include: Optional[List[str]] = Field(default=None, description="Only extract paths matching these globs, e.g. ['src/*.py'].")
+    exclude: Optional[List[str]] = Field(default=None, description="Extra globs of paths to skip; binaries and vendored code are always skipped.")
+    max_file_size: int = Field(default=REPO_MAX_FILE_BYTES, description="Skip files larger than this many bytes.")
 
 # The main tool class
 class DownloadRepositoryTool(BaseTool):
     name: str = "Download Repository"
-    description: str = "Downloads a GitHub repository as a zip file for a specified branch."
+    description: str = "Downloads a GitHub repository branch and extracts its source files to a local folder."
     args_schema: Type[BaseModel] = DownloadRepositoryInput
 
-    def _run(self, repo_url: str, branch: str = "main", local_path: str = "./repo.zip") -> str:
+    @traced_tool
+    def _run(self, repo_url: str, branch: str = "main", local_path: str = "./repo.zip",
+             include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+             max_file_size: int = REPO_MAX_FILE_BYTES) -> str:
         """
-        Executes the tool to download a repository as a zip file for the specified branch.
+        Executes the tool to download, or incrementally update, a local copy of the branch.
         """
         # Extract the owner and repo name from the repo URL
         try:
@@ -378,20 +775,24 @@ class DownloadRepositoryTool(BaseTool):
             logger.error(f"Failed to parse the repository URL: {str(e)}")
             return f"Failed to parse the repository URL: {str(e)}"
 
-        # GitHub API URL for downloading a zip archive of the repository
-        zip_url = f"https://api.github.com/repos/{owner}/{repo}/zipball/{branch}"
-        headers = get_headers()
-
+        mirror = RepoMirror(owner, repo, branch)
         try:
-            response = requests.get(zip_url, headers=headers, stream=True)
-            if response.status_code == 200:
-                with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                    z.extractall('/tmp/repo')
-                logger.info(f"Repository downloaded and extracted to '{'/tmp/repo'}'.")
-                return f"Repository downloaded and extracted to '{'/tmp/repo'}'."
+            result = mirror.sync(include=include, exclude=exclude, max_file_size=max_file_size)
+            if result["mode"] == "archive":
+                summary = f"downloaded ({result['files']} files, {result['skipped']} skipped)"
+            elif result["mode"] == "incremental":
+                summary = f"updated ({result['fetched']} files changed, {result['removed']} removed)"
             else:
-                logger.error(f"Failed to download repository: {response.status_code} - {response.text}")
-                return f"Failed to download repository: {response.status_code} - {response.text}"
+                summary = "already up to date"
+            if SYMBOL_INDEX_ENABLED:
+                try:
+                    index = get_symbol_index(mirror.path)
+                    index.refresh()
+                    summary += f", {index.stats()['symbols']} symbols indexed for 'Find Symbol'"
+                except Exception as e:
+                    logger.warning(f"Failed to index symbols of '{mirror.path}': {str(e)}")
+            logger.info(f"Repository at '{mirror.path}' {summary}.")
+            return f"Repository {summary} at '{mirror.path}'."
         except Exception as e:
             logger.error(f"An error occurred: {str(e)}")
             return f"An error occurred: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,229 @@
+import heapq
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+RATE = float(os.getenv("GITHUB_RATE", "10"))
+BURST = int(os.getenv("GITHUB_BURST", "20"))
+MAX_CONCURRENCY = int(os.getenv("GITHUB_MAX_CONCURRENCY", "8"))
+# Requests left in the window that only writes may use
+WRITE_RESERVE = int(os.getenv("GITHUB_WRITE_RESERVE", "50"))
+# Longest a request is held back waiting for the quota to reset, in seconds
+MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "300"))
+# Share of the quota left below which requests are paced to last until the reset
+LOW_WATERMARK = float(os.getenv("GITHUB_RATE_LOW_WATERMARK", "0.2"))
+MIN_RATE = 0.05
+
+WRITE = 0
+READ = 1
+
+
+class RateLimitExceeded(RuntimeError):
+    """
+    Raised instead of waiting longer than ``max_wait`` for GitHub's rate
+    limit to reset; ``retry_after`` is the number of seconds until it does.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitScheduler:
+    """
+    Token-bucket scheduler shared by every GitHub call of the process.
+
+    Requests wait in a priority queue where writes (comments, reviews,
+    commits) go ahead of reads. The refill rate and the number of requests
+    in flight shrink as ``X-RateLimit-Remaining`` runs down, reads stop
+    once only ``write_reserve`` requests are left, and ``Retry-After`` or
+    an exhausted quota pauses everyone until the given time. A pause longer
+    than ``max_wait`` is not waited out: requests (or, for the write
+    reserve, reads) fail fast until it is over.
+    """
+
+    def __init__(self, rate: float = RATE, burst: int = BURST, max_concurrency: int = MAX_CONCURRENCY,
+                 write_reserve: int = WRITE_RESERVE, max_wait: float = MAX_WAIT):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.write_reserve = write_reserve
+        self.max_wait = max_wait
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+
+    def current_rate(self) -> float:
+        """
+        Requests per second: the configured rate, or, once the quota runs
+        low, the remaining requests spread over the rest of the window.
+        """
+        if self.remaining is None or self.reset_at is None or not self.limit:
+            return self.rate
+        if self.remaining > self.limit * LOW_WATERMARK:
+            return self.rate
+        window = max(self.reset_at - time.time(), 1.0)
+        return max(min(self.rate, self.remaining / window), MIN_RATE)
+
+    def concurrency(self) -> int:
+        if self.remaining is None or not self.limit:
+            return self.max_concurrency
+        share = self.max_concurrency * self.remaining / self.limit
+        return max(1, min(self.max_concurrency, math.ceil(share)))
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.current_rate())
+        self._updated = now
+
+    def _wait_time(self, priority: int, now: float) -> Optional[float]:
+        """
+        Seconds the head of the queue still has to wait, 0 to go now, or
+        None to wait for a running request to finish. Raises
+        RateLimitExceeded for a read that would eat into the write reserve
+        with the reset further away than ``max_wait``.
+        """
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if priority == READ and self.remaining is not None and self.remaining <= self.write_reserve \
+                and self.reset_at is not None:
+            until_reset = self.reset_at - time.time()
+            if until_reset > self.max_wait:
+                raise RateLimitExceeded(
+                    f"Only the {self.write_reserve} GitHub requests kept for writes are left until the "
+                    f"reset in {until_reset:.0f}s, beyond the {self.max_wait:.0f}s wait limit.",
+                    until_reset,
+                )
+            if until_reset > 0:
+                return until_reset
+        if self._in_flight >= self.concurrency():
+            return None
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.current_rate()
+        return 0
+
+    @contextmanager
+    def slot(self, write: bool = False):
+        """
+        Holds one request slot for the duration of the block. Raises
+        RateLimitExceeded while GitHub's pause outlasts ``max_wait``.
+        """
+        priority = WRITE if write else READ
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            self._cond.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._blocked_until - now > self.max_wait:
+                        raise RateLimitExceeded(
+                            f"GitHub rate limit pause of {self._blocked_until - now:.0f}s exceeds "
+                            f"the {self.max_wait:.0f}s wait limit.",
+                            self._blocked_until - now,
+                        )
+                    self._refill(now)
+                    wait = self._wait_time(priority, now) if self._waiting[0] == entry else None
+                    if wait == 0:
+                        break
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            self._tokens -= 1
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def observe(self, response) -> Optional[float]:
+        """
+        Updates the budget from the rate limit headers of a response.
+
+        Returns the delay before a retry when the response was rate limited,
+        otherwise None.
+        """
+        headers = response.headers
+        resource = headers.get("X-RateLimit-Resource", "core")
+        delay = None
+        with self._cond:
+            if resource == "core" and "X-RateLimit-Remaining" in headers:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+                self.limit = int(headers.get("X-RateLimit-Limit", self.limit or 0)) or self.limit
+                if "X-RateLimit-Reset" in headers:
+                    self.reset_at = float(headers["X-RateLimit-Reset"])
+
+            if response.status_code in (403, 429):
+                retry_after = headers.get("Retry-After")
+                if retry_after is not None:
+                    delay = float(retry_after)
+                elif headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in headers:
+                    delay = max(float(headers["X-RateLimit-Reset"]) - time.time(), 1.0)
+                if delay is not None:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._cond.notify_all()
+        return delay
+
+    def stats(self) -> dict:
+        """
+        Returns the current budget and queue depth.
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            queued_writes = sum(1 for priority, _ in self._waiting if priority == WRITE)
+            return {
+                "remaining": self.remaining,
+                "limit": self.limit,
+                "reset_in": round(self.reset_at - time.time(), 1) if self.reset_at else None,
+                "tokens": round(self._tokens, 2),
+                "rate": round(self.current_rate(), 3),
+                "concurrency": self.concurrency(),
+                "in_flight": self._in_flight,
+                "queued_writes": queued_writes,
+                "queued_reads": len(self._waiting) - queued_writes,
+                "blocked_for": round(max(self._blocked_until - time.monotonic(), 0.0), 1),
+            }
+
+
+# Process-wide scheduler used by github_client
+scheduler = RateLimitScheduler()
+
+
+def _reset_scheduler() -> None:
+    # A forked child starts with its own, unlocked scheduler.
+    global scheduler
+    scheduler = RateLimitScheduler()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_scheduler)
+
+
+def stats() -> dict:
+    return scheduler.stats()
+
+
+def log_stats() -> None:
+    current = scheduler.stats()
+    logger.info(
+        f"GitHub budget: {current['remaining']}/{current['limit']} remaining, "
+        f"{current['in_flight']} in flight, {current['queued_writes']} write(s) and "
+        f"{current['queued_reads']} read(s) queued"
+    )
@@ -0,0 +1,90 @@
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+ToolFactory = Callable[[], Any]
+
+_factories: Dict[str, ToolFactory] = {}
+_instances: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def register(name: str, factory: ToolFactory) -> None:
+    """
+    Registers how to build a tool. Nothing is imported or constructed until
+    the tool is first requested with get_tool().
+    """
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def lazy_import(target: str, **kwargs) -> ToolFactory:
+    """
+    Factory building ``module:Class`` with ``kwargs``; values that are
+    callables are evaluated at build time (e.g. to read the environment).
+    """
+    module_name, attribute = target.split(":", 1)
+
+    def factory():
+        tool_class = getattr(importlib.import_module(module_name), attribute)
+        return tool_class(**{key: value() if callable(value) else value for key, value in kwargs.items()})
+
+    return factory
+
+
+def get_tool(name: str) -> Any:
+    """
+    Returns the process-wide instance of a registered tool, building it on
+    first use.
+    """
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+    with _lock:
+        instance = _instances.get(name)
+        if instance is None:
+            if name not in _factories:
+                raise KeyError(f"Unknown tool '{name}'. Registered tools: {', '.join(sorted(_factories))}")
+            started = time.perf_counter()
+            instance = _factories[name]()
+            _instances[name] = instance
+            logger.debug(f"Built tool '{name}' in {time.perf_counter() - started:.2f}s.")
+    return instance
+
+
+def get_tools(names: Iterable[str]) -> List[Any]:
+    return [get_tool(name) for name in names]
+
+
+def built() -> List[str]:
+    return sorted(_instances)
+
+
+def reset() -> None:
+    """
+    Drops the built instances; they are rebuilt on next use.
+    """
+    global _lock
+    _instances.clear()
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset)
+
+
+register("directory_read", lazy_import("crewai_tools:DirectoryReadTool"))
+register("file_read", lazy_import("crewai_tools:FileReadTool"))
+register("code_search", lazy_import("pr_review_crew.tools.code_search:CodeSearchTool"))
+register("find_symbol", lazy_import("pr_review_crew.tools.symbol_index:FindSymbolTool"))
+register("website_search", lazy_import("crewai_tools:WebsiteSearchTool"))
+register("code_interpreter", lazy_import("crewai_tools:CodeInterpreterTool"))
+register("clone_repo", lazy_import("pr_review_crew.tools.pr_review_tool:DownloadRepositoryTool"))
+register("list_files", lazy_import("pr_review_crew.tools.pr_review_tool:ListFilesInRepoTool"))
+register("download_file", lazy_import("pr_review_crew.tools.pr_review_tool:DownloadFileFromRepoTool"))
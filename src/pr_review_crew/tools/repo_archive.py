@@ -0,0 +1,132 @@
+import fnmatch
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import IO, Iterable, Optional, Tuple
+
+from pr_review_crew.tools import github_client
+
+logger = logging.getLogger(__name__)
+
+# Root of the per repository and ref extraction directories
+REPO_EXTRACT_DIR = os.getenv("REPO_EXTRACT_DIR", os.path.join(tempfile.gettempdir(), "pr_review_repos"))
+# Archives up to this size stay in memory while downloading, larger ones go to disk
+ARCHIVE_SPOOL_BYTES = int(os.getenv("REPO_ARCHIVE_SPOOL_BYTES", str(32 * 1024 * 1024)))
+ARCHIVE_CHUNK_BYTES = 1024 * 1024
+# Files larger than this are not extracted
+REPO_MAX_FILE_BYTES = int(os.getenv("REPO_MAX_FILE_BYTES", str(1024 * 1024)))
+PROGRESS_INTERVAL = 2.0
+
+# Paths no agent reads: binaries, dependencies and build output
+DEFAULT_EXCLUDES = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.ico", "*.pdf", "*.zip", "*.gz", "*.tar", "*.tgz", "*.jar",
+    "*.whl", "*.so", "*.dll", "*.dylib", "*.exe", "*.bin", "*.woff", "*.woff2", "*.ttf", "*.eot",
+    "*.mp3", "*.mp4", "*.mov", "*.pyc",
+    "node_modules/*", "*/node_modules/*", "vendor/*", "*/vendor/*", "dist/*", "build/*",
+    ".git/*", "*.min.js", "*.min.css", "*.map",
+]
+
+
+def extraction_dir(owner: str, repo: str, ref: str) -> str:
+    safe_ref = re.sub(r"[^A-Za-z0-9._-]", "_", ref)
+    return os.path.join(REPO_EXTRACT_DIR, f"{owner}__{repo}", safe_ref)
+
+
+def matches(path: str, include: Optional[Iterable[str]], exclude: Optional[Iterable[str]]) -> bool:
+    """
+    True when ``path`` matches one of the include globs (or there are none)
+    and none of the exclude globs. ``*`` also matches ``/``.
+    """
+    if include and not any(fnmatch.fnmatchcase(path, pattern) for pattern in include):
+        return False
+    return not (exclude and any(fnmatch.fnmatchcase(path, pattern) for pattern in exclude))
+
+
+def download_archive(url: str, headers: dict) -> Tuple[Optional[IO[bytes]], str]:
+    """
+    Streams an archive into a spooled temporary file in chunks.
+
+    Returns the file positioned at the start and an empty message, or None
+    and the error message.
+    """
+    response = github_client.get(url, headers=headers, stream=True)
+    if response.status_code != 200:
+        message = f"{response.status_code} - {response.text}"
+        response.close()
+        return None, message
+
+    total = int(response.headers.get("Content-Length") or 0)
+    archive = tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_BYTES)
+    received = 0
+    reported = time.monotonic()
+    try:
+        for chunk in response.iter_content(chunk_size=ARCHIVE_CHUNK_BYTES):
+            archive.write(chunk)
+            received += len(chunk)
+            if time.monotonic() - reported >= PROGRESS_INTERVAL:
+                reported = time.monotonic()
+                share = f" ({received / total:.0%})" if total else ""
+                logger.info(f"Downloaded {received / 1048576:.1f} MiB{share} of {url}")
+    except Exception:
+        archive.close()
+        raise
+    finally:
+        response.close()
+    logger.info(f"Downloaded {received / 1048576:.1f} MiB from {url}")
+    archive.seek(0)
+    return archive, ""
+
+
+def extract_archive(archive: IO[bytes], destination: str, include=None, exclude=None,
+                    max_file_size: int = REPO_MAX_FILE_BYTES) -> Tuple[int, int]:
+    """
+    Extracts the selected files of a GitHub zipball into ``destination``,
+    without the archive's top-level ``owner-repo-sha/`` directory.
+
+    Files are written to a sibling temporary directory that then replaces
+    ``destination``, so concurrent runs never see a half-extracted tree.
+    Returns the number of extracted and skipped files.
+    """
+    parent = os.path.dirname(destination)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".extract-", dir=parent)
+    root = os.path.realpath(staging)
+    extracted = skipped = 0
+    try:
+        with zipfile.ZipFile(archive) as zipped:
+            for member in zipped.infolist():
+                if member.is_dir():
+                    continue
+                path = member.filename.split("/", 1)[1] if "/" in member.filename else member.filename
+                if not path or member.file_size > max_file_size or not matches(path, include, exclude):
+                    skipped += 1
+                    continue
+                target = os.path.realpath(os.path.join(staging, path))
+                # Zip slip: never write outside the extraction directory
+                if not target.startswith(root + os.sep):
+                    logger.warning(f"Skipping archive entry outside the extraction directory: {member.filename}")
+                    skipped += 1
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zipped.open(member) as source, open(target, "wb") as output:
+                    shutil.copyfileobj(source, output, ARCHIVE_CHUNK_BYTES)
+                extracted += 1
+        _replace_dir(staging, destination)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return extracted, skipped
+
+
+def _replace_dir(source: str, destination: str) -> None:
+    previous = None
+    if os.path.exists(destination):
+        previous = tempfile.mkdtemp(prefix=".old-", dir=os.path.dirname(destination))
+        os.replace(destination, os.path.join(previous, "tree"))
+    os.replace(source, destination)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
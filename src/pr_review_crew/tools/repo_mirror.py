@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from pr_review_crew.tools import github_client
+from pr_review_crew.tools.github_client import API_URL
+from pr_review_crew.tools.git_objects import fetch_blobs, fetch_complete_tree, resolve_commit
+from pr_review_crew.tools.repo_archive import (
+    DEFAULT_EXCLUDES, REPO_MAX_FILE_BYTES, download_archive, extract_archive, extraction_dir, matches
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Above this many changed files one archive download is cheaper than fetching blobs
+MIRROR_MAX_BLOB_FETCHES = int(os.getenv("REPO_MIRROR_MAX_BLOB_FETCHES", "300"))
+
+EXECUTABLE_MODE = "100755"
+SYMLINK_MODE = "120000"
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+class RepoMirror:
+    """
+    Local working copy of a repository ref that is refreshed by tree diff.
+
+    A manifest next to the directory records the tree SHA and the blob SHA
+    of every file it holds. sync() compares it with the ref's current tree
+    and only fetches the blobs that changed; the first sync, or one with too
+    many changes, falls back to the zipball. A truncated tree listing is
+    completed directory by directory first, so no file is removed for being
+    cut off it.
+    """
+
+    def __init__(self, owner: str, repo: str, ref: str):
+        self.owner = owner
+        self.repo = repo
+        self.ref = ref
+        self.path = extraction_dir(owner, repo, ref)
+        self.manifest_path = f"{self.path}.manifest.json"
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.owner}/{self.repo}"
+
+    def _load_manifest(self) -> Optional[dict]:
+        if not os.path.isdir(self.path):
+            return None
+        try:
+            with open(self.manifest_path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, tree_sha: str, files: Dict[str, str]) -> None:
+        temporary = f"{self.manifest_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump({"tree": tree_sha, "synced_at": time.time(), "files": files}, handle)
+        os.replace(temporary, self.manifest_path)
+
+    def _lock(self):
+        with _locks_guard:
+            return _locks.setdefault(self.path, threading.Lock())
+
+    def sync(self, include=None, exclude=None, max_file_size: int = REPO_MAX_FILE_BYTES) -> dict:
+        """
+        Brings the working copy up to date with the ref. Returns what was
+        done; raises RuntimeError when GitHub could not be reached.
+        """
+        exclude = DEFAULT_EXCLUDES + list(exclude or [])
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock(), open(f"{self.path}.lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Tree and archive are both read at this commit, so a push in between cannot mix them
+            commit = resolve_commit(self.full_name, self.ref)
+            if commit is None:
+                raise RuntimeError(f"Failed to resolve {self.full_name}@{self.ref}.")
+            tree = fetch_complete_tree(self.full_name, commit)
+            if tree is None:
+                raise RuntimeError(f"Failed to fetch the tree of {self.full_name}@{self.ref}.")
+            tree_sha, entries = tree.sha, tree.entries
+            modes = {entry.path: entry.mode for entry in entries}
+            wanted = {
+                entry.path: entry.sha for entry in entries
+                if entry.mode != SYMLINK_MODE and entry.size <= max_file_size
+                and matches(entry.path, include, exclude)
+            }
+
+            manifest = self._load_manifest()
+            if manifest is None:
+                return self._download(commit, tree_sha, wanted, include, exclude, max_file_size, "no local copy")
+            current = manifest.get("files", {})
+            changed = {path: sha for path, sha in wanted.items() if current.get(path) != sha}
+            removed = [path for path in current if path not in wanted]
+            if not changed and not removed:
+                if manifest.get("tree") != tree_sha:
+                    self._save_manifest(tree_sha, wanted)
+                return {"mode": "unchanged", "tree": tree_sha, "files": len(wanted), "fetched": 0, "removed": 0}
+            if len(changed) > MIRROR_MAX_BLOB_FETCHES:
+                return self._download(commit, tree_sha, wanted, include, exclude, max_file_size,
+                                      f"{len(changed)} changed files")
+
+            contents = fetch_blobs(self.full_name, set(changed.values()),
+                                   sizes={entry.sha: entry.size for entry in entries})
+            missing = [path for path, sha in changed.items() if sha not in contents]
+            if missing:
+                raise RuntimeError(f"Failed to fetch {len(missing)} changed file(s), e.g. '{missing[0]}'.")
+            for path, sha in changed.items():
+                self._write(path, contents[sha], modes.get(path) == EXECUTABLE_MODE)
+            for path in removed:
+                self._remove(path)
+            self._save_manifest(tree_sha, wanted)
+
+        logger.info(
+            f"Synced {self.full_name}@{self.ref} to tree {tree_sha[:7]}: "
+            f"{len(changed)} file(s) fetched, {len(removed)} removed."
+        )
+        return {"mode": "incremental", "tree": tree_sha, "files": len(wanted),
+                "fetched": len(changed), "removed": len(removed)}
+
+    def _download(self, commit: str, tree_sha: str, wanted: Dict[str, str], include, exclude, max_file_size: int,
+                  reason: str) -> dict:
+        logger.info(f"Downloading the archive of {self.full_name}@{self.ref} ({reason}).")
+        url = f"{API_URL}/repos/{self.full_name}/zipball/{commit}"
+        archive, error = download_archive(url, github_client.auth_headers())
+        if archive is None:
+            raise RuntimeError(f"Failed to download repository: {error}")
+        with archive:
+            extracted, skipped = extract_archive(archive, self.path, include=include, exclude=exclude,
+                                                 max_file_size=max_file_size)
+        self._save_manifest(tree_sha, wanted)
+        return {"mode": "archive", "tree": tree_sha, "files": extracted, "skipped": skipped}
+
+    def _target(self, path: str) -> str:
+        root = os.path.realpath(self.path)
+        target = os.path.realpath(os.path.join(root, path))
+        if not target.startswith(root + os.sep):
+            raise RuntimeError(f"Refusing to write outside the mirror: {path}")
+        return target
+
+    def _write(self, path: str, content: bytes, executable: bool) -> None:
+        target = self._target(path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary = f"{target}.tmp-{os.getpid()}"
+        with open(temporary, "wb") as handle:
+            handle.write(content)
+        if executable:
+            os.chmod(temporary, 0o755)
+        os.replace(temporary, target)
+
+    def _remove(self, path: str) -> None:
+        target = self._target(path)
+        try:
+            os.remove(target)
+        except FileNotFoundError:
+            return
+        # Drop directories the removal left empty
+        directory = os.path.dirname(target)
+        root = os.path.realpath(self.path)
+        while directory != root and not os.listdir(directory):
+            os.rmdir(directory)
+            directory = os.path.dirname(directory)
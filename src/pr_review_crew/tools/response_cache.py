@@ -0,0 +1,245 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from pr_review_crew.storage import cache_path
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("GITHUB_CACHE", "1") != "0"
+CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Parsed JSON bodies kept in memory so a 304 skips the re-parse as well
+PARSED_MEMO_SIZE = int(os.getenv("GITHUB_CACHE_MEMO_SIZE", "256"))
+
+# Response headers worth replaying from the cache
+STORED_HEADERS = ("Content-Type", "Link", "ETag", "Last-Modified")
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for ``requests.Response`` served from the cache.
+
+    ``json()`` returns a shared, memoized object; callers must not mutate it.
+    """
+
+    from_cache = True
+    status_code = 200
+    ok = True
+    reason = "OK"
+
+    def __init__(self, url: str, headers: dict, content: bytes, parsed_loader):
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self._parsed_loader = parsed_loader
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return self._parsed_loader()
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+class ResponseCache:
+    """
+    On-disk ETag / Last-Modified cache for GET responses, bounded in size
+    with least-recently-used eviction.
+    """
+
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT,"
+            " headers TEXT, body BLOB, size INTEGER, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._conn.commit()
+        self._parsed = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(url: str, headers: Optional[dict]) -> str:
+        """
+        Cache key for a fully-qualified URL. The Accept header and the
+        credentials are part of the key since both change the response.
+        """
+        headers = headers or {}
+        auth = hashlib.sha256(headers.get("Authorization", "").encode("utf-8")).hexdigest()
+        raw = "\n".join([url, headers.get("Accept", ""), auth])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def validators(self, key: str) -> dict:
+        """
+        Returns the conditional request headers for a cached entry, if any.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return {}
+        etag, last_modified = row
+        if etag:
+            return {"If-None-Match": etag}
+        if last_modified:
+            return {"If-Modified-Since": last_modified}
+        return {}
+
+    def load(self, key: str, fresh_headers=None) -> Optional[CachedResponse]:
+        """
+        Serves a revalidated (304) entry and refreshes its LRU position.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, headers, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        url, etag, headers_json, body = row
+        headers = json.loads(headers_json)
+        # Rate limit headers of the 304 are current, the stored ones are not
+        for name, value in (fresh_headers or {}).items():
+            if name.lower().startswith("x-ratelimit"):
+                headers[name] = value
+        return CachedResponse(url, headers, body, lambda: self._parse(key, etag, body))
+
+    def store(self, key: str, response) -> None:
+        """
+        Stores a 200 response that carries an ETag or Last-Modified validator.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, etag, last_modified, json.dumps(headers), body, len(body), time.time()),
+            )
+            self.stores += 1
+            self._evict()
+            self._conn.commit()
+            self._parsed.pop(key, None)
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._parsed.pop(key, None)
+            total -= size
+            self.evictions += 1
+
+    def _parse(self, key: str, etag: Optional[str], body: bytes):
+        with self._lock:
+            memo = self._parsed.get(key)
+            if memo is not None and memo[0] == etag:
+                self._parsed.move_to_end(key)
+                return memo[1]
+        parsed = json.loads(body)
+        with self._lock:
+            self._parsed[key] = (etag, parsed)
+            while len(self._parsed) > PARSED_MEMO_SIZE:
+                self._parsed.popitem(last=False)
+        return parsed
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters together with the current on-disk footprint.
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide response cache, or None when disabled.
+    """
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(cache_path("http", "responses.sqlite3"))
+                atexit.register(log_stats)
+    return _cache
+
+
+def _forget_cache() -> None:
+    # A forked child must open its own SQLite connection.
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_cache)
+
+
+def stats() -> dict:
+    return _cache.stats() if _cache is not None else {}
+
+
+def log_stats() -> None:
+    """
+    Logs the cache counters for the operator.
+    """
+    if _cache is None or not (_cache.hits or _cache.misses):
+        return
+    current = _cache.stats()
+    logger.info(
+        f"GitHub response cache: {current['hits']} hit(s), {current['misses']} miss(es) "
+        f"({current['hit_rate']:.0%}), {current['entries']} entries / {current['bytes']} bytes"
+    )
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+# When set, flushed reviews are appended to this file instead of being posted
+REVIEW_DRY_RUN_PATH = os.getenv("REVIEW_DRY_RUN_PATH")
+
+
+class ReviewComment(NamedTuple):
+    path: str
+    body: str
+    line: Optional[int] = None
+    side: str = "RIGHT"
+
+    @property
+    def digest(self) -> str:
+        normalized = " ".join(self.body.split())
+        raw = "\0".join([self.path, str(self.line or ""), self.side, normalized])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReviewBuffer:
+    """
+    Collects review comments per PR so they can be submitted as a single
+    pull request review instead of one API write per comment.
+
+    Identical comments (same file, line, side and whitespace-normalized
+    body) are only kept once, including ones already flushed in this run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, ReviewComment]] = {}
+        self._flushed: Dict[int, set] = {}
+
+    def add(self, pr_number: int, comment: ReviewComment) -> bool:
+        """
+        Queues a comment. Returns False when it duplicates a known one.
+        """
+        digest = comment.digest
+        with self._lock:
+            pending = self._pending.setdefault(pr_number, {})
+            if digest in pending or digest in self._flushed.get(pr_number, ()):
+                return False
+            pending[digest] = comment
+            return True
+
+    def pending(self, pr_number: int) -> List[ReviewComment]:
+        with self._lock:
+            return list(self._pending.get(pr_number, {}).values())
+
+    def pr_numbers(self) -> List[int]:
+        with self._lock:
+            return [pr_number for pr_number, pending in self._pending.items() if pending]
+
+    def payload(self, pr_number: int, summary: str = "", event: str = "COMMENT",
+                commit_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Builds the body of ``POST /pulls/{n}/reviews`` from the pending comments.
+
+        Comments anchored to a diff line become inline review comments; the
+        rest are listed in the review body. Returns None when there is nothing
+        to submit.
+        """
+        comments = self.pending(pr_number)
+        inline = [
+            {"path": comment.path, "line": comment.line, "side": comment.side, "body": comment.body}
+            for comment in comments if comment.line
+        ]
+        notes = [f"- `{comment.path}`: {comment.body}" for comment in comments if not comment.line]
+        body = "\n".join(part for part in [summary, "\n".join(notes)] if part)
+        if not inline and not body:
+            return None
+        payload = {"event": event, "body": body, "comments": inline}
+        if commit_id:
+            payload["commit_id"] = commit_id
+        return payload
+
+    def mark_flushed(self, pr_number: int) -> int:
+        """
+        Drops the pending comments of a PR after a successful submission.
+        """
+        with self._lock:
+            pending = self._pending.pop(pr_number, {})
+            self._flushed.setdefault(pr_number, set()).update(pending)
+            return len(pending)
+
+
+def write_dry_run(path: str, pr_number: int, payload: dict) -> None:
+    """
+    Appends a review payload to a local JSON-lines file instead of posting it.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    record = {"pr_number": pr_number, "created_at": time.time(), "review": payload}
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(record) + "\n")
+
+
+# Process-wide buffer shared by the review tools
+review_buffer = ReviewBuffer()
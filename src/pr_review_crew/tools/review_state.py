@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pr_review_crew.storage import cache_path
+
+# Set to 0 to always review the full PR diff
+INCREMENTAL = os.getenv("REVIEW_INCREMENTAL", "1") != "0"
+# Set to 0 to review hunks again when the same change was reviewed in another PR
+HUNK_MEMO = os.getenv("REVIEW_HUNK_MEMO", "1") != "0"
+HUNK_MEMO_TTL = float(os.getenv("REVIEW_HUNK_MEMO_TTL", str(30 * 24 * 3600)))
+# Smaller hunks (e.g. a lone "return None") depend too much on their context to reuse a review
+HUNK_MEMO_MIN_LINES = int(os.getenv("REVIEW_HUNK_MEMO_MIN_LINES", "4"))
+
+
+class ReviewStateStore:
+    """
+    Remembers, per repository and PR, the head SHA of the last completed
+    review and the content hashes of the hunks it covered.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS reviews ("
+            " repo TEXT, pr_number INTEGER, head_sha TEXT, reviewed_at REAL,"
+            " PRIMARY KEY (repo, pr_number));"
+            "CREATE TABLE IF NOT EXISTS reviewed_hunks ("
+            " repo TEXT, pr_number INTEGER, path TEXT, hunk_hash TEXT, head_sha TEXT,"
+            " PRIMARY KEY (repo, pr_number, hunk_hash));"
+            "CREATE TABLE IF NOT EXISTS hunk_memo ("
+            " repo TEXT, change_hash TEXT, pr_number INTEGER, path TEXT, comments TEXT, reviewed_at REAL,"
+            " PRIMARY KEY (repo, change_hash));"
+        )
+
+    def last_head(self, repo: str, pr_number: int) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT head_sha FROM reviews WHERE repo = ? AND pr_number = ?", (repo, pr_number)
+            ).fetchone()
+        return row[0] if row else None
+
+    def reviewed_hunks(self, repo: str, pr_number: int) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hunk_hash FROM reviewed_hunks WHERE repo = ? AND pr_number = ?", (repo, pr_number)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def record_review(self, repo: str, pr_number: int, head_sha: str, hunks: Iterable = ()) -> None:
+        """
+        Records a completed review of ``head_sha`` and the hunks it covered.
+        """
+        rows = [(repo, pr_number, hunk.file_path, hunk.content_hash(), head_sha) for hunk in hunks]
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?)", (repo, pr_number, head_sha, time.time())
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO reviewed_hunks VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def memoized_hunks(self, repo: str, pr_number: int, change_hashes: Iterable[str],
+                       ttl: float = HUNK_MEMO_TTL) -> Dict[str, Tuple[int, List[dict]]]:
+        """
+        Returns the earlier reviews of the given path-independent hunk
+        hashes in PRs other than ``pr_number``, as ``{hash: (pr_number, comments)}``.
+        """
+        hashes = list(change_hashes)
+        found = {}
+        with self._lock:
+            for offset in range(0, len(hashes), 500):
+                batch = hashes[offset:offset + 500]
+                rows = self._conn.execute(
+                    f"SELECT change_hash, pr_number, comments FROM hunk_memo WHERE repo = ? AND reviewed_at > ?"
+                    f" AND pr_number != ? AND change_hash IN ({', '.join('?' * len(batch))})",
+                    (repo, time.time() - ttl, pr_number, *batch),
+                ).fetchall()
+                found.update((change_hash, (source_pr, json.loads(comments))) for change_hash, source_pr, comments in rows)
+        return found
+
+    def memoize_hunks(self, repo: str, pr_number: int, reviews: Iterable[Tuple[str, str, List[dict]]]) -> None:
+        """
+        Records the review comments of hunks as ``(change hash, path, comments)``,
+        an empty list meaning the hunk was reviewed without comments.
+        """
+        now = time.time()
+        rows = [(repo, change_hash, pr_number, path, json.dumps(comments), now)
+                for change_hash, path, comments in reviews]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO hunk_memo VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("DELETE FROM hunk_memo WHERE reviewed_at <= ?", (now - HUNK_MEMO_TTL,))
+            self._conn.commit()
+
+
+_store: Optional[ReviewStateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_review_state() -> ReviewStateStore:
+    """
+    Returns the process-wide review state store.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ReviewStateStore(cache_path("review_state.sqlite3"))
+    return _store
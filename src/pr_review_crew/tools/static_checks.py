@@ -0,0 +1,249 @@
+import ast
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from pr_review_crew.tools.diff_model import DiffIndex, Hunk
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10: TOML files get the line checks only
+    tomllib = None
+
+# Kept free of heavy imports: worker processes import this module only.
+
+logger = logging.getLogger(__name__)
+
+STATIC_CHECKS_ENABLED = os.getenv("STATIC_CHECKS", "1") != "0"
+# When set, "Plan Review" only plans the hunks the static checks flagged
+STATIC_CHECKS_FLAGGED_ONLY = os.getenv("STATIC_CHECKS_FLAGGED_ONLY", "1") != "0"
+STATIC_CHECKS_WORKERS = int(os.getenv("STATIC_CHECKS_WORKERS", str(os.cpu_count() or 2)))
+# Below this many files, a process pool costs more than it saves
+STATIC_CHECKS_PARALLEL_MIN_FILES = int(os.getenv("STATIC_CHECKS_PARALLEL_MIN_FILES", "32"))
+# Larger files only get the line checks of their added lines
+STATIC_CHECKS_MAX_FILE_BYTES = int(os.getenv("STATIC_CHECKS_MAX_FILE_BYTES", str(1024 * 1024)))
+START_METHOD = os.getenv("STATIC_CHECKS_START_METHOD", "spawn")
+MAX_LINE_LENGTH = int(os.getenv("STATIC_CHECKS_MAX_LINE_LENGTH", "120"))
+
+SEVERITIES = ("info", "warning", "error")
+# Findings at or above this severity flag their hunk for the reviewer
+FLAG_SEVERITY = os.getenv("STATIC_CHECKS_FLAG_SEVERITY", "warning")
+
+CODE_EXTENSIONS = (
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".mjs", ".go", ".java", ".kt", ".cs", ".scala", ".rb", ".rs",
+    ".php", ".c", ".h", ".cpp", ".hpp", ".sh", ".swift",
+)
+
+
+class Finding(NamedTuple):
+    path: str
+    line: int
+    rule: str
+    severity: str
+    message: str
+
+    def render(self) -> str:
+        return f"{self.path}:{self.line} [{self.severity}] {self.rule}: {self.message}"
+
+
+# (rule, severity, regex, message, extensions the rule applies to or None for all files)
+LINE_RULES = [
+    ("conflict-marker", "error", re.compile(r"^(<{7}|={7}|>{7})(\s|$)"), "Unresolved merge conflict marker.", None),
+    ("private-key", "error", re.compile(r"-----BEGIN (?:RSA |EC |DSA |OPENSSH )?PRIVATE KEY-----"),
+     "Private key committed.", None),
+    ("aws-access-key", "error", re.compile(r"\bAKIA[0-9A-Z]{16}\b"), "AWS access key ID committed.", None),
+    ("hardcoded-secret", "warning",
+     re.compile(r"""(?i)\b(?:password|passwd|secret|api_?key|access_?token|auth_?token)\b["']?\s*[:=]\s*["'][^"'\s]{8,}["']"""),
+     "Credential assigned from a string literal.", None),
+    ("debug-statement", "warning",
+     re.compile(r"\b(?:breakpoint\(\)|pdb\.set_trace\(\)|ipdb\.set_trace\(\))|\bdebugger;|\bconsole\.log\("),
+     "Debugging statement left in.", CODE_EXTENSIONS),
+    ("todo", "info", re.compile(r"\b(?:TODO|FIXME|XXX)\b"), "Unfinished work marker.", CODE_EXTENSIONS),
+]
+
+DESERIALIZERS = {("pickle", "loads"), ("pickle", "load"), ("marshal", "loads"), ("marshal", "load")}
+HTTP_METHODS = {"get", "post", "put", "patch", "delete", "head", "request"}
+
+
+def _call_name(node: ast.Call) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns (module or object name, function name) of a call such as
+    ``pickle.loads(...)``, or (None, name) of a plain ``name(...)``.
+    """
+    function = node.func
+    if isinstance(function, ast.Name):
+        return None, function.id
+    if isinstance(function, ast.Attribute):
+        owner = function.value.id if isinstance(function.value, ast.Name) else None
+        return owner, function.attr
+    return None, None
+
+
+def _keyword(node: ast.Call, name: str) -> Optional[ast.keyword]:
+    return next((keyword for keyword in node.keywords if keyword.arg == name), None)
+
+
+def _python_findings(source: str) -> List[Tuple[int, str, str, str]]:
+    """
+    AST checks of a Python file, as (line, rule, severity, message).
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        return [(e.lineno or 1, "syntax-error", "error", f"Python syntax error: {e.msg}.")]
+
+    findings = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ExceptHandler):
+            if node.type is None:
+                findings.append((node.lineno, "bare-except", "warning",
+                                 "Bare 'except:' also catches KeyboardInterrupt and SystemExit."))
+            if len(node.body) == 1 and isinstance(node.body[0], ast.Pass):
+                findings.append((node.lineno, "swallowed-exception", "info", "Exception silently ignored."))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+                mutable = isinstance(default, (ast.List, ast.Dict, ast.Set)) or (
+                    isinstance(default, ast.Call) and _call_name(default) in ((None, "list"), (None, "dict"), (None, "set"))
+                )
+                if mutable:
+                    findings.append((default.lineno, "mutable-default", "warning",
+                                     "Mutable default argument is shared between calls."))
+        elif isinstance(node, ast.Assert) and isinstance(node.test, ast.Tuple) and node.test.elts:
+            findings.append((node.lineno, "assert-tuple", "error", "Assertion on a tuple is always true."))
+        elif isinstance(node, ast.Compare):
+            for operator, comparator in zip(node.ops, node.comparators):
+                if isinstance(operator, (ast.Eq, ast.NotEq)) and isinstance(comparator, ast.Constant) \
+                        and comparator.value is None:
+                    findings.append((node.lineno, "compare-none", "info", "Compare with None using 'is'."))
+        elif isinstance(node, ast.Call):
+            owner, name = _call_name(node)
+            if owner is None and name in ("eval", "exec"):
+                findings.append((node.lineno, "eval-exec", "warning", f"'{name}' runs arbitrary code."))
+            elif (owner, name) in DESERIALIZERS:
+                findings.append((node.lineno, "unsafe-deserialization", "warning",
+                                 f"'{owner}.{name}' on untrusted data runs arbitrary code."))
+            elif (owner, name) == ("yaml", "load") and _keyword(node, "Loader") is None and len(node.args) < 2:
+                findings.append((node.lineno, "unsafe-deserialization", "warning",
+                                 "'yaml.load' without a Loader; use 'yaml.safe_load'."))
+            elif owner == "requests" and name in HTTP_METHODS and _keyword(node, "timeout") is None:
+                findings.append((node.lineno, "request-without-timeout", "warning",
+                                 f"'requests.{name}' without a timeout can hang forever."))
+            shell = _keyword(node, "shell")
+            if shell is not None and isinstance(shell.value, ast.Constant) and shell.value.value is True:
+                findings.append((node.lineno, "shell-true", "warning",
+                                 "'shell=True' is open to shell injection."))
+    return findings
+
+
+def _file_findings(path: str, source: str) -> List[Tuple[int, str, str, str]]:
+    if path.endswith(".py"):
+        return _python_findings(source)
+    try:
+        if path.endswith(".json"):
+            json.loads(source)
+        elif path.endswith(".toml") and tomllib is not None:
+            tomllib.loads(source)
+    except ValueError as e:
+        return [(getattr(e, "lineno", None) or 1, "syntax-error", "error", f"Invalid file: {e}.")]
+    return []
+
+
+def check_job(job: Tuple[str, Optional[str], List[Tuple[int, str]]]) -> Tuple[str, List[Finding]]:
+    """
+    Checks one changed file: ``(path, new content or None, added lines as
+    (line number, text))``. Only findings on added lines are reported,
+    except syntax errors, which break the whole file.
+    """
+    path, source, added = job
+    added_lines = {lineno for lineno, _ in added}
+    findings = []
+    for lineno, text in added:
+        for rule, severity, pattern, message, extensions in LINE_RULES:
+            if (extensions is None or path.endswith(extensions)) and pattern.search(text):
+                findings.append(Finding(path, lineno, rule, severity, message))
+        if path.endswith(CODE_EXTENSIONS) and len(text) > MAX_LINE_LENGTH:
+            findings.append(Finding(path, lineno, "long-line", "info",
+                                    f"Line is {len(text)} characters long (limit {MAX_LINE_LENGTH})."))
+    if source is not None:
+        for lineno, rule, severity, message in _file_findings(path, source):
+            if rule == "syntax-error" or lineno in added_lines:
+                findings.append(Finding(path, lineno, rule, severity, message))
+    return path, sorted(set(findings))
+
+
+class StaticReport:
+    """
+    Findings of the static checks of a PR diff and the hunks they flag.
+    """
+
+    def __init__(self, findings: List[Finding], index: DiffIndex, duration: float):
+        self.findings = findings
+        self.duration = duration
+        threshold = SEVERITIES.index(FLAG_SEVERITY) if FLAG_SEVERITY in SEVERITIES else 1
+        self._by_hunk: Dict[Tuple[str, int], List[Finding]] = {}
+        self.flagged: Set[Tuple[str, int]] = set()
+        self.total_hunks = 0
+        for file_path in index.files():
+            self.total_hunks += len(index.hunks(file_path))
+        for finding in findings:
+            hunk = index.find(finding.path, finding.line)
+            key = (finding.path, hunk.index if hunk is not None else -1)
+            self._by_hunk.setdefault(key, []).append(finding)
+            if SEVERITIES.index(finding.severity) >= threshold:
+                # A file-level error outside every hunk flags all hunks of the file
+                keys = [key] if hunk is not None else [(finding.path, h.index) for h in index.hunks(finding.path)]
+                self.flagged.update(keys)
+
+    def is_flagged(self, hunk: Hunk) -> bool:
+        return (hunk.file_path, hunk.index) in self.flagged
+
+    def findings_for(self, hunk: Hunk) -> List[Finding]:
+        return self._by_hunk.get((hunk.file_path, hunk.index), []) + self._by_hunk.get((hunk.file_path, -1), [])
+
+    def summary(self) -> str:
+        counts = {severity: 0 for severity in SEVERITIES}
+        for finding in self.findings:
+            counts[finding.severity] += 1
+        return (f"{len(self.findings)} finding(s) ({counts['error']} error, {counts['warning']} warning, "
+                f"{counts['info']} info); {len(self.flagged)} of {self.total_hunks} hunk(s) flagged")
+
+
+def run_static_checks(index: DiffIndex, contents: Dict[str, bytes],
+                      max_workers: int = STATIC_CHECKS_WORKERS) -> StaticReport:
+    """
+    Runs the static checks over every changed file of ``index``, in a
+    process pool when there are enough files and the current process may
+    have children (daemonic ones, like the fan_out workers, may not).
+    ``contents`` holds the new content of the files; files missing from it
+    are checked line by line.
+    """
+    started = time.monotonic()
+    jobs = []
+    for file_path in index.files():
+        added = [(line.new_lineno, line.text) for hunk in index.hunks(file_path) for line in hunk.added()]
+        content = contents.get(file_path)
+        source = None
+        if content is not None and len(content) <= STATIC_CHECKS_MAX_FILE_BYTES:
+            try:
+                source = content.decode("utf-8")
+            except UnicodeDecodeError:
+                pass
+        jobs.append((file_path, source, added))
+
+    if len(jobs) >= STATIC_CHECKS_PARALLEL_MIN_FILES and max_workers > 1 \
+            and not multiprocessing.current_process().daemon:
+        context = multiprocessing.get_context(START_METHOD)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            results = list(pool.map(check_job, jobs, chunksize=max(1, len(jobs) // (max_workers * 4))))
+    else:
+        results = [check_job(job) for job in jobs]
+
+    findings = [finding for _, file_findings in results for finding in file_findings]
+    report = StaticReport(findings, index, time.monotonic() - started)
+    logger.info(f"Static checks of {len(jobs)} file(s) in {report.duration:.2f}s: {report.summary()}.")
+    return report
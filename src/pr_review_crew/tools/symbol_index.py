@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Type
+
+from crewai_tools import BaseTool
+from pydantic import BaseModel, Field
+
+from pr_review_crew.storage import cache_path
+from pr_review_crew.tools.repo_archive import extraction_dir
+from pr_review_crew.tools.symbol_parser import SOURCE_EXTENSIONS, parse_job
+from pr_review_crew.tracing import traced_tool
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_INDEX_ENABLED = os.getenv("SYMBOL_INDEX", "1") != "0"
+SYMBOL_WORKERS = int(os.getenv("SYMBOL_INDEX_WORKERS", str(os.cpu_count() or 2)))
+# Below this many files to parse, a process pool costs more than it saves
+SYMBOL_PARALLEL_MIN_FILES = int(os.getenv("SYMBOL_INDEX_PARALLEL_MIN_FILES", "64"))
+SYMBOL_MAX_FILE_BYTES = int(os.getenv("SYMBOL_INDEX_MAX_FILE_BYTES", str(512 * 1024)))
+START_METHOD = os.getenv("SYMBOL_INDEX_START_METHOD", "spawn")
+MAX_RESULTS = 50
+
+
+class SymbolIndex:
+    """
+    Persistent index of the definitions and references in a directory.
+
+    refresh() only re-parses files whose size or modification time changed
+    and whose content hash differs from the indexed one.
+    """
+
+    def __init__(self, root: str, path: Optional[str] = None):
+        self.root = os.path.realpath(root)
+        digest = hashlib.sha1(self.root.encode("utf-8")).hexdigest()[:16]
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path("symbols", f"{digest}.sqlite3"), check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, hash TEXT, size INTEGER, mtime REAL);"
+            "CREATE TABLE IF NOT EXISTS symbols (path TEXT, name TEXT, kind TEXT, line INTEGER, parent TEXT);"
+            "CREATE TABLE IF NOT EXISTS refs (path TEXT, name TEXT, kind TEXT, line INTEGER);"
+            "CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);"
+            "CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);"
+            "CREATE INDEX IF NOT EXISTS refs_name ON refs (name);"
+            "CREATE INDEX IF NOT EXISTS refs_path ON refs (path);"
+        )
+        self._conn.commit()
+
+    def _scan(self) -> Dict[str, Tuple[int, float]]:
+        found = {}
+        for directory, subdirectories, files in os.walk(self.root):
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+            for name in files:
+                if not name.endswith(SOURCE_EXTENSIONS):
+                    continue
+                full_path = os.path.join(directory, name)
+                stat = os.stat(full_path)
+                if stat.st_size <= SYMBOL_MAX_FILE_BYTES:
+                    found[os.path.relpath(full_path, self.root)] = (stat.st_size, stat.st_mtime)
+        return found
+
+    def refresh(self, max_workers: int = SYMBOL_WORKERS) -> dict:
+        """
+        Brings the index up to date with the directory and returns counts of
+        parsed, unchanged and removed files.
+        """
+        started = time.monotonic()
+        with self._lock:
+            current = self._scan()
+            indexed = {path: (size, mtime, digest) for path, digest, size, mtime in
+                       self._conn.execute("SELECT path, hash, size, mtime FROM files")}
+            candidates = [path for path, stat in current.items()
+                          if path not in indexed or indexed[path][:2] != stat]
+            removed = [path for path in indexed if path not in current]
+
+            jobs = [(self.root, path, indexed[path][2] if path in indexed else None) for path in candidates]
+            # Daemonic processes, like the fan_out review workers, may not start a pool
+            if len(jobs) >= SYMBOL_PARALLEL_MIN_FILES and max_workers > 1 \
+                    and not multiprocessing.current_process().daemon:
+                context = multiprocessing.get_context(START_METHOD)
+                with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+                    results = list(pool.map(parse_job, jobs, chunksize=max(1, len(jobs) // (max_workers * 4))))
+            else:
+                results = [parse_job(job) for job in jobs]
+
+            parsed = 0
+            for path, digest, symbols, references in results:
+                size, mtime = current[path]
+                if symbols is not None:
+                    self._delete(path)
+                    self._conn.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?)",
+                                           [(path, *symbol) for symbol in symbols])
+                    self._conn.executemany("INSERT INTO refs VALUES (?, ?, ?, ?)",
+                                           [(path, *reference) for reference in references])
+                    parsed += 1
+                self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (path, digest, size, mtime))
+            for path in removed:
+                self._delete(path)
+                self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            self._conn.commit()
+
+        counts = {"parsed": parsed, "unchanged": len(current) - parsed, "removed": len(removed)}
+        if parsed or removed:
+            logger.info(f"Symbol index of {self.root}: {parsed} file(s) parsed, {len(removed)} removed "
+                        f"in {time.monotonic() - started:.1f}s.")
+        return counts
+
+    def _delete(self, path: str) -> None:
+        self._conn.execute("DELETE FROM symbols WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM refs WHERE path = ?", (path,))
+
+    def definitions(self, name: str, limit: int = MAX_RESULTS) -> List[tuple]:
+        parent, _, name = name.rpartition(".")
+        query = "SELECT path, line, kind, parent FROM symbols WHERE name = ?"
+        params: list = [name]
+        if parent:
+            query += " AND parent = ?"
+            params.append(parent.rsplit(".", 1)[-1])
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY path, line LIMIT ?", (*params, limit)).fetchall()
+
+    def references(self, name: str, limit: int = MAX_RESULTS) -> List[tuple]:
+        name = name.rsplit(".", 1)[-1]
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, line, kind FROM refs WHERE name = ? ORDER BY path, line LIMIT ?", (name, limit)
+            ).fetchall()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    for table in ("files", "symbols", "refs")}
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: str) -> SymbolIndex:
+    key = os.path.realpath(root)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SymbolIndex(key)
+        return _indexes[key]
+
+
+def _forget_indexes() -> None:
+    # A forked child must open its own SQLite connections.
+    global _indexes_lock
+    _indexes.clear()
+    _indexes_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_indexes)
+
+
+class FindSymbolInput(BaseModel):
+    name: str = Field(..., description="Symbol to look up, e.g. 'load_diff_index' or 'DiffIndex.hunks'.")
+    branch: str = Field(default="main", description="Branch of the downloaded repository to search.")
+    repo_path: Optional[str] = Field(default=None, description="Local repository folder, if not the downloaded one.")
+
+
+class FindSymbolTool(BaseTool):
+    name: str = "Find Symbol"
+    description: str = (
+        "Looks up where a function, class or variable is defined and where it is called or imported "
+        "in the downloaded repository. Run 'Download Repository' first."
+    )
+    args_schema: Type[BaseModel] = FindSymbolInput
+
+    @traced_tool
+    def _run(self, name: str, branch: str = "main", repo_path: Optional[str] = None) -> str:
+        """
+        Refreshes the symbol index of the repository folder and looks up the name.
+        """
+        if not repo_path:
+            owner, _, repo = (os.getenv("REPO") or "/").partition("/")
+            repo_path = extraction_dir(owner, repo, branch)
+        if not os.path.isdir(repo_path):
+            return f"No repository at '{repo_path}'; download it first."
+        try:
+            index = get_symbol_index(repo_path)
+            index.refresh()
+            definitions = index.definitions(name)
+            references = index.references(name)
+        except Exception as e:
+            logger.error(f"Symbol lookup failed: {str(e)}")
+            return f"Symbol lookup failed: {str(e)}"
+
+        if not definitions and not references:
+            return f"No definition or reference of '{name}' found."
+        lines = [f"Definitions of '{name}':"]
+        lines += [f"  {path}:{line} {kind}" + (f" in {parent}" if parent else "")
+                  for path, line, kind, parent in definitions] or ["  none found"]
+        lines.append(f"References to '{name}':")
+        lines += [f"  {path}:{line} {kind}" for path, line, kind in references] or ["  none found"]
+        if len(references) == MAX_RESULTS:
+            lines.append(f"  (first {MAX_RESULTS} shown)")
+        return "\n".join(lines)
@@ -0,0 +1,135 @@
+import ast
+import hashlib
+import os
+import re
+from typing import List, Optional, Tuple
+
+# Kept free of heavy imports: worker processes import this module only.
+
+# (definition regex, kind) per extension for languages without a parser here
+REGEX_DEFINITIONS = {
+    (".js", ".jsx", ".ts", ".tsx", ".mjs"): [
+        (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)", re.M), "function"),
+        (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)", re.M), "class"),
+        (re.compile(r"^\s*(?:export\s+)?(?:interface|type|enum)\s+([A-Za-z_$][\w$]*)", re.M), "type"),
+        (re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s*)?(?:\([^)]*\)|[A-Za-z_$][\w$]*)\s*=>", re.M), "function"),
+    ],
+    (".go",): [
+        (re.compile(r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)", re.M), "function"),
+        (re.compile(r"^type\s+([A-Za-z_]\w*)", re.M), "type"),
+    ],
+    (".java", ".kt", ".cs", ".scala"): [
+        (re.compile(r"^\s*(?:[\w@]+\s+)*(?:class|interface|enum|record|object)\s+([A-Za-z_]\w*)", re.M), "class"),
+        (re.compile(r"^\s*(?:(?:public|private|protected|static|final|abstract|override|suspend|fun)\s+)+[\w<>\[\], ?]*?\b([A-Za-z_]\w*)\s*\(", re.M), "method"),
+    ],
+    (".rb",): [
+        (re.compile(r"^\s*def\s+(?:self\.)?([A-Za-z_]\w*[?!=]?)", re.M), "method"),
+        (re.compile(r"^\s*(?:class|module)\s+([A-Z]\w*)", re.M), "class"),
+    ],
+    (".rs",): [
+        (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?fn\s+([A-Za-z_]\w*)", re.M), "function"),
+        (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|type)\s+([A-Za-z_]\w*)", re.M), "type"),
+    ],
+}
+REGEX_CALL = re.compile(r"\b([A-Za-z_$][\w$]*)\s*\(")
+CALL_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "function", "fn", "func", "def", "class",
+                 "new", "typeof", "sizeof", "super", "match", "elif", "and", "or", "not", "in", "print"}
+
+SOURCE_EXTENSIONS = (".py",) + tuple(extension for extensions in REGEX_DEFINITIONS for extension in extensions)
+
+# (name, kind, line, parent) and (name, kind, line)
+Symbol = Tuple[str, str, int, str]
+Reference = Tuple[str, str, int]
+
+
+def _python_symbols(source: str) -> Tuple[List[Symbol], List[Reference]]:
+    tree = ast.parse(source)
+    symbols: List[Symbol] = []
+    references: List[Reference] = []
+
+    def visit(node, parent: str, in_class: bool = False) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                symbols.append((child.name, "method" if in_class else "function", child.lineno, parent))
+                visit(child, child.name)
+            elif isinstance(child, ast.ClassDef):
+                symbols.append((child.name, "class", child.lineno, parent))
+                for base in child.bases:
+                    name = base.attr if isinstance(base, ast.Attribute) else getattr(base, "id", None)
+                    if name:
+                        references.append((name, "base", base.lineno))
+                visit(child, child.name, in_class=True)
+            elif isinstance(child, (ast.Assign, ast.AnnAssign)) and not parent:
+                targets = child.targets if isinstance(child, ast.Assign) else [child.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        symbols.append((target.id, "variable", child.lineno, parent))
+                visit(child, parent, in_class)
+            else:
+                if isinstance(child, ast.Call):
+                    function = child.func
+                    name = function.attr if isinstance(function, ast.Attribute) else getattr(function, "id", None)
+                    if name:
+                        references.append((name, "call", child.lineno))
+                elif isinstance(child, (ast.Import, ast.ImportFrom)):
+                    for alias in child.names:
+                        references.append((alias.name.rsplit(".", 1)[-1], "import", child.lineno))
+                visit(child, parent, in_class)
+
+    visit(tree, "")
+    return symbols, references
+
+
+def _regex_symbols(source: str, rules) -> Tuple[List[Symbol], List[Reference]]:
+    line_starts = [0] + [match.end() for match in re.finditer("\n", source)]
+
+    def line_of(offset: int) -> int:
+        low, high = 0, len(line_starts)
+        while low < high - 1:
+            middle = (low + high) // 2
+            if line_starts[middle] <= offset:
+                low = middle
+            else:
+                high = middle
+        return low + 1
+
+    symbols = [(match.group(1), kind, line_of(match.start(1)), "")
+               for pattern, kind in rules for match in pattern.finditer(source)]
+    defined_at = {(name, line) for name, _, line, _ in symbols}
+    references = []
+    for match in REGEX_CALL.finditer(source):
+        name, line = match.group(1), line_of(match.start(1))
+        if name not in CALL_KEYWORDS and (name, line) not in defined_at:
+            references.append((name, "call", line))
+    return symbols, references
+
+
+def parse_file(path: str, source: str) -> Tuple[List[Symbol], List[Reference]]:
+    """
+    Definitions and references of one source file; Python is parsed with
+    ``ast``, other languages with per-language patterns.
+    """
+    if path.endswith(".py"):
+        try:
+            return _python_symbols(source)
+        except (SyntaxError, ValueError, RecursionError):
+            return [], []
+    for extensions, rules in REGEX_DEFINITIONS.items():
+        if path.endswith(extensions):
+            return _regex_symbols(source, rules)
+    return [], []
+
+
+def parse_job(job: Tuple[str, str, Optional[str]]):
+    """
+    Reads, hashes and parses one file; runs in a worker process. Symbols
+    and references are None when the hash equals the known one.
+    """
+    root, relative, known_digest = job
+    with open(os.path.join(root, relative), "rb") as handle:
+        content = handle.read()
+    digest = hashlib.sha1(content).hexdigest()
+    if digest == known_digest:
+        return relative, digest, None, None
+    symbols, references = parse_file(relative, content.decode("utf-8", errors="replace"))
+    return relative, digest, symbols, references
@@ -0,0 +1,329 @@
+import atexit
+import contextvars
+import functools
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from pr_review_crew.storage import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Set to 1 to write a trace and a metrics file per process
+TRACE_ENABLED = os.getenv("PR_REVIEW_TRACE", "0") == "1"
+TRACE_DIR = os.getenv("PR_REVIEW_TRACE_DIR") or os.path.join(CACHE_DIR, "traces")
+# Trace and metrics files of this many runs are kept; older ones are deleted when a tracer starts
+TRACE_KEEP = int(os.getenv("PR_REVIEW_TRACE_KEEP", "20"))
+# Spans between two rewrites of the metrics file
+METRICS_FLUSH_EVERY = int(os.getenv("PR_REVIEW_METRICS_FLUSH_EVERY", "50"))
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("pr_review_span", default=None)
+
+# Collapses identifiers in GitHub API paths so metrics keep a bounded set of names
+ROUTE_RULES = [
+    (re.compile(r"^https?://[^/]+"), ""),
+    (re.compile(r"\?.*$"), ""),
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{repo}"),
+    (re.compile(r"/contents/.*$"), "/contents/{path}"),
+    (re.compile(r"/(git/trees|git/blobs|zipball|tarball|commits)/[^/]+"), r"/\1/{ref}"),
+    (re.compile(r"/git/ref/heads/.*$"), "/git/ref/heads/{branch}"),
+    (re.compile(r"/compare/[^/]+"), "/compare/{range}"),
+    (re.compile(r"/\d+(?=/|$)"), "/{n}"),
+]
+
+
+def route_name(method: str, url: str) -> str:
+    path = url
+    for pattern, replacement in ROUTE_RULES:
+        path = pattern.sub(replacement, path)
+    return f"{method.upper()} {path or '/'}"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class Span:
+    __slots__ = ("kind", "name", "span_id", "parent_id", "started", "attrs", "status")
+
+    def __init__(self, kind: str, name: str, parent_id: Optional[str], attrs: dict):
+        self.kind = kind
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.started = time.time()
+        self.attrs = attrs
+        self.status = "ok"
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    Writes finished spans to a JSON-lines trace file and aggregates them
+    into Prometheus-style text metrics (count, duration, bytes and tokens
+    per kind, name and status).
+    """
+
+    def __init__(self, directory: str = TRACE_DIR, keep: int = TRACE_KEEP):
+        run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        os.makedirs(directory, exist_ok=True)
+        prune_traces(directory, max(keep - 1, 0))
+        self.trace_id = uuid.uuid4().hex
+        self.trace_path = os.path.join(directory, f"trace_{run_id}.jsonl")
+        self.metrics_path = os.path.join(directory, f"metrics_{run_id}.prom")
+        self._lock = threading.Lock()
+        self._file = open(self.trace_path, "a", encoding="utf-8", buffering=1)
+        self._metrics: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        self._pending = 0
+
+    def record(self, kind: str, name: str, started: float, duration: float, status: str = "ok",
+               parent_id: Optional[str] = None, span_id: Optional[str] = None, **attrs) -> None:
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": span_id or uuid.uuid4().hex[:16],
+            "parent_id": parent_id,
+            "kind": kind,
+            "name": name,
+            "start": round(started, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "status": status,
+            "attrs": attrs,
+        }
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            metric = self._metrics.setdefault(
+                (kind, name, status), {"count": 0, "seconds": 0.0, "bytes": 0, "tokens": 0}
+            )
+            metric["count"] += 1
+            metric["seconds"] += duration
+            metric["bytes"] += attrs.get("bytes") or 0
+            metric["tokens"] += (attrs.get("prompt_tokens") or 0) + (attrs.get("completion_tokens") or 0)
+            self._pending += 1
+            flush = self._pending >= METRICS_FLUSH_EVERY
+        if flush:
+            self.write_metrics()
+
+    def render_metrics(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+            self._pending = 0
+        series = [
+            ("pr_review_spans_total", "counter", "Finished spans", "count"),
+            ("pr_review_span_seconds_total", "counter", "Total span duration in seconds", "seconds"),
+            ("pr_review_bytes_total", "counter", "Bytes transferred by spans", "bytes"),
+            ("pr_review_tokens_total", "counter", "LLM tokens (estimated) used by spans", "tokens"),
+        ]
+        for metric_name, metric_type, help_text, field in series:
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} {metric_type}")
+            for (kind, name, status), values in metrics:
+                labels = f'kind="{kind}",name="{_escape(name)}",status="{status}"'
+                lines.append(f"{metric_name}{{{labels}}} {values[field]:g}")
+        for metric_name, help_text, value in _gauges():
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} gauge")
+            lines.append(f"{metric_name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self) -> None:
+        text = self.render_metrics()
+        temporary = f"{self.metrics_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(temporary, self.metrics_path)
+
+    def close(self) -> None:
+        self.write_metrics()
+        with self._lock:
+            self._file.close()
+
+
+def prune_traces(directory: str, keep: int) -> int:
+    """
+    Deletes the trace and metrics files of all but the ``keep`` most recent
+    runs in ``directory``. Returns the number of runs deleted.
+    """
+    traces = sorted(glob.glob(os.path.join(directory, "trace_*.jsonl")), key=os.path.getmtime, reverse=True)
+    for trace_path in traces[keep:]:
+        run_id = os.path.basename(trace_path)[len("trace_"):-len(".jsonl")]
+        for path in (trace_path, os.path.join(directory, f"metrics_{run_id}.prom")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return max(len(traces) - keep, 0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _gauges():
+    """
+    Point-in-time values of the GitHub scheduler and the caches.
+    """
+    from pr_review_crew.tools import blob_cache, rate_limiter, response_cache
+
+    gauges = []
+    budget = rate_limiter.stats()
+    if budget["remaining"] is not None:
+        gauges.append(("pr_review_github_remaining", "GitHub requests left in the window", budget["remaining"]))
+    gauges.append(("pr_review_github_queued_writes", "Writes waiting for a slot", budget["queued_writes"]))
+    gauges.append(("pr_review_github_queued_reads", "Reads waiting for a slot", budget["queued_reads"]))
+    http_cache = response_cache.stats()
+    if http_cache:
+        gauges.append(("pr_review_http_cache_hits", "GitHub responses served from the cache", http_cache["hits"]))
+        gauges.append(("pr_review_http_cache_misses", "GitHub responses fetched in full", http_cache["misses"]))
+    blobs = blob_cache.stats()
+    if blobs:
+        gauges.append(("pr_review_blob_cache_hits", "Git blobs served from the blob cache",
+                       blobs["memory_hits"] + blobs["disk_hits"]))
+        gauges.append(("pr_review_blob_cache_misses", "Git blobs fetched from GitHub", blobs["misses"]))
+    # Only reported once a crew has loaded its memory; importing it pulls in crewai and chromadb
+    crew_memory = sys.modules.get("pr_review_crew.crew_memory")
+    memory = crew_memory.stats() if crew_memory is not None else {}
+    if memory:
+        gauges.append(("pr_review_memory_entries", "Crew memory entries", memory["entries"]))
+        gauges.append(("pr_review_memory_disk_bytes", "Crew memory size on disk", memory["disk_bytes"]))
+        gauges.append(("pr_review_memory_search_p95_ms", "Crew memory search latency (p95)", memory["search_p95_ms"]))
+    return gauges
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Optional[Tracer]:
+    """
+    Returns the process-wide tracer, or None when tracing is disabled.
+    """
+    global _tracer
+    if not TRACE_ENABLED:
+        return None
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+                atexit.register(_tracer.close)
+    return _tracer
+
+
+def _forget_tracer() -> None:
+    # A forked child writes its own trace file.
+    global _tracer, _tracer_lock
+    _tracer = None
+    _tracer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_tracer)
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """
+    Traces the enclosed block; nested spans record it as their parent.
+    """
+    tracer = get_tracer()
+    parent = _current_span.get()
+    current = Span(kind, name, parent.span_id if parent else None, attrs)
+    if tracer is None:
+        yield current
+        return
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attrs.setdefault("error", str(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.record(current.kind, current.name, current.started, time.perf_counter() - started,
+                      current.status, current.parent_id, current.span_id, **current.attrs)
+
+
+def traced_tool(func):
+    """
+    Decorator recording a span for every call of a tool function, or of the
+    ``_run`` method of a tool class (named after the tool).
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        name = getattr(args[0], "name", func.__name__) if args and func.__name__ == "_run" else func.__name__
+        with span("tool", name) as current:
+            result = func(*args, **kwargs)
+            if isinstance(result, str):
+                current.set(bytes=len(result.encode("utf-8")))
+            return result
+    return wrapper
+
+
+# Time of the previous step or task callback per thread, for the gap reported with the next one
+_last_event = threading.local()
+
+
+def _since_last_event() -> Tuple[float, float]:
+    now = time.time()
+    previous = getattr(_last_event, "at", None) or now
+    _last_event.at = now
+    return now, now - previous
+
+
+def step_callback(step) -> None:
+    """
+    Crew step callback: records an agent step (a tool call or a final answer).
+
+    crewAI reports a step once it is done, so its start is unknown: the step
+    is recorded as an instant with ``gap_ms``, the time since the previous
+    step or task on the thread. The LLM and tool spans carry real timings.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        return
+    now, gap = _since_last_event()
+    tool = getattr(step, "tool", None)
+    name = f"tool:{tool}" if tool else "final_answer"
+    output = getattr(step, "result", None) or getattr(step, "output", None) or ""
+    current = _current_span.get()
+    tracer.record("agent_step", name, now, 0.0, parent_id=current.span_id if current else None,
+                  gap_ms=round(gap * 1000, 3),
+                  completion_tokens=estimate_tokens(str(getattr(step, "text", "") or "")),
+                  bytes=len(str(output).encode("utf-8")))
+
+
+def task_callback(output) -> None:
+    """
+    Crew task callback: adds the agent and output size of a finished task to
+    the span timing it (see task_graph.DagCrew). Without one, the task is
+    recorded as an instant with ``gap_ms``, like an agent step.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        return
+    now, gap = _since_last_event()
+    raw = str(getattr(output, "raw", "") or "")
+    attrs = dict(agent=str(getattr(output, "agent", "")), completion_tokens=estimate_tokens(raw),
+                 bytes=len(raw.encode("utf-8")))
+    current = _current_span.get()
+    if current is not None and current.kind == "task":
+        current.set(**attrs)
+        return
+    description = str(getattr(output, "description", "") or getattr(output, "name", "") or "task")
+    tracer.record("task", description.strip().splitlines()[0][:80] if description.strip() else "task",
+                  now, 0.0, parent_id=current.span_id if current else None,
+                  gap_ms=round(gap * 1000, 3), **attrs)
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Settings are read at import time, so they are fixed before any test imports the package
+os.environ.setdefault("PR_REVIEW_CACHE_DIR", tempfile.mkdtemp(prefix="pr_review_crew_tests_"))
+os.environ.setdefault("PR_REVIEW_TRACE", "0")
+os.environ.setdefault("GITHUB_TOKEN", "test-token")
+os.environ.setdefault("REPO", "owner/repo")
+os.environ.setdefault("REPO_EXTRACT_DIR", tempfile.mkdtemp(prefix="pr_review_crew_repos_"))
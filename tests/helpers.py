@@ -0,0 +1,20 @@
+from typing import Dict
+
+from pr_review_crew.tools.diff_model import DiffIndex
+
+
+def patch(new_start: int, added=(), removed=(), context=()) -> str:
+    """
+    Builds a one-hunk unified diff: context lines, then removed, then added lines.
+    """
+    lines = [f" {text}" for text in context] + [f"-{text}" for text in removed] + [f"+{text}" for text in added]
+    old_count = len(context) + len(removed)
+    new_count = len(context) + len(added)
+    return f"@@ -{new_start},{old_count} +{new_start},{new_count} @@\n" + "\n".join(lines)
+
+
+def make_index(files: Dict[str, str], head_sha: str = "head") -> DiffIndex:
+    index = DiffIndex(head_sha=head_sha)
+    for file_path, file_patch in files.items():
+        index.add_file(file_path, file_patch)
+    return index
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("crewai_tools")
+
+from pr_review_crew.tools import code_search, git_objects  # noqa: E402
+from pr_review_crew.tools.git_objects import Tree, TreeEntry  # noqa: E402
+
+
+def entry(path, sha):
+    return TreeEntry(path, sha, 10, "100644")
+
+
+# A branch whose recursive listing GitHub truncates after the top level
+TREES = {
+    ("main", True): Tree("root", [entry("README.md", "r1")], True),
+    ("root", False): Tree("root", [entry("README.md", "r1")], False, (entry("src", "src"),)),
+    ("src", True): Tree("src", [entry("app.py", "a1"), entry("lib/util.py", "u1")], False),
+}
+
+
+class FakeCollection:
+    def __init__(self):
+        self.ids = set()
+
+    def upsert(self, ids, documents, metadatas):
+        self.ids.update(ids)
+
+    def delete(self, ids):
+        self.ids.difference_update(ids)
+
+    def count(self):
+        return len(self.ids)
+
+
+class FakeClient:
+    def get_or_create_collection(self, name, embedding_function=None, metadata=None):
+        return FakeCollection()
+
+
+def test_sync_indexes_files_beyond_a_truncated_listing(monkeypatch, tmp_path):
+    monkeypatch.setattr(git_objects, "fetch_tree", lambda repo, ref, recursive=True: TREES[(ref, recursive)])
+    monkeypatch.setattr(code_search, "fetch_blobs", lambda repo, shas: {sha: b"x = 1\n" for sha in shas})
+    index = code_search.EmbeddingIndex("o/r", "main", FakeClient(), str(tmp_path / "state.sqlite3"),
+                                       embedding_function=object())
+
+    counts = index.sync()
+
+    assert counts["embedded"] == 3 and counts["pruned"] == 0
+    assert set(index._stored("files", "path", "blob_sha")) == {"README.md", "src/app.py", "src/lib/util.py"}
+    assert index.indexed_tree() == "root"
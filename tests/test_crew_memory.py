@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("crewai")
+pytest.importorskip("crewai_tools")
+
+from pr_review_crew import crew_memory  # noqa: E402
+from pr_review_crew.crew_memory import MemoryIndex, NamespacedRAGStorage  # noqa: E402
+
+
+class FakeCollection:
+    def __init__(self, name, metadata=None):
+        self.name = name
+        self.metadata = metadata
+        self.documents = {}
+
+    def upsert(self, ids, documents, metadatas):
+        self.documents.update(zip(ids, documents))
+
+    def get(self, include=()):
+        return {"ids": list(self.documents), "documents": list(self.documents.values())}
+
+    def delete(self, ids):
+        for entry_id in ids:
+            self.documents.pop(entry_id, None)
+
+    def count(self):
+        return len(self.documents)
+
+
+class FakeClient:
+    def __init__(self):
+        self.collections = {}
+
+    def get_or_create_collection(self, name, embedding_function=None, metadata=None):
+        return self.collections.setdefault(name, FakeCollection(name, metadata))
+
+    def get_collection(self, name):
+        return self.collections[name]
+
+    def list_collections(self):
+        return list(self.collections.values())
+
+    def delete_collection(self, name):
+        del self.collections[name]
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    client, index = FakeClient(), MemoryIndex(str(tmp_path / "index.sqlite3"))
+    monkeypatch.setattr(crew_memory, "_client", client)
+    monkeypatch.setattr(crew_memory, "_index", index)
+    return client, index
+
+
+def test_compact_adopts_entries_without_bookkeeping(backend):
+    client, index = backend
+    legacy = client.get_or_create_collection("short_term-legacy", metadata={"kind": "short_term", "namespace": "o/r/1"})
+    legacy.upsert(ids=["old"], documents=["written before the index"], metadatas=[{}])
+
+    counts = crew_memory.compact(dedupe_distance=0)
+
+    assert counts["adopted"] == 1
+    assert counts["dropped_namespaces"] == 0
+    assert legacy.documents == {"old": "written before the index"}
+    assert [row[:4] for row in index.collections()] == [("short_term-legacy", "o/r/1", "short_term", 1)]
+
+
+def test_save_evicts_periodically(backend, monkeypatch):
+    client, index = backend
+    storage = NamespacedRAGStorage("short_term", "o/r/1", client, index, embedding_function=object())
+    storage.save("stale", {})
+    index._conn.execute("UPDATE entries SET last_access = 0")
+
+    storage.save("fresh", {})
+    assert storage.collection.count() == 2
+
+    monkeypatch.setattr(crew_memory, "CREW_MEMORY_EVICT_INTERVAL", 0)
+    storage.save("fresher", {})
+    assert sorted(storage.collection.documents.values()) == ["fresh", "fresher"]
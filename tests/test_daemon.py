@@ -0,0 +1,109 @@
+import functools
+import hashlib
+import hmac
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from pr_review_crew import daemon
+from pr_review_crew.daemon import DONE, QUEUED, ReviewQueue, verify_signature
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return ReviewQueue(str(tmp_path / "queue.sqlite3"), coalesce_seconds=0)
+
+
+@pytest.fixture
+def server(queue):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), daemon._handler(queue, "owner/repo"))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(server, payload, headers=None):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/webhook", data=body, method="POST",
+                                     headers={"X-GitHub-Event": "pull_request", **(headers or {})})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def pull_request(number=7, head="head1", action="synchronize"):
+    return {"action": action, "repository": {"full_name": "owner/repo"},
+            "pull_request": {"number": number, "head": {"sha": head}}}
+
+
+def test_pushes_to_a_queued_pr_coalesce_into_one_review(queue):
+    assert queue.enqueue("owner/repo", 7, "head1") == "queued"
+    assert queue.enqueue("owner/repo", 7, "head2") == "coalesced"
+    assert queue.claim(timeout=1) == ("owner/repo", 7, "head2")
+    assert queue.claim(timeout=0.1) is None
+
+
+def test_push_during_a_review_requeues_the_pr_once_it_finishes(queue):
+    queue.enqueue("owner/repo", 7, "head1")
+    queue.claim(timeout=1)
+    assert queue.enqueue("owner/repo", 7, "head2") == "coalesced"
+    queue.finish("owner/repo", 7, ok=True)
+    assert queue.stats()[QUEUED] == 1
+    assert queue.claim(timeout=1) == ("owner/repo", 7, "head2")
+    queue.finish("owner/repo", 7, ok=True)
+    assert queue.stats()[DONE] == 1
+
+
+def test_full_queue_refuses_new_prs(queue):
+    assert queue.enqueue("owner/repo", 7, "head1", max_depth=1) == "queued"
+    assert queue.enqueue("owner/repo", 8, "head1", max_depth=1) is None
+    assert queue.enqueue("owner/repo", 7, "head2", max_depth=1) == "coalesced"
+
+
+def test_signature():
+    body = b'{"action": "opened"}'
+    signature = "sha256=" + hmac.new(b"secret", body, hashlib.sha256).hexdigest()
+    assert verify_signature(body, signature, secret="secret")
+    assert not verify_signature(body, "sha256=0", secret="secret")
+    assert not verify_signature(body, None, secret="secret")
+    assert not verify_signature(body, "sha256=é", secret="secret")
+    assert verify_signature(body, None, secret=None)
+
+
+def test_webhook_queues_and_coalesces(server, queue):
+    assert post(server, pull_request(head="head1")) == \
+        (202, {"status": "queued", "pr": 7, "head_sha": "head1"})
+    assert post(server, pull_request(head="head2"))[1]["status"] == "coalesced"
+    assert post(server, pull_request(action="closed"))[1]["status"] == "ignored"
+    assert queue.stats()[QUEUED] == 1
+
+
+def test_webhook_rejects_payloads_without_a_pr_number(server, queue):
+    payload = pull_request()
+    del payload["pull_request"]["number"]
+    assert post(server, payload)[0] == 400
+    assert post(server, b"[1, 2]")[0] == 400
+    assert post(server, b"not json")[0] == 400
+    assert queue.depth() == 0
+
+
+def test_webhook_refuses_when_the_queue_is_full(server, queue, monkeypatch):
+    monkeypatch.setattr(queue, "enqueue", functools.partial(queue.enqueue, max_depth=1))
+    assert post(server, pull_request(number=7))[0] == 202
+    assert post(server, pull_request(number=8))[0] == 503
+
+
+def test_webhook_checks_the_signature(server, queue, monkeypatch):
+    monkeypatch.setattr(daemon, "verify_signature", functools.partial(verify_signature, secret="secret"))
+    body = json.dumps(pull_request()).encode("utf-8")
+    assert post(server, body, {"X-Hub-Signature-256": "sha256=0"})[0] == 401
+    signature = "sha256=" + hmac.new(b"secret", body, hashlib.sha256).hexdigest()
+    assert post(server, body, {"X-Hub-Signature-256": signature})[0] == 202
@@ -0,0 +1,84 @@
+from pr_review_crew.tools.diff_model import ADDED, CONTEXT, REMOVED, iter_hunks
+
+from tests.helpers import make_index, patch
+
+TWO_HUNKS = (
+    "@@ -1,3 +1,4 @@ def main():\n"
+    " import os\n"
+    "-import sys\n"
+    "+import re\n"
+    "+import json\n"
+    " \n"
+    "@@ -20,2 +21,2 @@\n"
+    " x = 1\n"
+    "-y = 2\n"
+    "+y = 3\n"
+)
+
+
+def test_iter_hunks_tracks_line_numbers():
+    first, second = iter_hunks(TWO_HUNKS, "a.py")
+    assert first.header == "@@ -1,3 +1,4 @@ def main():"
+    assert [(line.kind, line.old_lineno, line.new_lineno) for line in first] == [
+        (CONTEXT, 1, 1), (REMOVED, 2, None), (ADDED, None, 2), (ADDED, None, 3), (CONTEXT, 3, 4),
+    ]
+    assert second.index == 1
+    assert second.new_end == 22
+
+
+def test_content_hash_ignores_position_but_not_path():
+    moved = iter_hunks(patch(50, added=["y = 3"], removed=["y = 2"], context=["x = 1"]), "a.py")
+    original = list(iter_hunks(TWO_HUNKS, "a.py"))[1]
+    (moved,) = moved
+    assert moved.content_hash() == original.content_hash()
+    (renamed,) = iter_hunks(patch(21, added=["y = 3"], removed=["y = 2"]), "b.py")
+    assert renamed.content_hash() != original.content_hash()
+    assert renamed.content_hash(include_path=False) == original.content_hash(include_path=False)
+
+
+def test_find_uses_new_file_line_numbers():
+    index = make_index({"a.py": TWO_HUNKS})
+    assert index.find("a.py", 3).index == 0
+    assert index.find("a.py", 22).index == 1
+    assert index.find("a.py", 10) is None
+    assert index.find("a.py", 30) is None
+    assert index.find("other.py", 1) is None
+    assert index.line("a.py", 2).text == "import re"
+
+
+def test_drop_renumbers_remaining_hunks_and_removes_empty_files():
+    index = make_index({"a.py": TWO_HUNKS, "b.py": patch(1, added=["x"])})
+    dropped = index.drop(lambda hunk: hunk.file_path == "b.py" or hunk.new_start == 1)
+    assert sorted((hunk.file_path, hunk.new_start) for hunk in dropped) == [("a.py", 1), ("b.py", 1)]
+    assert index.files() == ["a.py"]
+    (remaining,) = index.hunks("a.py")
+    assert remaining.index == 0
+    assert index.find("a.py", 21) is remaining
+    assert index.find("a.py", 2) is None
+
+
+def test_discard_hunks_by_content_hash():
+    index = make_index({"a.py": TWO_HUNKS})
+    first = index.hunk("a.py", 0)
+    assert index.discard_hunks({first.content_hash()}) == 1
+    assert [hunk.new_start for hunk in index.all_hunks()] == [21]
+
+
+def test_filtered_keeps_hunk_numbers_and_leaves_original_intact():
+    index = make_index({"a.py": TWO_HUNKS, "b.py": patch(1, added=["x"])})
+    filtered = index.filtered(lambda hunk: hunk.index == 1)
+    assert filtered.files() == ["a.py"]
+    (kept,) = filtered.hunks("a.py")
+    assert kept.index == 1
+    assert filtered.find("a.py", 21) is kept
+    assert filtered.head_sha == index.head_sha
+    assert len(list(index.all_hunks())) == 3
+
+
+def test_skip_file_keeps_summary():
+    index = make_index({"a.py": TWO_HUNKS})
+    hunks = index.skip_file("a.py", "a.py: generated")
+    assert len(hunks) == 2
+    assert "a.py" not in index
+    assert index.find("a.py", 2) is None
+    assert index.skipped == {"a.py": "a.py: generated"}
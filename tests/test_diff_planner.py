@@ -0,0 +1,45 @@
+from pr_review_crew.tools.diff_planner import file_risk, plan_chunks
+
+from tests.helpers import make_index, patch
+
+
+def test_chunks_are_ordered_by_risk():
+    index = make_index({
+        "docs/guide.md": patch(1, added=["text"]),
+        "app/auth.py": patch(1, added=["check()"]),
+        "app/util.py": patch(1, added=["helper()"]),
+    })
+    chunks = plan_chunks(index, budget=10)
+    assert [chunk.files() for chunk in chunks] == [["app/auth.py"], ["app/util.py"], ["docs/guide.md"]]
+    assert [chunk.index for chunk in chunks] == [0, 1, 2]
+    assert chunks[0].score == file_risk("app/auth.py", index.hunks("app/auth.py"))
+
+
+def test_small_hunks_share_a_chunk():
+    index = make_index({"a.py": patch(1, added=["a"]), "b.py": patch(1, added=["b"])})
+    (chunk,) = plan_chunks(index, budget=1000)
+    assert sorted(chunk.files()) == ["a.py", "b.py"]
+    assert chunk.tokens <= 1000
+
+
+def test_oversized_hunk_is_split_on_line_boundaries():
+    lines = [f"line {number}" for number in range(40)]
+    index = make_index({"big.py": patch(1, added=lines)})
+    chunks = plan_chunks(index, budget=30)
+    assert len(chunks) > 1
+    ranges = sorted((start, stop) for chunk in chunks for _, start, stop in chunk.items)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(lines)
+    assert all(previous[1] == current[0] for previous, current in zip(ranges, ranges[1:]))
+    assert all(chunk.tokens <= 30 for chunk in chunks)
+
+
+def test_empty_diff_has_no_chunks():
+    assert plan_chunks(make_index({})) == []
+
+
+def test_render_from_a_line_to_the_end_of_the_hunk():
+    (hunk,) = make_index({"a.py": patch(1, added=["x", "y", "z"])}).hunks("a.py")
+    header, *lines = hunk.render(start=1).splitlines()
+    assert header == "a.py hunk 0 (lines 1-3): @@ -1,0 +1,3 @@"
+    assert [line.split()[-1] for line in lines] == ["+y", "+z"]
+    assert "(lines" not in hunk.render()
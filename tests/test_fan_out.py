@@ -0,0 +1,85 @@
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("crewai_tools")
+
+from pr_review_crew import fan_out  # noqa: E402
+from pr_review_crew.tools import pr_review_tool  # noqa: E402
+
+from tests.helpers import patch  # noqa: E402
+
+
+@pytest.fixture
+def pr(monkeypatch):
+    """
+    A PR whose head and patch can be changed between reviews, reviewed by a crew that does nothing.
+    """
+    state = {"head": "head1", "patch": patch(1, added=["a = 1"])}
+
+    def load_files(pr_number, index):
+        index.add_file("a.py", state["patch"])
+        return True
+
+    monkeypatch.setattr(pr_review_tool, "fetch_pr_head", lambda pr_number: state["head"])
+    monkeypatch.setattr(pr_review_tool, "_load_pr_files", load_files)
+    monkeypatch.setattr(pr_review_tool, "_load_compare_files", lambda since, head, index: False)
+    monkeypatch.setattr(pr_review_tool, "SKIP_GENERATED", False)
+    monkeypatch.setattr(pr_review_tool, "HUNK_MEMO", False)
+
+    reviewed = []
+
+    class Crew:
+        def __init__(self, pr_number):
+            self.pr_number = pr_number
+
+        def crew(self):
+            return self
+
+        def kickoff(self, inputs):
+            index = pr_review_tool.load_diff_index(self.pr_number)
+            reviewed.append((index.head_sha, [line.text for hunk in index.all_hunks() for line in hunk]))
+            return "done"
+
+    monkeypatch.setitem(sys.modules, "pr_review_crew.crew", types.SimpleNamespace(PrReviewCrewCrew=Crew))
+    pr_review_tool.forget_pr(7)
+    state["reviewed"] = reviewed
+    return state
+
+
+def test_each_review_sees_the_current_push(pr):
+    fan_out.review_pr(7, {})
+    pr["head"], pr["patch"] = "head2", patch(1, added=["a = 2"])
+    pr_review_tool._diff_indexes.pop(7, None)
+    # A stale index left by another tool call must not be reused either
+    stale = pr_review_tool.DiffIndex(head_sha="head1")
+    pr_review_tool._diff_indexes[7] = stale
+    fan_out.review_pr(7, {})
+    assert pr["reviewed"] == [("head1", ["a = 1"]), ("head2", ["a = 2"])]
+
+
+def test_review_drops_the_pr_caches(pr):
+    pr_review_tool._hunk_comments[7] = {"hunk": [{"body": "old"}]}
+    fan_out.review_pr(7, {})
+    for cache in (pr_review_tool._diff_indexes, pr_review_tool._static_reports,
+                  pr_review_tool._review_plans, pr_review_tool._hunk_comments):
+        assert 7 not in cache
+
+
+def test_only_hunks_shown_to_the_reviewer_are_memoized(pr, monkeypatch, tmp_path):
+    from pr_review_crew.tools.review_state import ReviewStateStore
+
+    store = ReviewStateStore(str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(pr_review_tool, "get_review_state", lambda: store)
+    monkeypatch.setattr(pr_review_tool, "HUNK_MEMO", True)
+    monkeypatch.setattr(pr_review_tool, "HUNK_MEMO_MIN_LINES", 1)
+    pr["patch"] = patch(1, added=["shown = 1"]) + "\n@@ -10,0 +10,1 @@\n+unplanned = 1"
+
+    index = pr_review_tool.load_diff_index(7, refresh=True)
+    shown, unplanned = index.all_hunks()
+    pr_review_tool._mark_shown(7, shown)
+    pr_review_tool.record_review(7)
+
+    hashes = [hunk.content_hash(include_path=False) for hunk in (shown, unplanned)]
+    assert set(store.memoized_hunks("owner/repo", 8, hashes)) == {hashes[0]}
@@ -0,0 +1,53 @@
+import random
+import string
+
+from pr_review_crew.tools import file_classifier
+from pr_review_crew.tools.diff_model import iter_hunks
+from pr_review_crew.tools.file_classifier import classify, parse_gitattributes, summarize
+
+from tests.helpers import patch
+
+
+def hunks(path, **lines):
+    return list(iter_hunks(patch(1, **lines), path))
+
+
+def test_classifies_by_path():
+    assert classify("poetry.lock", hunks("poetry.lock", added=["x"])) == "lockfile"
+    assert classify("web/node_modules/a/index.js", hunks("x", added=["x"])) == "vendored"
+    assert classify("api/service_pb2.py", hunks("x", added=["x"])) == "generated"
+    assert classify("static/app.min.js", hunks("x", added=["x"])) == "generated"
+    assert classify("src/app.py", hunks("src/app.py", added=["print(1)"])) is None
+
+
+def test_classifies_by_content():
+    assert classify("schema.py", hunks("schema.py", added=["# @generated by protoc", "x = 1"])) == "generated"
+    assert classify("bundle.js", hunks("bundle.js", added=["x" * 1000])) == "minified"
+    rng = random.Random(0)
+    blob = ["".join(rng.choice(string.ascii_letters + string.digits + "+/") for _ in range(76)) for _ in range(80)]
+    assert classify("data.txt", hunks("data.txt", added=blob)) == "encoded data"
+
+
+def test_too_many_changed_lines(monkeypatch):
+    monkeypatch.setattr(file_classifier, "MAX_CHANGED_LINES", 3)
+    assert classify("a.py", hunks("a.py", added=["a", "b"], removed=["c", "d"])) == "too large"
+
+
+def test_gitattributes_override_path_rules():
+    attributes = parse_gitattributes(
+        "# comment\n"
+        "*.pb.go linguist-generated=false\n"
+        "docs/api/** linguist-generated\n"
+        "assets/*.bin binary\n"
+        "third_party/** -linguist-vendored\n"
+    )
+    assert classify("docs/api/index.md", hunks("x", added=["x"]), attributes) == "generated"
+    assert classify("assets/logo.bin", hunks("x", added=["x"]), attributes) == "binary"
+    assert classify("api/service.pb.go", hunks("x", added=["x"]), attributes) is None
+    assert classify("api/service.pb.go", hunks("x", added=["x"])) == "generated"
+
+
+def test_lockfile_summary_lists_version_changes():
+    lock = hunks("poetry.lock", context=['name = "requests"'], removed=['version = "2.31.0"'],
+                 added=['version = "2.32.0"'])
+    assert "requests 2.31.0 -> 2.32.0" in summarize("poetry.lock", lock, "lockfile")
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+pytest.importorskip("crewai_tools")
+
+from pr_review_crew.tools import pr_review_tool  # noqa: E402
+from pr_review_crew.tools.rate_limiter import RateLimitExceeded  # noqa: E402
+from pr_review_crew.tools.review_buffer import ReviewComment, review_buffer  # noqa: E402
+
+from tests.helpers import make_index, patch  # noqa: E402
+
+
+def test_rate_limited_review_stays_pending(monkeypatch):
+    def post(*args, **kwargs):
+        raise RateLimitExceeded("paused", 1200)
+
+    monkeypatch.setattr(pr_review_tool.github_client, "post", post)
+    review_buffer.add(41, ReviewComment(path="a.py", body="nit"))
+    try:
+        assert pr_review_tool.submit_pending_review(41, dry_run_path=None) == \
+            "GitHub rate limit reached; retry after 1200s."
+        assert review_buffer.pending(41)
+    finally:
+        review_buffer.mark_flushed(41)
+
+
+def test_review_is_pinned_to_the_reviewed_head(monkeypatch, tmp_path):
+    monkeypatch.setitem(pr_review_tool._diff_indexes, 42, make_index({"a.py": patch(1, added=["x"])}, head_sha="abc"))
+    review_buffer.add(42, ReviewComment(path="a.py", body="nit", line=1))
+    dry_run = tmp_path / "reviews.jsonl"
+    pr_review_tool.submit_pending_review(42, dry_run_path=str(dry_run))
+    assert json.loads(dry_run.read_text())["review"]["commit_id"] == "abc"
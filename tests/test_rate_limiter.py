@@ -0,0 +1,88 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from pr_review_crew.tools.rate_limiter import READ, WRITE, RateLimitExceeded, RateLimitScheduler
+
+
+def response(status=200, **headers):
+    return SimpleNamespace(status_code=status, headers={key.replace("_", "-"): str(value) for key, value in headers.items()})
+
+
+def test_tokens_and_concurrency_gate_requests():
+    scheduler = RateLimitScheduler(rate=10, burst=1, max_concurrency=1)
+    now = time.monotonic()
+    assert scheduler._wait_time(READ, now) == 0
+    scheduler._tokens = 0.5
+    assert abs(scheduler._wait_time(READ, now) - 0.05) < 1e-9
+    scheduler._in_flight = 1
+    assert scheduler._wait_time(READ, now) is None
+
+
+def test_reads_wait_for_reset_when_only_the_write_reserve_is_left():
+    scheduler = RateLimitScheduler(write_reserve=50, max_wait=300)
+    scheduler.observe(response(**{"X_RateLimit_Remaining": 10, "X_RateLimit_Limit": 5000,
+                                  "X_RateLimit_Reset": time.time() + 60}))
+    now = time.monotonic()
+    assert 0 < scheduler._wait_time(READ, now) <= 60
+    assert scheduler._wait_time(WRITE, now) == 0
+
+
+def test_reads_fail_fast_on_the_write_reserve_when_the_reset_is_far():
+    scheduler = RateLimitScheduler(write_reserve=50, max_wait=300)
+    scheduler.observe(response(**{"X_RateLimit_Remaining": 10, "X_RateLimit_Limit": 5000,
+                                  "X_RateLimit_Reset": time.time() + 3000}))
+    now = time.monotonic()
+    with pytest.raises(RateLimitExceeded):
+        scheduler._wait_time(READ, now)
+    assert scheduler._wait_time(WRITE, now) == 0
+    with pytest.raises(RateLimitExceeded):
+        with scheduler.slot():
+            pass
+    assert scheduler.stats()["queued_reads"] == 0
+
+
+def test_observe_updates_budget_and_paces_low_quota():
+    scheduler = RateLimitScheduler(rate=10, max_concurrency=8)
+    delay = scheduler.observe(response(**{"X_RateLimit_Remaining": 100, "X_RateLimit_Limit": 5000,
+                                          "X_RateLimit_Reset": time.time() + 1000}))
+    assert delay is None
+    assert scheduler.remaining == 100 and scheduler.limit == 5000
+    assert scheduler.current_rate() < 10
+    assert scheduler.concurrency() == 1
+
+
+def test_retry_after_blocks_everyone():
+    scheduler = RateLimitScheduler()
+    assert scheduler.observe(response(429, Retry_After=2)) == 2.0
+    assert 0 < scheduler._wait_time(WRITE, time.monotonic()) <= 2
+
+
+def test_search_quota_does_not_touch_core_budget():
+    scheduler = RateLimitScheduler()
+    scheduler.observe(response(**{"X_RateLimit_Resource": "search", "X_RateLimit_Remaining": 1}))
+    assert scheduler.remaining is None
+
+
+def test_pause_beyond_max_wait_fails_fast_instead_of_blocking():
+    scheduler = RateLimitScheduler(max_wait=5)
+    reset = time.time() + 3600
+    delay = scheduler.observe(response(403, **{"X_RateLimit_Remaining": 0, "X_RateLimit_Limit": 5000,
+                                               "X_RateLimit_Reset": reset}))
+    assert delay > scheduler.max_wait
+    started = time.monotonic()
+    with pytest.raises(RateLimitExceeded):
+        with scheduler.slot():
+            pass
+    assert time.monotonic() - started < 1
+    assert scheduler.stats()["queued_reads"] == 0
+
+
+def test_pause_within_max_wait_is_waited_out():
+    scheduler = RateLimitScheduler(max_wait=5)
+    scheduler.observe(response(429, Retry_After=0.2))
+    started = time.monotonic()
+    with scheduler.slot(write=True):
+        pass
+    assert 0.15 < time.monotonic() - started < 2
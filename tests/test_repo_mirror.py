@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from pr_review_crew.tools import git_objects, repo_mirror
+from pr_review_crew.tools.git_objects import Tree, TreeEntry
+
+COMMIT = "c" * 40
+
+
+def entry(path, sha, mode="100644"):
+    return TreeEntry(path, sha, 10, mode)
+
+
+# A repository whose recursive listing GitHub truncates: the top level and one directory
+TREES = {
+    ("root", True): Tree("root", [entry("README.md", "r1")], True),
+    ("root", False): Tree("root", [entry("README.md", "r1")], False, (entry("src", "src"),)),
+    ("src", True): Tree("src", [entry("app.py", "a2"), entry("lib/util.py", "u1")], False),
+}
+
+
+@pytest.fixture
+def truncated_tree(monkeypatch):
+    def fetch_tree(repo, ref, recursive=True):
+        return TREES[("root" if ref == COMMIT else ref, recursive)]
+    monkeypatch.setattr(git_objects, "fetch_tree", fetch_tree)
+
+
+def test_complete_tree_walks_truncated_directories(truncated_tree):
+    tree = git_objects.fetch_complete_tree("o/r", COMMIT)
+    assert not tree.truncated
+    assert sorted(item.path for item in tree.entries) == ["README.md", "src/app.py", "src/lib/util.py"]
+
+
+def test_sync_of_truncated_tree_keeps_files_beyond_the_cutoff(truncated_tree, monkeypatch, tmp_path):
+    monkeypatch.setattr(repo_mirror, "resolve_commit", lambda repo, ref: COMMIT)
+    monkeypatch.setattr(repo_mirror, "fetch_blobs", lambda repo, shas, sizes=None: {sha: b"new" for sha in shas})
+    mirror = repo_mirror.RepoMirror("o", "r", "main")
+    mirror.path = str(tmp_path / "mirror")
+    mirror.manifest_path = f"{mirror.path}.manifest.json"
+    for path in ("README.md", "src/app.py", "src/lib/util.py"):
+        os.makedirs(os.path.dirname(os.path.join(mirror.path, path)), exist_ok=True)
+        with open(os.path.join(mirror.path, path), "wb") as handle:
+            handle.write(b"old")
+    mirror._save_manifest("old-tree", {"README.md": "r1", "src/app.py": "a1", "src/lib/util.py": "u1"})
+
+    result = mirror.sync()
+
+    assert result["mode"] == "incremental"
+    assert (result["fetched"], result["removed"]) == (1, 0)
+    assert (tmp_path / "mirror" / "src" / "lib" / "util.py").read_bytes() == b"old"
+    assert (tmp_path / "mirror" / "src" / "app.py").read_bytes() == b"new"
+    assert set(mirror._load_manifest()["files"]) == {"README.md", "src/app.py", "src/lib/util.py"}
+
+
+def test_archive_is_pinned_to_the_listed_commit(monkeypatch, tmp_path):
+    monkeypatch.setattr(repo_mirror, "resolve_commit", lambda repo, ref: COMMIT)
+    monkeypatch.setattr(repo_mirror, "fetch_complete_tree", lambda repo, ref: Tree("tree", [], False))
+    urls = []
+
+    def download_archive(url, headers):
+        urls.append(url)
+        return None, "stop"
+
+    monkeypatch.setattr(repo_mirror, "download_archive", download_archive)
+    mirror = repo_mirror.RepoMirror("o", "r", "main")
+    mirror.path = str(tmp_path / "fresh")
+    with pytest.raises(RuntimeError):
+        mirror.sync()
+    assert urls and urls[0].endswith(f"/zipball/{COMMIT}")
@@ -0,0 +1,15 @@
+from pr_review_crew.tools.review_state import ReviewStateStore
+
+
+def test_memo_never_answers_a_pr_from_its_own_review(tmp_path):
+    store = ReviewStateStore(str(tmp_path / "state.sqlite3"))
+    store.memoize_hunks("o/r", 7, [("hash", "a.py", [{"offset": 1, "body": "nit"}])])
+    assert store.memoized_hunks("o/r", 7, ["hash"]) == {}
+    assert store.memoized_hunks("o/r", 8, ["hash"]) == {"hash": (7, [{"offset": 1, "body": "nit"}])}
+    assert store.memoized_hunks("other/repo", 8, ["hash"]) == {}
+
+
+def test_memo_expires(tmp_path):
+    store = ReviewStateStore(str(tmp_path / "state.sqlite3"))
+    store.memoize_hunks("o/r", 7, [("hash", "a.py", [])])
+    assert store.memoized_hunks("o/r", 8, ["hash"], ttl=-1) == {}
@@ -0,0 +1,26 @@
+import multiprocessing
+
+from pr_review_crew.tools.static_checks import STATIC_CHECKS_PARALLEL_MIN_FILES, run_static_checks
+
+from tests.helpers import make_index, patch
+
+
+def _check_many_files(results):
+    try:
+        index = make_index({f"f{number}.py": patch(1, added=["x = 1"])
+                            for number in range(STATIC_CHECKS_PARALLEL_MIN_FILES + 1)})
+        results.put(run_static_checks(index, {}, max_workers=2).total_hunks)
+    except BaseException as e:
+        results.put(repr(e))
+
+
+def test_checks_run_inside_a_daemon_process():
+    # fan_out reviews each PR in a daemon process, which may not start a process pool
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_check_many_files, args=(results,), daemon=True)
+    process.start()
+    try:
+        assert results.get(timeout=60) == STATIC_CHECKS_PARALLEL_MIN_FILES + 1
+    finally:
+        process.join()
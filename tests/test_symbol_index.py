@@ -0,0 +1,30 @@
+import multiprocessing
+
+import pytest
+
+pytest.importorskip("crewai_tools")
+
+from pr_review_crew.tools.symbol_index import SYMBOL_PARALLEL_MIN_FILES, SymbolIndex  # noqa: E402
+
+
+def _index_many_files(root, results):
+    try:
+        results.put(SymbolIndex(root, path=f"{root}.sqlite3").refresh(max_workers=2)["parsed"])
+    except BaseException as e:
+        results.put(repr(e))
+
+
+def test_index_refreshes_inside_a_daemon_process(tmp_path):
+    # fan_out reviews each PR in a daemon process, which may not start a process pool
+    root = tmp_path / "repo"
+    root.mkdir()
+    for number in range(SYMBOL_PARALLEL_MIN_FILES):
+        (root / f"module{number}.py").write_text(f"def function{number}():\n    pass\n")
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_index_many_files, args=(str(root), results), daemon=True)
+    process.start()
+    try:
+        assert results.get(timeout=60) == SYMBOL_PARALLEL_MIN_FILES
+    finally:
+        process.join()
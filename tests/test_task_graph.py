@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("crewai")
+
+from pr_review_crew.task_graph import critical_path, dependencies, run_graph  # noqa: E402
+
+
+class FakeTask:
+    def __init__(self, name, duration=0.0, context=None):
+        self.name = name
+        self.duration = duration
+        self.context = context
+
+    def __str__(self):
+        return self.name
+
+
+def review_graph():
+    analyze = FakeTask("analyze", 0.2)
+    gather = FakeTask("gather", 0.1, context=[])
+    review = FakeTask("review", 0.05, context=[analyze, gather])
+    propose = FakeTask("propose", 0.05)
+    return [analyze, gather, review, propose]
+
+
+def test_dependencies_follow_context_links():
+    assert dependencies(review_graph()) == {0: [], 1: [], 2: [0, 1], 3: [2]}
+
+
+def test_critical_path_is_the_slowest_chain():
+    graph = {0: [], 1: [], 2: [0, 1], 3: [2]}
+    assert critical_path(graph, {0: 1.0, 1: 3.0, 2: 1.0, 3: 1.0}) == [1, 2, 3]
+    assert critical_path({}, {}) == []
+
+
+def test_independent_tasks_overlap():
+    tasks = review_graph()
+    running, overlapped, lock = set(), [], threading.Lock()
+
+    def run(task):
+        with lock:
+            if running:
+                overlapped.append((task.name, set(running)))
+            running.add(task.name)
+        time.sleep(task.duration)
+        with lock:
+            running.discard(task.name)
+
+    durations = run_graph(tasks, run, max_workers=3)
+    assert set(durations) == {0, 1, 2, 3}
+    assert any(name in ("analyze", "gather") for name, _ in overlapped)
+    assert not any(name in ("review", "propose") for name, _ in overlapped)
+
+
+def test_pool_size_bounds_concurrency():
+    tasks = [FakeTask(str(number), 0.02, context=[]) for number in range(6)]
+    peak, running, lock = [0], [0], threading.Lock()
+
+    def run(task):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(task.duration)
+        with lock:
+            running[0] -= 1
+
+    run_graph(tasks, run, max_workers=2)
+    assert peak[0] == 2
+
+
+def test_failure_stops_dependent_tasks():
+    tasks = review_graph()
+    ran = []
+
+    def run(task):
+        ran.append(task.name)
+        if task.name == "gather":
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        run_graph(tasks, run, max_workers=2)
+    assert "review" not in ran and "propose" not in ran
+
+
+def test_tasks_waiting_on_each_other_raise_a_clear_error():
+    first = FakeTask("first")
+    second = FakeTask("second", context=[])
+    first.context = [second]
+    second.context = [first]
+    with pytest.raises(ValueError, match="first, second"):
+        run_graph([first, second], lambda task: None)
+
+
+class FakeUsage:
+    def __init__(self):
+        self.total = 1
+
+    def add_usage_metrics(self, other):
+        self.total += other.total
+
+
+class FakeCrewOutput:
+    def __init__(self, raw):
+        self.raw = raw
+        self.token_usage = FakeUsage()
+        self.tasks_output = []
+
+
+def test_dag_crew_hands_each_task_its_predecessor_output(monkeypatch):
+    from types import SimpleNamespace
+
+    from pr_review_crew import task_graph
+
+    seen = {}
+
+    class OneTaskCrew:
+        def __init__(self, agents, tasks, **kwargs):
+            (self.task,) = tasks
+
+        def kickoff(self, inputs):
+            task = self.task
+            seen[task.name] = [dependency.output.raw for dependency in task.context or []]
+            task.output = FakeCrewOutput(f"{task.name} output")
+            return task.output
+
+    monkeypatch.setattr(task_graph, "Crew", OneTaskCrew)
+    agent = SimpleNamespace(copy=lambda: SimpleNamespace(copy=None))
+    tasks = [FakeTask("clone"), FakeTask("readme"), FakeTask("summary", context=[])]
+    for task in tasks:
+        task.agent, task.output = agent, None
+    crew = SimpleNamespace(
+        tasks=tasks, agents=[agent], process=task_graph.Process.sequential, max_parallel_tasks=2,
+        memory=False, short_term_memory=None, long_term_memory=None, entity_memory=None,
+        step_callback=None, task_callback=None, max_rpm=None, output_log_file=None, verbose=False,
+    )
+
+    result = task_graph.DagCrew.kickoff(crew, inputs={})
+
+    assert seen == {"clone": [], "readme": ["clone output"], "summary": []}
+    assert tasks[1].context is None
+    assert result.raw == "summary output"
+    assert result.token_usage.total == 3
@@ -0,0 +1,56 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from pr_review_crew import tracing
+
+
+def test_tracing_is_opt_in_and_stays_under_the_cache_dir():
+    assert os.environ["PR_REVIEW_TRACE"] == "0"
+    assert tracing.get_tracer() is None
+    assert tracing.TRACE_DIR.startswith(os.environ["PR_REVIEW_CACHE_DIR"])
+
+
+def test_prune_keeps_the_most_recent_runs(tmp_path):
+    for number in range(5):
+        for name in (f"trace_{number}.jsonl", f"metrics_{number}.prom"):
+            (tmp_path / name).write_text("")
+            os.utime(tmp_path / name, (number, number))
+    assert tracing.prune_traces(str(tmp_path), 2) == 3
+    assert sorted(os.listdir(tmp_path)) == ["metrics_3.prom", "metrics_4.prom", "trace_3.jsonl", "trace_4.jsonl"]
+
+
+@pytest.fixture
+def tracer(monkeypatch, tmp_path):
+    tracer = tracing.Tracer(str(tmp_path))
+    monkeypatch.setattr(tracing, "TRACE_ENABLED", True)
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    yield tracer
+    tracer.close()
+
+
+def spans(tracer):
+    with open(tracer.trace_path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def test_steps_are_instants_with_the_gap_since_the_previous_callback(tracer):
+    tracing.step_callback(SimpleNamespace(tool="search", result="x", text="thought"))
+    time.sleep(0.05)
+    tracing.step_callback(SimpleNamespace(tool=None, output="done", text=""))
+    first, second = spans(tracer)
+    assert first["duration_ms"] == second["duration_ms"] == 0
+    assert second["name"] == "final_answer"
+    assert second["attrs"]["gap_ms"] >= 50
+
+
+def test_task_callback_annotates_the_span_timing_the_task(tracer):
+    with tracing.span("task", "review"):
+        time.sleep(0.02)
+        tracing.task_callback(SimpleNamespace(description="review", raw="looks good", agent="Reviewer"))
+    (task,) = spans(tracer)
+    assert task["kind"] == "task" and task["duration_ms"] >= 20
+    assert task["attrs"]["agent"] == "Reviewer" and task["attrs"]["bytes"] == len("looks good")